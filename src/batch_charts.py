@@ -0,0 +1,164 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import instrumentation
+from data_extractor import DataExtractor
+from data_visualizer import DataVisualizer
+from model_store import ProjectionModelStore
+from position_groups import POSITION_GROUPS, get_group_by_position, get_group_label
+
+# État propre à chaque processus de travail : données chargées une seule fois par processus
+_worker_state = {}
+
+
+def init_worker(file_path, model_cache_dir):
+    """Initialise un processus de travail : chargement de l'instantané des données et visualisation headless."""
+    _worker_state['extractor'] = DataExtractor(file_path)
+    _worker_state['model_store'] = ProjectionModelStore(cache_dir=model_cache_dir)
+
+
+def render_team(extractor, team_name):
+    """Option 1 : joueurs d'une équipe."""
+    player_data = extractor.get_players_by_team(team_name)
+    if player_data.empty:
+        return None
+    filtered_features = player_data[['Passes progressives', 'Possessions progressives']].dropna()
+    visualizer = DataVisualizer(filtered_features, player_data, color1="#000000", color2="#3b3700", headless=True)
+    return visualizer.plot_players_by_team(team_name)
+
+
+def render_position_group(extractor, group_key):
+    """Option 6 : joueurs d'un groupe de postes, toutes équipes confondues."""
+    positions = POSITION_GROUPS[group_key]
+    player_data = extractor.query().position(positions).collect()
+    if player_data.empty:
+        return None
+    filtered_features = player_data[['Passes progressives', 'Possessions progressives']].dropna()
+    visualizer = DataVisualizer(filtered_features, player_data, color1="#000000", color2="#3b3700", headless=True)
+    return visualizer.plot_players_by_position(get_group_label(group_key), positions=positions)
+
+
+def render_player(extractor, player_name, model_store):
+    """Option 2 : clustering d'un joueur avec les autres joueurs de son groupe de postes."""
+    match = extractor.resolve_player_name(player_name)
+    if match is None:
+        return None
+    if match.name != player_name:
+        print(f"« {player_name} » : {match.name}" + (f" ({match.team})" if match.team else ""))
+    player_name, team_name = match.name, match.team
+    player = extractor.data.iloc[match.rows]
+    group_key = get_group_by_position(player['Position'].iloc[0])
+    if group_key is None:
+        return None
+    group = extractor.feature_store.group(group_key)
+    offensive_features, defensive_features = group.offensive_features, group.defensive_features
+    visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700",
+                                model_store=model_store, headless=True, name_index=extractor.names)
+    return visualizer.clustering_player_comparison(player_name, extractor.data, offensive_features, defensive_features, group=group,
+                                                   team_name=team_name)
+
+
+def run_job(job):
+    """Exécute un graphique dans le processus courant et renvoie (job, chemin, durée, erreur)."""
+    kind, target = job
+    extractor = _worker_state['extractor']
+    start = time.perf_counter()
+    try:
+        if kind == 'team':
+            path = render_team(extractor, target)
+        elif kind == 'position':
+            path = render_position_group(extractor, target)
+        elif kind == 'player':
+            path = render_player(extractor, target, _worker_state['model_store'])
+        else:
+            raise ValueError(f"Type de tâche inconnu : {kind}")
+        error = None if path else "aucun joueur trouvé"
+    except Exception as err:
+        path, error = None, f"{type(err).__name__}: {err}"
+    return job, path, time.perf_counter() - start, error
+
+
+def build_jobs(extractor, teams=None, positions=None, players=None):
+    """Construit la liste des tâches ; 'all' sélectionne toutes les équipes ou tous les groupes de postes."""
+    jobs = []
+    if teams:
+        team_names = sorted(extractor.index.team_index) if teams == ['all'] else teams
+        jobs += [('team', team_name) for team_name in team_names]
+    if positions:
+        group_keys = list(POSITION_GROUPS) if positions == ['all'] else [
+            key for key in POSITION_GROUPS if key.split('.')[0] in positions or get_group_label(key) in positions
+        ]
+        jobs += [('position', group_key) for group_key in group_keys]
+    if players:
+        jobs += [('player', player_name) for player_name in players]
+    return jobs
+
+
+def write_summary(results, output_path):
+    """Écrit le récapitulatif des durées par tâche au format CSV."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['type', 'cible', 'fichier', 'durée (s)', 'erreur'])
+        for (kind, target), path, duration, error in results:
+            writer.writerow([kind, target, path or '', f"{duration:.3f}", error or ''])
+
+
+def run_batch(jobs, extractor, workers=None, model_cache_dir='data/.cache/models', summary_path='viz_data/batch_summary.csv'):
+    """Répartit les graphiques sur un pool de processus (une figure par processus) et renvoie les résultats.
+
+    Le chargement par `extractor` dans le processus principal construit l'instantané binaire des données,
+    que chaque processus relit ensuite sans analyser le CSV.
+    """
+    file_path = extractor.file_path
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(file_path, model_cache_dir)) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            job, path, duration, error = future.result()
+            results.append((job, path, duration, error))
+            status = path if path else f"échec ({error})"
+            print(f"[{len(results)}/{len(jobs)}] {job[0]} {job[1]} : {status} en {duration:.2f}s")
+
+    # Ordre déterministe dans le récapitulatif, indépendamment de l'ordre de fin des tâches
+    order = {job: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[result[0]])
+    write_summary(results, summary_path)
+
+    total = time.perf_counter() - start
+    failures = sum(1 for result in results if result[3])
+    print(f"{len(results)} graphiques en {total:.2f}s ({failures} échec(s)). Récapitulatif : {summary_path}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération non interactive des graphiques en parallèle")
+    parser.add_argument('--teams', nargs='*', help="Équipes (option 1), ou 'all' pour toutes les équipes")
+    parser.add_argument('--positions', nargs='*', help="Groupes de postes (option 6) par numéro ou libellé, ou 'all'")
+    parser.add_argument('--players', nargs='*', help="Joueurs à comparer avec leur groupe de postes (option 2), accents facultatifs, "
+                                                     "'Nom (Équipe)' pour des homonymes")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (par défaut : nombre de cœurs)")
+    parser.add_argument('--data', default='data/cleaned_scouting_report.csv', help="Fichier de données")
+    parser.add_argument('--summary', default='viz_data/batch_summary.csv', help="Fichier récapitulatif des durées")
+    parser.add_argument('--trace', default=None, help="Fichier JSON lines des durées de chaque étape (ou variable SCOUTING_TRACE)")
+    parser.add_argument('--profile', nargs='*', default=[], choices=['cprofile', 'tracemalloc'],
+                        help="Captures supplémentaires avec --trace (ou variable SCOUTING_PROFILE)")
+    args = parser.parse_args()
+
+    if args.trace:
+        instrumentation.enable(args.trace, args.profile)
+
+    extractor = DataExtractor(args.data)
+    jobs = build_jobs(extractor, teams=args.teams, positions=args.positions, players=args.players)
+    if not jobs:
+        parser.error("Aucune tâche : utilisez --teams, --positions et/ou --players.")
+
+    run_batch(jobs, extractor, workers=args.workers, summary_path=args.summary)
+
+
+if __name__ == "__main__":
+    main()
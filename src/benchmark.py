@@ -0,0 +1,417 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+
+from career_similarity import CareerSimilarity
+from clustering_engine import ClusteringEngine
+from data_extractor import DataExtractor
+from data_visualizer import DataVisualizer, close_headless_figures
+from label_placement import LabelPlacer
+from model_store import ProjectionModel, ProjectionModelStore
+from position_groups import POSITION_GROUPS, get_group_label
+from similarity_index import SimilarityIndex
+
+# Jeux de données synthétiques (non versionnés) et référence des mesures
+SYNTHETIC_DIR = 'data/.cache/benchmarks'
+DEFAULT_BASELINE = 'data/benchmarks/baseline.json'
+
+# Groupe de postes utilisé pour le pipeline et les graphiques de clustering
+BENCH_GROUP = '1. Milieu'
+
+# Ralentissement minimum (en secondes) pour signaler une régression : en dessous, l'écart est du bruit de mesure
+MIN_SLOWDOWN = 0.005
+
+# Carrières synthétiques par unité d'échelle pour la recherche de trajectoires (5 000 à l'échelle x100)
+CAREERS_PER_SCALE = 50
+
+
+class BenchmarkResult:
+    """Mesure d'un scénario : durées de chaque exécution, nombre d'éléments traités et pic mémoire."""
+
+    def __init__(self, name, scale, items, durations, peak_memory):
+        self.name = name
+        self.scale = scale
+        self.items = items
+        self.durations = durations
+        self.peak_memory = peak_memory
+
+    @property
+    def key(self):
+        return f"{self.name}@x{self.scale}"
+
+    @property
+    def median(self):
+        return statistics.median(self.durations)
+
+    @property
+    def throughput(self):
+        """Éléments (lignes, requêtes, noms...) traités par seconde."""
+        return self.items / self.median if self.median > 0 else float('inf')
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'scale': self.scale,
+            'items': self.items,
+            'runs': len(self.durations),
+            'median_s': self.median,
+            'best_s': min(self.durations),
+            'throughput': self.throughput,
+            'peak_memory_bytes': self.peak_memory,
+        }
+
+
+def measure(name, scale, fn, items, repeat):
+    """Exécute `fn` `repeat` fois pour les durées, puis une fois sous tracemalloc pour le pic mémoire."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    # Mesure mémoire séparée : tracemalloc ralentit l'exécution et fausserait les durées
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(name, scale, items, durations, peak)
+
+
+def make_synthetic_dataset(data, scale, seed=0):
+    """Rapport de scouting `scale` fois plus grand, avec les mêmes colonnes que l'original.
+
+    La première copie est l'original ; les suivantes sont des lignes tirées au hasard dont les
+    variables numériques sont perturbées (bruit multiplicatif) et les noms suffixés (" #2", ...).
+    """
+    rng = np.random.default_rng(seed)
+    numeric_columns = [column for column in data.columns if data[column].dtype.kind in 'iuf' and column != 'Age']
+    copies = [data]
+    for copy in range(2, scale + 1):
+        sample = data.iloc[rng.integers(0, len(data), len(data))].copy()
+        noise = rng.lognormal(0.0, 0.15, size=(len(sample), len(numeric_columns)))
+        sample[numeric_columns] = (sample[numeric_columns].to_numpy(dtype=float) * noise).round(2)
+        sample['player_name'] = sample['player_name'] + f" #{copy}"
+        copies.append(sample)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthetic_dataset_path(source_path, scale, output_dir=SYNTHETIC_DIR, seed=0):
+    """Chemin du jeu de données à l'échelle `scale`, généré au premier appel (l'original pour scale=1)."""
+    if scale == 1:
+        return source_path
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+    path = os.path.join(output_dir, f"{base_name}_x{scale}.csv")
+    if not os.path.isfile(path) or os.path.getmtime(path) < os.path.getmtime(source_path):
+        os.makedirs(output_dir, exist_ok=True)
+        make_synthetic_dataset(pd.read_csv(source_path), scale, seed=seed).to_csv(path, index=False)
+    return path
+
+
+def bench_load(path, scale, repeat):
+    """Chargement du CSV (avec typage et index) puis chargement depuis l'instantané binaire."""
+    rows = len(DataExtractor(path).data)  # Construit aussi l'instantané pour la seconde mesure
+    return [
+        measure('load_csv', scale, lambda: DataExtractor(path, use_cache=False), rows, repeat),
+        measure('load_cache', scale, lambda: DataExtractor(path), rows, repeat),
+    ]
+
+
+def bench_queries(extractor, scale, repeat, calls=100):
+    """Chaque méthode get_players_by_* appelée `calls` fois par exécution ; débit en requêtes par seconde."""
+    data = extractor.data
+    name = data['player_name'].iat[0]
+    team = data['Team Name'].iat[0]
+    positions = POSITION_GROUPS[BENCH_GROUP]
+    age = int(pd.to_numeric(data['Age'], errors='coerce').median())
+
+    queries = {
+        'get_players_by_name': lambda: extractor.get_players_by_name(name),
+        'get_players_by_position': lambda: extractor.get_players_by_position(positions),
+        'get_players_by_team': lambda: extractor.get_players_by_team(team),
+        'get_players_by_age': lambda: extractor.get_players_by_age(age),
+        'get_players_by_age_range': lambda: extractor.get_players_by_age_range(age - 2, age + 2),
+        'get_players_by_name_and_team': lambda: extractor.get_players_by_name_and_team(name, team),
+        'get_players_by_position_and_age': lambda: extractor.get_players_by_position_and_age(positions, [age]),
+        'get_players_by_team_and_position': lambda: extractor.get_players_by_team_and_position(team, positions),
+        'get_players_by_multiple_criteria': lambda: extractor.get_players_by_multiple_criteria(
+            positions=positions, team_names=[team], ages=[age]),
+    }
+
+    def repeated(query):
+        def run():
+            for _ in range(calls):
+                query()
+        return run
+
+    return [measure(query_name, scale, repeated(query), calls, repeat) for query_name, query in queries.items()]
+
+
+def bench_pipeline(extractor, scale, repeat):
+    """Étapes du clustering d'un groupe de postes : scalers + PCA, balayage KMeans, distances."""
+    group = extractor.feature_store.group(BENCH_GROUP)
+    rows = len(group)
+    model = ProjectionModel.fit_arrays(group.row_labels, group.offensive, group.defensive)
+    engine = ClusteringEngine(mini_batch=rows > 10000)
+
+    def full_pipeline():
+        fitted = ProjectionModel.fit_arrays(group.row_labels, group.offensive, group.defensive)
+        engine.fit(fitted.coordinates)
+        cdist(fitted.coordinates[:1], fitted.coordinates)
+        SimilarityIndex.from_group(group).query(0, k=10)
+
+    return [
+        measure('pipeline_scaler_pca', scale,
+                lambda: ProjectionModel.fit_arrays(group.row_labels, group.offensive, group.defensive), rows, repeat),
+        measure('pipeline_kmeans', scale, lambda: engine.fit(model.coordinates), rows, repeat),
+        measure('pipeline_cdist', scale, lambda: cdist(model.coordinates[:1], model.coordinates), rows, repeat),
+        measure('pipeline_similarity', scale, lambda: SimilarityIndex.from_group(group).query(0, k=10), rows, repeat),
+        measure('pipeline_total', scale, full_pipeline, rows, repeat),
+    ]
+
+
+def bench_labels(extractor, scale, repeat):
+    """Placement des noms sur les coordonnées PCA du groupe, avec et sans emplacements alternatifs."""
+    group = extractor.feature_store.group(BENCH_GROUP)
+    coordinates = ProjectionModel.fit_arrays(group.row_labels, group.offensive, group.defensive).coordinates
+    xs, ys = coordinates[:, 0], coordinates[:, 1]
+
+    def place(smart):
+        placer = LabelPlacer(0.5)
+        placer.place_all(xs, ys, placer.candidate_offsets() if smart else None)
+
+    return [
+        measure('label_placement', scale, lambda: place(False), len(xs), repeat),
+        measure('label_placement_smart', scale, lambda: place(True), len(xs), repeat),
+    ]
+
+
+def make_synthetic_careers(count, seed=0):
+    """Carrières de 6 à 19 saisons : marches aléatoires positives sur les variables de CareerSimilarity."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(6, 20, count)
+    curves = [np.abs(rng.normal(size=5) + np.cumsum(rng.normal(scale=0.3, size=(length, 5)), axis=0)) for length in lengths]
+    seasons = [np.arange(2025 - length, 2025) + 1 for length in lengths]
+    ages = [np.arange(length) + rng.integers(17, 22) for length in lengths]
+    return CareerSimilarity([f"Joueur {i}" for i in range(count)], seasons, ages, curves)
+
+
+def bench_careers(scale, repeat, queries=10):
+    """Recherche des 10 carrières les plus proches (DTW avec bornes inférieures, puis alignement par âge)."""
+    engine = make_synthetic_careers(CAREERS_PER_SCALE * scale)
+    players = engine.players[:queries]
+
+    def search(method):
+        for player_name in players:
+            engine.query(player_name, k=10, method=method)
+
+    return [
+        measure('career_dtw', scale, lambda: search('dtw'), queries, repeat),
+        measure('career_age', scale, lambda: search('age'), queries, repeat),
+    ]
+
+
+class TimedVisualizer(DataVisualizer):
+    """DataVisualizer headless qui mesure la durée du dernier `savefig`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, headless=True, **kwargs)
+        self.savefig_duration = 0.0
+
+    def save_figure(self, fig, path, **savefig_kwargs):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        start = time.perf_counter()
+        fig.savefig(path, **savefig_kwargs)
+        self.savefig_duration = time.perf_counter() - start
+        self.release_figure(fig)
+        return path
+
+
+def chart_scenarios(extractor):
+    """Un scénario par type de graphique : fonction qui construit le visualiseur et trace le graphique."""
+    data = extractor.data
+    group = extractor.feature_store.group(BENCH_GROUP)
+    offensive_features, defensive_features = group.offensive_features, group.defensive_features
+    model_store = ProjectionModelStore()
+
+    team_counts = data['Team Name'].value_counts()
+    team1, team2 = team_counts.index[0], team_counts.index[1]
+    group_players = group.names[:3].tolist()
+
+    def team_chart():
+        player_data = extractor.get_players_by_team(team1)
+        visualizer = TimedVisualizer(player_data[['Passes progressives', 'Possessions progressives']].dropna(), player_data)
+        return visualizer, visualizer.plot_players_by_team(team1)
+
+    def position_chart():
+        player_data = extractor.query().position(group.positions).collect()
+        visualizer = TimedVisualizer(player_data[['Passes progressives', 'Possessions progressives']].dropna(), player_data)
+        return visualizer, visualizer.plot_players_by_position(get_group_label(BENCH_GROUP), positions=group.positions)
+
+    def player_chart():
+        visualizer = TimedVisualizer(offensive_features, defensive_features, model_store=model_store)
+        return visualizer, visualizer.clustering_player_comparison(group_players[0], data, offensive_features,
+                                                                   defensive_features, group=group)
+
+    def multiple_chart():
+        visualizer = TimedVisualizer(offensive_features, defensive_features, model_store=model_store)
+        return visualizer, visualizer.clustering_multiple_players_comparison_with_reference(
+            group_players, data, offensive_features, defensive_features, group=group)
+
+    def pca_chart():
+        visualizer = TimedVisualizer(offensive_features, defensive_features, model_store=model_store)
+        return visualizer, visualizer.clustering_players_pca_comparison(group_players, data, offensive_features,
+                                                                        defensive_features)
+
+    def teams_chart():
+        features = data[['npxG: xG sans les pénaltys', 'Buts (sans les pénaltys)']].dropna()
+        visualizer = TimedVisualizer(features, data)
+        return visualizer, visualizer.compare_teams(team1, team2)
+
+    return {
+        'team': team_chart,
+        'position': position_chart,
+        'player': player_chart,
+        'multiple': multiple_chart,
+        'pca': pca_chart,
+        'teams': teams_chart,
+    }
+
+
+def bench_charts(extractor, scale, repeat):
+    """Durée totale de chaque type de graphique et part de `savefig` (dpi des graphiques de l'application)."""
+    results = []
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as output_dir:
+        scenarios = chart_scenarios(extractor)
+        # Les graphiques sont enregistrés sous viz_data/ relatif : les écrire dans un dossier temporaire
+        os.chdir(output_dir)
+        try:
+            for chart_name, scenario in scenarios.items():
+                savefig_durations = []
+
+                def run():
+                    visualizer, _ = scenario()
+                    savefig_durations.append(visualizer.savefig_duration)
+
+                result = measure(f'chart_{chart_name}', scale, run, 1, repeat)
+                savefig = BenchmarkResult(f'savefig_{chart_name}', scale, 1, savefig_durations[:repeat], result.peak_memory)
+                results.extend([result, savefig])
+        finally:
+            os.chdir(previous_dir)
+            close_headless_figures()
+    return results
+
+
+def load_baseline(path):
+    """Mesures de référence par clé 'scénario@xN', ou {} si aucune référence n'est enregistrée."""
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(results, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    payload = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': {result.key: result.to_dict() for result in results},
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def report(results, baseline, threshold, min_slowdown=MIN_SLOWDOWN):
+    """Tableau des mesures comparées à la référence ; renvoie les clés des scénarios en régression.
+
+    Un scénario est en régression si sa médiane dépasse `threshold` fois la référence et la dépasse
+    d'au moins `min_slowdown` secondes.
+    """
+    regressions = []
+    print(f"{'Scénario':<36} {'médiane':>11} {'débit/s':>12} {'pic mémoire':>12} {'réf.':>11} {'ratio':>7}")
+    for result in results:
+        reference = baseline.get(result.key)
+        ratio = result.median / reference['median_s'] if reference and reference['median_s'] > 0 else None
+        flag = ''
+        if ratio is not None and ratio > threshold and result.median - reference['median_s'] > min_slowdown:
+            regressions.append(result.key)
+            flag = '  RÉGRESSION'
+        print(f"{result.key:<36} {result.median * 1000:>9.2f}ms {result.throughput:>12.1f} "
+              f"{result.peak_memory / 2**20:>10.2f}Mo "
+              f"{reference['median_s'] * 1000 if reference else float('nan'):>9.2f}ms "
+              f"{ratio if ratio is not None else float('nan'):>7.2f}{flag}")
+    return regressions
+
+
+def run_benchmarks(data_path, scales=(1, 10, 100), chart_scales=(1,), repeat=5, suites=None):
+    """Exécute les suites demandées à chaque échelle et renvoie la liste des BenchmarkResult."""
+    suites = suites or ('load', 'queries', 'pipeline', 'labels', 'charts', 'careers')
+    results = []
+    for scale in scales:
+        path = synthetic_dataset_path(data_path, scale)
+        # Moins de répétitions sur les grands jeux de données
+        scale_repeat = max(1, repeat // scale) if scale > 1 else repeat
+        print(f"Échelle x{scale} : {path}")
+
+        if 'load' in suites:
+            results.extend(bench_load(path, scale, scale_repeat))
+        extractor = DataExtractor(path)
+        if 'queries' in suites:
+            results.extend(bench_queries(extractor, scale, repeat))
+        if 'pipeline' in suites:
+            results.extend(bench_pipeline(extractor, scale, scale_repeat))
+        if 'labels' in suites:
+            results.extend(bench_labels(extractor, scale, scale_repeat))
+        if 'charts' in suites and scale in chart_scales:
+            results.extend(bench_charts(extractor, scale, scale_repeat))
+        if 'careers' in suites:
+            results.extend(bench_careers(scale, scale_repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesures de performance du chargement, des requêtes, du clustering et des graphiques")
+    parser.add_argument('--data', default='data/cleaned_scouting_report.csv', help="Jeu de données réel (échelle 1)")
+    parser.add_argument('--scales', type=int, nargs='*', default=[1, 10, 100], help="Échelles des jeux de données synthétiques")
+    parser.add_argument('--chart_scales', type=int, nargs='*', default=[1], help="Échelles pour lesquelles les graphiques sont mesurés")
+    parser.add_argument('--suites', nargs='*', default=None, help="Suites à exécuter : load, queries, pipeline, labels, charts, careers")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre d'exécutions par scénario")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Fichier JSON des mesures de référence")
+    parser.add_argument('--save_baseline', action='store_true', help="Enregistrer ces mesures comme nouvelle référence")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Ratio médiane / référence au-delà duquel un scénario est en régression")
+    parser.add_argument('--min_slowdown_ms', type=float, default=MIN_SLOWDOWN * 1000,
+                        help="Ralentissement minimum (ms) par rapport à la référence pour signaler une régression")
+    parser.add_argument('--fail_on_regression', action='store_true', help="Code de sortie 1 en cas de régression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.data, scales=args.scales, chart_scales=args.chart_scales, repeat=args.repeat,
+                             suites=args.suites)
+    regressions = report(results, load_baseline(args.baseline), args.threshold, min_slowdown=args.min_slowdown_ms / 1000)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Référence enregistrée dans {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} scénario(s) en régression : {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
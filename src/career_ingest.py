@@ -0,0 +1,188 @@
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from fbref_scraper import HttpClient
+from page_cache import PageCache
+from table_parser import parse_tables
+
+# Tableaux de la page "Toutes les compétitions" d'un joueur, dans l'ordre de fusion,
+# avec les colonnes à conserver ('keep') ou à supprimer ('drop')
+CAREER_TABLES = {
+    'stats_standard_expanded': {
+        'keep': ['Saison', 'Âge', 'Équipe', 'Comp', 'Titulaire', 'Min',
+                 'Buts', 'PD', 'B-PénM', 'PénM', 'PénT', 'PrgC', 'PrgP', 'PrgR'],
+    },
+    'stats_shooting_expanded': {
+        'drop': ['xG', 'npxG', 'npxG/Sh', 'G-xG', 'np:G-xG', '90', 'Pays'],
+    },
+    'stats_possession_expanded': {
+        'drop': ['Pays', '90', 'CSR', 'Manqué', 'Perte', 'Rec', 'PrgR'],
+    },
+    'stats_passing_expanded': {
+        'drop': ['Cmp.1', 'Att.1', 'Cmp%.1', 'Cmp.2', 'Att.2', 'Cmp%.2', 'Cmp.3', 'Att.3', 'Cmp%.3', 'Pays', '90'],
+    },
+    'stats_gca_expanded': {
+        'drop': ['Pays', '90', 'AMT90', 'AMB90', 'PassLive.1', 'PassDead.1', 'TO.1', 'Tirs.1', 'Ftp.1', 'Déf.1'],
+    },
+    'stats_defense_expanded': {
+        'drop': ['Pays', '90', 'Manqués', 'Err'],
+    },
+}
+
+# Colonnes communes pour la jointure
+JOIN_COLUMNS = ['Saison', 'Âge', 'Équipe', 'Comp']
+
+# Lignes de saison uniquement (les lignes de total et les en-têtes répétés sont ignorés)
+SEASON = re.compile(r'\d{4}-\d{4}')
+
+
+def deduplicate_columns(names):
+    """Renomme les colonnes en double comme `pd.read_csv` ('Cmp', 'Cmp.1', 'Cmp.2', ...)."""
+    seen = set()
+    counts = {}
+    result = []
+    for name in names:
+        unique = name
+        while unique in seen:
+            counts[name] = counts.get(name, 0) + 1
+            unique = f"{name}.{counts[name]}"
+        seen.add(unique)
+        result.append(unique)
+    return result
+
+
+def infer_numeric(df):
+    """Convertit en nombres les colonnes dont toutes les valeurs le sont (séparateur de milliers ',' accepté)."""
+    for column in df.columns:
+        values = df[column]
+        converted = pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce')
+        if converted.notna().sum() == values.notna().sum():
+            df[column] = converted
+    return df
+
+
+def read_career_table(table, projection):
+    """Lignes de saison d'un tableau de carrière, avec les colonnes projetées et les valeurs manquantes à -1."""
+    # En-têtes sur deux niveaux : seul le dernier niveau est gardé
+    columns = deduplicate_columns(table.header_rows[-1] if table.header_rows else [])
+    width = len(columns)
+    rows = [row[:width] + [''] * (width - len(row)) for row in table.body_rows if row and SEASON.fullmatch(row[0])]
+
+    df = pd.DataFrame(rows, columns=columns).replace('', None)
+    df = infer_numeric(df.drop(columns=['Matchs'], errors='ignore'))
+
+    if 'keep' in projection:
+        # Une colonne absente de la page est gardée, remplie à -1, pour que la jointure reste possible
+        missing = [col for col in projection['keep'] if col not in df.columns]
+        if missing:
+            print(f"Colonnes absentes du tableau, remplies à -1 : {', '.join(missing)}")
+        df = df.reindex(columns=projection['keep'])
+    else:
+        df = df.drop(columns=[col for col in projection['drop'] if col in df.columns])
+    return df.fillna(-1)
+
+
+def merge_career_tables(tables):
+    """Jointure externe des tableaux d'un joueur sur la saison, l'âge, l'équipe et la compétition."""
+    merged = tables[0]
+    for df in tables[1:]:
+        merged = merged.merge(df, on=JOIN_COLUMNS, how='outer')
+    return merged
+
+
+class CareerIngest:
+    """Téléchargement, extraction et fusion des statistiques de carrière, en une passe par joueur.
+
+    Chaque page est lue une seule fois : les tableaux sont extraits (y compris ceux cachés dans
+    des commentaires HTML), projetés, filtrés sur les saisons et joints en mémoire, puis seul
+    `<Joueur>_merged_stats.csv` est écrit.
+    """
+
+    def __init__(self, output_dir='data/comparaison', client=None, workers=4):
+        self.output_dir = output_dir
+        self.client = client if client is not None else HttpClient()
+        self.workers = workers
+
+    def build_player(self, html, player_name):
+        """Tableau fusionné d'un joueur à partir du HTML de sa page, ou None si aucun tableau n'est trouvé."""
+        parsed = parse_tables(html, CAREER_TABLES)
+        tables = []
+        for table_id, projection in CAREER_TABLES.items():
+            if parsed[table_id] is None:
+                print(f"Tableau avec l'ID {table_id} non trouvé pour {player_name}")
+                continue
+            tables.append(read_career_table(parsed[table_id], projection))
+        return merge_career_tables(tables) if tables else None
+
+    def ingest_player(self, url, player_name):
+        """Télécharge la page d'un joueur et écrit son fichier fusionné ; renvoie son chemin ou None."""
+        html = self.client.get(url)
+        if html is None:
+            print(f"Échec de la requête pour {url}")
+            return None
+        merged = self.build_player(html, player_name)
+        if merged is None:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_file = os.path.join(self.output_dir, f"{player_name}_merged_stats.csv")
+        merged.to_csv(output_file, index=False)
+        print(f"Statistiques de carrière de {player_name} sauvegardées dans {output_file}")
+        return output_file
+
+    def ingest_players(self, players):
+        """Traite une liste de (url, nom du joueur) en parallèle.
+
+        Renvoie ({nom: chemin ou None}, {nom: erreur}) : une exception pour un joueur est affichée et
+        rangée dans les échecs sans interrompre les autres.
+        """
+        results, failures = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.ingest_player, url, player_name): player_name for url, player_name in players}
+            for future in as_completed(futures):
+                player_name = futures[future]
+                try:
+                    results[player_name] = future.result()
+                except Exception as err:
+                    failures[player_name] = f"{type(err).__name__}: {err}"
+                    print(f"Échec pour {player_name} : {failures[player_name]}")
+        return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistiques de carrière FBref fusionnées par joueur")
+    parser.add_argument('--players', default=None, help="CSV des joueurs (colonnes player_name, url)")
+    parser.add_argument('--output_dir', default='data/comparaison', help="Dossier des fichiers <Joueur>_merged_stats.csv")
+    parser.add_argument('--workers', type=int, default=4, help="Nombre de téléchargements simultanés")
+    parser.add_argument('--interval', type=float, default=12.0, help="Secondes minimum entre deux requêtes vers un même hôte")
+    parser.add_argument('--cache_dir', default='data/.cache/pages', help="Dossier du cache des pages HTML")
+    args = parser.parse_args()
+
+    if args.players:
+        players_df = pd.read_csv(args.players)
+        players = list(zip(players_df['url'], players_df['player_name']))
+    else:
+        # Joueurs du notebook career_players.ipynb
+        players = [
+            ("https://fbref.com/fr/joueurs/df69b544/all_comps/Statistiques-Antoine-Griezmann-Stats---Toutes-les-competitions", "Griezmann"),
+            ("https://fbref.com/fr/joueurs/69384e5d/all_comps/Statistiques-Neymar-Stats---Toutes-les-competitions", "Neymar"),
+        ]
+
+    cache = PageCache(args.cache_dir)
+    client = HttpClient(min_interval=args.interval, pool_size=args.workers, cache=cache)
+    try:
+        results, failures = CareerIngest(args.output_dir, client=client, workers=args.workers).ingest_players(players)
+        written = sum(1 for path in results.values() if path)
+        print(f"{written} joueur(s) sur {len(players)} enregistré(s)"
+              + (f", échecs : {', '.join(sorted(failures))}" if failures else ""))
+    finally:
+        client.close()
+        print(cache.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import argparse
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from season_store import SeasonStore, season_label
+
+# Variables des courbes de carrière : colonne des fichiers de carrière (total de la saison, ramené aux 90 minutes)
+# et colonne équivalente du rapport de scouting (déjà par 90 minutes)
+CAREER_STATS = {
+    'Buts': ('B-PénM', 'Buts (sans les pénaltys)'),
+    'PD': ('PD_x', 'Passes décisives'),
+    'PrgC': ('PrgC_x', 'Possessions progressives'),
+    'PrgP': ('PrgP_x', 'Passes progressives'),
+    'PrgR': ('PrgR', 'Passes progressives reçues'),
+}
+# Saisons avec trop peu de minutes : valeurs par 90 minutes trop bruitées, ignorées
+MIN_MINUTES = 450
+METHODS = ('dtw', 'age')
+# Candidats traités ensemble par le DTW vectorisé, entre deux mises à jour du seuil d'abandon
+BATCH_SIZE = 256
+
+
+def season_curves(frame, season_ends, stats=None, min_minutes=MIN_MINUTES):
+    """Une ligne par joueur et par saison : âge et variables par 90 minutes, à partir des lignes du SeasonStore.
+
+    Une saison jouée dans plusieurs équipes est la moyenne de ses lignes pondérée par les minutes. L'âge
+    manquant (rapport de scouting, saisons anciennes) est déduit de l'année de naissance estimée du joueur.
+    """
+    stats = stats if stats is not None else CAREER_STATS
+    frame = frame.reindex(columns=list(frame.columns) + [column for pair in stats.values() for column in pair
+                                                           if column not in frame.columns] +
+                          [column for column in ('Min', 'Âge', 'Age') if column not in frame.columns])
+    minutes = pd.to_numeric(frame['Min'], errors='coerce')
+
+    per90 = pd.DataFrame(index=frame.index)
+    for stat, (career_column, report_column) in stats.items():
+        career = pd.to_numeric(frame[career_column], errors='coerce') / minutes.where(minutes > 0) * 90
+        per90[stat] = career.fillna(pd.to_numeric(frame[report_column], errors='coerce'))
+
+    curves = per90.assign(player_name=frame['player_name'].to_numpy(dtype=object), season_end=season_ends,
+                          age=pd.to_numeric(frame['Âge'], errors='coerce').fillna(pd.to_numeric(frame['Age'], errors='coerce')))
+    curves = curves[~(minutes < min_minutes).to_numpy()]
+    minutes = minutes[curves.index]
+
+    # Pondération par les minutes si la saison en a, sinon moyenne simple
+    keys = [curves['player_name'], curves['season_end']]
+    has_minutes = minutes.fillna(0).gt(0).groupby(keys).transform('any')
+    weights = np.where(has_minutes, minutes.fillna(0), 1.0)
+    columns = list(stats)
+    weighted = curves[columns].mul(weights, axis=0)
+    observed = curves[columns].notna().mul(weights, axis=0)
+    grouped = weighted.groupby(keys, sort=True).sum(min_count=1) / observed.groupby(keys, sort=True).sum()
+    grouped['age'] = curves.groupby(keys, sort=True)['age'].min()
+    grouped = grouped.reset_index()
+
+    # Âge manquant : année de fin de saison moins l'année de naissance estimée sur les saisons connues
+    birth = (grouped['season_end'] - grouped['age']).groupby(grouped['player_name']).transform('median')
+    grouped['age'] = grouped['age'].fillna(grouped['season_end'] - birth)
+    return grouped
+
+
+def diagonal_band(n, m, window):
+    """Cellules (n x m) autorisées pour le DTW : à au plus `window` colonnes de la diagonale, élargie si m > n."""
+    if window is None or n == 1 or m == 1:
+        return np.ones((n, m), dtype=bool)
+    slope = (m - 1) / (n - 1)
+    # Une fenêtre plus étroite que la pente laisserait des lignes sans chemin entre elles
+    window = max(window, slope)
+    return np.abs(np.arange(n)[:, None] * slope - np.arange(m)[None, :]) <= window
+
+
+def dtw_batch(query, candidates, band, thresholds):
+    """DTW (coût euclidien au carré) entre `query` (n x d) et des candidats de même longueur (B x m x d).
+
+    Le calcul avance ligne par ligne pour tous les candidats à la fois ; un candidat est abandonné dès que
+    le minimum d'une ligne atteint son seuil, puisque tout chemin traverse chaque ligne et que les coûts
+    sont positifs. Renvoie les indices des candidats terminés et leur coût cumulé.
+    """
+    cost = ((candidates[:, None, :, :] - query[None, :, None, :]) ** 2).sum(axis=-1)
+    cost[:, ~band] = np.inf
+    ids = np.arange(len(candidates))
+    previous = np.cumsum(cost[:, 0, :], axis=1)
+    border = np.full((len(candidates), 1), np.inf)
+
+    for i in range(len(query)):
+        if i > 0:
+            row = cost[:, i, :] + np.minimum(previous, np.concatenate([border[:len(ids)], previous[:, :-1]], axis=1))
+            for j in range(1, row.shape[1]):
+                np.minimum(row[:, j], cost[:, i, j] + row[:, j - 1], out=row[:, j])
+            previous = row
+
+        alive = previous.min(axis=1) < thresholds
+        if not alive.all():
+            ids, cost, previous, thresholds = ids[alive], cost[alive], previous[alive], thresholds[alive]
+            if not len(ids):
+                break
+    return ids, previous[:, -1]
+
+
+class CareerSimilarity:
+    """Recherche des carrières les plus proches d'un joueur sur ses courbes de variables par 90 minutes.
+
+    Les variables sont standardisées sur toutes les saisons ; une valeur manquante est remplacée par la
+    moyenne du joueur (ou la moyenne générale). Deux alignements :
+    - 'dtw' : les saisons successives sont alignées par DTW dans une bande autour de la diagonale. Les
+      candidats sont triés par borne inférieure (LB_Kim, LB_Keogh), traités par lots de même longueur
+      et abandonnés dès que leur coût dépasse la k-ième meilleure distance ; la recherche s'arrête quand
+      la borne du candidat suivant dépasse cette distance.
+    - 'age' : les saisons sont comparées à âge égal, pour tous les joueurs en une opération.
+    La distance DTW est normalisée par la longueur des deux carrières (racine du coût moyen).
+    """
+
+    def __init__(self, players, seasons, ages, curves, stats=None, window=3):
+        self.players = list(players)
+        self.player_ids = {name: i for i, name in enumerate(self.players)}
+        self.seasons = [np.asarray(values, dtype=np.int64) for values in seasons]
+        self.ages = [np.asarray(values, dtype=float) for values in ages]
+        self.raw_curves = [np.asarray(curve, dtype=float) for curve in curves]
+        self.stats = list(stats if stats is not None else CAREER_STATS)
+        self.window = window
+        self.lengths = np.array([len(curve) for curve in self.raw_curves], dtype=np.intp)
+        self.last_search = {}
+
+        # Standardisation sur toutes les saisons, valeurs manquantes remplacées par la moyenne du joueur
+        stacked = np.concatenate(self.raw_curves) if self.raw_curves else np.empty((0, len(self.stats)))
+        self.mean = np.nanmean(stacked, axis=0) if len(stacked) else np.zeros(len(self.stats))
+        self.std = np.nanstd(stacked, axis=0) if len(stacked) else np.ones(len(self.stats))
+        self.mean, self.std = np.nan_to_num(self.mean), np.where(np.nan_to_num(self.std) > 0, np.nan_to_num(self.std), 1.0)
+        self.curves = []
+        for curve in self.raw_curves:
+            scaled = (curve - self.mean) / self.std
+            observed = (~np.isnan(scaled)).sum(axis=0)
+            player_mean = np.where(observed > 0, np.nansum(scaled, axis=0) / np.maximum(observed, 1), 0.0)
+            self.curves.append(np.where(np.isnan(scaled), player_mean, scaled))
+
+        # Carrières regroupées par longueur : un tableau (joueurs x saisons x variables) par longueur
+        self.length_groups = {}
+        self.group_positions = np.empty(len(self.players), dtype=np.intp)
+        for length in np.unique(self.lengths):
+            ids = np.flatnonzero(self.lengths == length)
+            self.length_groups[int(length)] = (ids, np.stack([self.curves[i] for i in ids]))
+            self.group_positions[ids] = np.arange(len(ids))
+
+        # Grille joueurs x âges x variables pour l'alignement par âge (NaN sans saison à cet âge)
+        known = np.concatenate([ages[~np.isnan(ages)] for ages in self.ages]) if self.ages else np.empty(0)
+        self.min_age = int(known.min()) if len(known) else 0
+        n_ages = int(known.max()) - self.min_age + 1 if len(known) else 0
+        self.age_grid = np.full((len(self.players), n_ages, len(self.stats)), np.nan)
+        for i, (ages, curve) in enumerate(zip(self.ages, self.curves)):
+            valid = ~np.isnan(ages)
+            self.age_grid[i, ages[valid].astype(np.intp) - self.min_age] = curve[valid]
+
+    @classmethod
+    def from_store(cls, store, stats=None, min_minutes=MIN_MINUTES, min_seasons=2, window=3):
+        """Carrières de tous les joueurs d'un SeasonStore ayant au moins `min_seasons` saisons exploitables."""
+        stats = stats if stats is not None else CAREER_STATS
+        columns = [column for pair in stats.values() for column in pair] + ['Min', 'Âge', 'Age']
+        curves = season_curves(store.scan(columns), store.key_seasons, stats, min_minutes)
+        curves = curves[curves.groupby('player_name')['season_end'].transform('size') >= min_seasons]
+
+        players, seasons, ages, values = [], [], [], []
+        for name, career in curves.groupby('player_name', sort=True):
+            players.append(name)
+            seasons.append(career['season_end'].to_numpy())
+            ages.append(career['age'].to_numpy())
+            values.append(career[list(stats)].to_numpy(dtype=float))
+        return cls(players, seasons, ages, values, stats=stats, window=window)
+
+    def __len__(self):
+        return len(self.players)
+
+    def curve(self, player_name):
+        """Courbe de carrière d'un joueur (saisons x [âge, variables par 90 minutes]), ou None."""
+        player_id = self.player_ids.get(player_name)
+        if player_id is None:
+            return None
+        frame = pd.DataFrame(self.raw_curves[player_id], columns=self.stats,
+                             index=pd.Index([season_label(end) for end in self.seasons[player_id]], name='Saison'))
+        frame.insert(0, 'Âge', self.ages[player_id])
+        return frame
+
+    def lower_bounds(self, query, candidate_ids):
+        """Bornes inférieures du coût DTW (max de LB_Kim et LB_Keogh), calculées par groupe de longueur."""
+        bounds = np.empty(len(candidate_ids))
+        lengths = self.lengths[candidate_ids]
+        for length in np.unique(lengths):
+            selected = np.flatnonzero(lengths == length)
+            curves = self.length_groups[int(length)][1][self.group_positions[candidate_ids[selected]]]
+
+            # LB_Kim : la première et la dernière cellule appartiennent à tout chemin
+            kim = ((curves[:, 0] - query[0]) ** 2).sum(axis=1)
+            if len(query) > 1 or length > 1:
+                kim += ((curves[:, -1] - query[-1]) ** 2).sum(axis=1)
+
+            # LB_Keogh : chaque saison du candidat est alignée sur au moins une saison de la bande
+            band = diagonal_band(len(query), int(length), self.window)
+            upper = np.stack([query[band[:, j]].max(axis=0) for j in range(length)])
+            lower = np.stack([query[band[:, j]].min(axis=0) for j in range(length)])
+            keogh = ((np.maximum(curves - upper, 0) ** 2) + (np.maximum(lower - curves, 0) ** 2)).sum(axis=(1, 2))
+            bounds[selected] = np.maximum(kim, keogh)
+        return bounds
+
+    def _search_dtw(self, query_id, candidate_ids, k):
+        if len(candidate_ids) == 0 or k <= 0:
+            self.last_search = {'candidats': len(candidate_ids)}
+            return []
+        query = self.curves[query_id]
+        n = len(query)
+        norms = n + self.lengths[candidate_ids]
+        bounds = np.sqrt(self.lower_bounds(query, candidate_ids) / norms)
+        order = np.argsort(bounds, kind='stable')
+
+        best = []  # tas des k meilleures distances : (-distance, identifiant)
+        threshold = np.inf
+        pruned = abandoned = computed = 0
+        # Un premier lot de k candidats fixe le seuil, puis des lots de BATCH_SIZE
+        starts = [0] + list(range(k, len(order), BATCH_SIZE)) if k < len(order) else [0]
+        for start, stop in zip(starts, starts[1:] + [len(order)]):
+            chunk = order[start:stop]
+            if bounds[chunk[0]] >= threshold:
+                pruned += len(order) - start
+                break
+            kept = chunk[bounds[chunk] < threshold]
+            pruned += len(chunk) - len(kept)
+
+            lengths = self.lengths[candidate_ids[kept]]
+            for length in np.unique(lengths):
+                batch = candidate_ids[kept[lengths == length]]
+                curves = self.length_groups[int(length)][1][self.group_positions[batch]]
+                thresholds = np.full(len(batch), threshold ** 2 * (n + length))
+                finished, costs = dtw_batch(query, curves, diagonal_band(n, int(length), self.window), thresholds)
+                abandoned += len(batch) - len(finished)
+                computed += len(finished)
+
+                for candidate, distance in zip(batch[finished], np.sqrt(costs / (n + length))):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, int(candidate)))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, int(candidate)))
+                    if len(best) == k:
+                        threshold = -best[0][0]
+
+        self.last_search = {'candidats': len(candidate_ids), 'élagués par la borne': pruned,
+                            'abandonnés en cours de calcul': abandoned, 'DTW complets': computed}
+        results = sorted((-distance, candidate) for distance, candidate in best)
+        return [(candidate, distance) for distance, candidate in results]
+
+    def _search_age(self, query_id, candidate_ids, k, min_overlap):
+        query = self.age_grid[query_id]
+        squared = ((self.age_grid[candidate_ids] - query[None]) ** 2).sum(axis=2)
+        common = ~np.isnan(self.age_grid[candidate_ids, :, 0]) & ~np.isnan(query[None, :, 0])
+        overlap = common.sum(axis=1)
+        distances = np.full(len(candidate_ids), np.inf)
+        comparable = overlap >= min_overlap
+        distances[comparable] = np.sqrt(np.where(common, squared, 0).sum(axis=1)[comparable] / overlap[comparable])
+
+        best = np.argsort(distances, kind='stable')[:max(k, 0)]
+        best = best[np.isfinite(distances[best])]
+        self.last_search = {'candidats': len(candidate_ids), 'comparables (âges communs)': int(comparable.sum())}
+        return [(int(candidate_ids[i]), float(distances[i])) for i in best]
+
+    def query(self, player_name, k=10, method='dtw', min_overlap=3):
+        """Les `k` carrières les plus proches de celle du joueur (DataFrame trié par distance), ou None s'il est absent.
+
+        `min_overlap` : nombre minimum d'âges en commun pour l'alignement par âge.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Méthode inconnue : {method} (choix : {', '.join(METHODS)})")
+        query_id = self.player_ids.get(player_name)
+        if query_id is None:
+            print(f"Aucune carrière exploitable pour {player_name}.")
+            return None
+
+        candidate_ids = np.delete(np.arange(len(self.players)), query_id)
+        if method == 'dtw':
+            results = self._search_dtw(query_id, candidate_ids, k)
+        else:
+            results = self._search_age(query_id, candidate_ids, k, min_overlap)
+
+        return pd.DataFrame({
+            'player_name': [self.players[candidate] for candidate, _ in results],
+            'Distance': [distance for _, distance in results],
+            'Saisons': [int(self.lengths[candidate]) for candidate, _ in results],
+            'Âges': [f"{np.nanmin(self.ages[candidate]):.0f}-{np.nanmax(self.ages[candidate]):.0f}"
+                     if not np.isnan(self.ages[candidate]).all() else '' for candidate, _ in results],
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carrières les plus proches de celle d'un joueur (buts, passes décisives, progression par 90 minutes)")
+    parser.add_argument('--player', required=True, help="Joueur de référence, tel qu'enregistré dans le stock")
+    parser.add_argument('--root', default='data/seasons', help="Dossier du stock joueur x saison (make seasons)")
+    parser.add_argument('--k', type=int, default=10, help="Nombre de carrières proches")
+    parser.add_argument('--method', default='dtw', choices=METHODS, help="Alignement des saisons : DTW ou âge")
+    parser.add_argument('--window', type=int, default=3, help="Largeur de la bande du DTW, en saisons")
+    parser.add_argument('--min_minutes', type=int, default=MIN_MINUTES, help="Minutes minimum d'une saison")
+    parser.add_argument('--min_seasons', type=int, default=2, help="Saisons minimum d'une carrière comparée")
+    args = parser.parse_args()
+    if args.k < 1:
+        parser.error("--k doit être au moins 1.")
+
+    engine = CareerSimilarity.from_store(SeasonStore(args.root), min_minutes=args.min_minutes,
+                                         min_seasons=args.min_seasons, window=args.window)
+    curve = engine.curve(args.player)
+    if curve is None:
+        print(f"Aucune carrière exploitable pour {args.player} ({len(engine)} carrières dans le stock).")
+        return
+    print(curve.round(2).to_string())
+
+    results = engine.query(args.player, k=args.k, method=args.method)
+    print(f"\nCarrières les plus proches de {args.player} ({args.method}) :")
+    print(results.round(3).to_string(index=False) if not results.empty else "aucune")
+    print(', '.join(f"{label} : {count}" for label, count in engine.last_search.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+
+class ClusteringSweep:
+    """Résultat d'un balayage de k : inertie, score et étiquettes pour chaque nombre de clusters."""
+
+    def __init__(self, k_values, inertias, silhouettes, labels_by_k, centroids_by_k, best_k):
+        self.k_values = k_values
+        self.inertias = inertias
+        self.silhouettes = silhouettes
+        self.labels_by_k = labels_by_k
+        self.centroids_by_k = centroids_by_k
+        self.best_k = best_k
+
+    @property
+    def labels(self):
+        """Étiquettes pour le k retenu."""
+        return self.labels_by_k[self.best_k]
+
+    @property
+    def centroids(self):
+        return self.centroids_by_k[self.best_k]
+
+    def summary(self):
+        """Une ligne par k : inertie et silhouette."""
+        lines = [f"k={k} : inertie {inertia:.1f}, silhouette {score:.3f}"
+                 for k, inertia, score in zip(self.k_values, self.inertias, self.silhouettes)]
+        return '\n'.join(lines + [f"k retenu : {self.best_k}"])
+
+
+def elbow_k(k_values, inertias):
+    """k du coude de la courbe d'inertie : point le plus éloigné de la droite entre ses extrémités."""
+    if len(k_values) < 3:
+        return k_values[0]
+    x = np.asarray(k_values, dtype=float)
+    y = np.asarray(inertias, dtype=float)
+    # Normaliser les deux axes pour que la distance ne dépende pas de l'échelle de l'inertie
+    x = (x - x[0]) / (x[-1] - x[0])
+    span = y[0] - y[-1]
+    y = (y - y[-1]) / span if span > 0 else np.zeros_like(y)
+    # Distance à la droite (0, 1) -> (1, 0) : |x + y - 1| / sqrt(2)
+    return k_values[int(np.argmax(np.abs(x + y - 1)))]
+
+
+def canonical_labels(labels, centroids):
+    """Renumérote les clusters par ordre de première apparition, pour des étiquettes stables d'un appel à l'autre.
+
+    Les clusters vides (sans aucun point) gardent leur centre et sont numérotés après les autres.
+    """
+    present, first_seen = np.unique(labels, return_index=True)
+    empty = np.setdiff1d(np.arange(len(centroids)), present)
+    order = np.concatenate([present[np.argsort(first_seen)], empty])
+    # Indexée par l'ancienne étiquette : une entrée par cluster, y compris les vides
+    mapping = np.empty(len(centroids), dtype=labels.dtype)
+    mapping[order] = np.arange(len(order))
+    return mapping[labels], centroids[order]
+
+
+class ClusteringEngine:
+    """Balayage de k pour KMeans en un appel, avec initialisation de chaque k à partir des centres du k précédent.
+
+    Le k retenu maximise la silhouette (calculée sur un échantillon) ou correspond au coude de
+    l'inertie. `random_state` et `n_init` fixés rendent les étiquettes reproductibles ; `mini_batch`
+    utilise MiniBatchKMeans pour les grands ensembles de joueurs (plusieurs championnats).
+    """
+
+    def __init__(self, k_range=range(2, 9), method='silhouette', random_state=42, n_init=10,
+                 mini_batch=False, batch_size=1024, sample_size=2000):
+        if method not in ('silhouette', 'elbow'):
+            raise ValueError(f"Méthode inconnue : {method}")
+        self.k_range = k_range
+        self.method = method
+        self.random_state = random_state
+        self.n_init = n_init
+        self.mini_batch = mini_batch
+        self.batch_size = batch_size
+        self.sample_size = sample_size
+
+    def _model(self, k, init, n_init):
+        if self.mini_batch:
+            return MiniBatchKMeans(n_clusters=k, init=init, n_init=n_init, batch_size=self.batch_size,
+                                   random_state=self.random_state)
+        return KMeans(n_clusters=k, init=init, n_init=n_init, random_state=self.random_state)
+
+    @staticmethod
+    def _warm_start(X, centroids, labels):
+        """Centres du k précédent plus le point le plus éloigné de son centre."""
+        distances = np.einsum('ij,ij->i', X - centroids[labels], X - centroids[labels])
+        return np.vstack([centroids, X[np.argmax(distances)]])
+
+    def _silhouette(self, X, labels):
+        if len(X) > self.sample_size:
+            return silhouette_score(X, labels, sample_size=self.sample_size, random_state=self.random_state)
+        return silhouette_score(X, labels)
+
+    def fit(self, X):
+        """Ajuste KMeans pour chaque k de `k_range` et renvoie un ClusteringSweep."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        # La silhouette n'est définie que pour 2 <= k <= n - 1, et KMeans ne peut pas former plus de
+        # clusters qu'il n'y a de points distincts
+        n_distinct = len(np.unique(X, axis=0)) if len(X) else 0
+        k_values = [k for k in self.k_range if 2 <= k < len(X) and k <= n_distinct]
+        if not k_values:
+            labels = np.zeros(len(X), dtype=np.int32)
+            centroids = X.mean(axis=0, keepdims=True) if len(X) else np.empty((0, X.shape[1]))
+            return ClusteringSweep([1], [0.0], [0.0], {1: labels}, {1: centroids}, 1)
+
+        inertias, silhouettes, labels_by_k, centroids_by_k = [], [], {}, {}
+        init, n_init = 'k-means++', self.n_init
+        for k in k_values:
+            model = self._model(k, init, n_init).fit(X)
+            labels, centroids = canonical_labels(model.labels_, model.cluster_centers_)
+            inertias.append(float(model.inertia_))
+            silhouettes.append(float(self._silhouette(X, labels)) if self.method == 'silhouette' else float('nan'))
+            labels_by_k[k] = labels
+            centroids_by_k[k] = centroids
+
+            # Le k suivant part des centres actuels : une seule initialisation suffit
+            init, n_init = self._warm_start(X, centroids, labels), 1
+            if k + 1 not in self.k_range:
+                init, n_init = 'k-means++', self.n_init
+
+        if self.method == 'silhouette':
+            best_k = k_values[int(np.argmax(silhouettes))]
+        else:
+            best_k = elbow_k(k_values, inertias)
+        return ClusteringSweep(k_values, inertias, silhouettes, labels_by_k, centroids_by_k, best_k)
+
+
+# Moteur partagé par défaut : silhouette sur k = 2..8, résultats reproductibles
+default_clustering_engine = ClusteringEngine()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Colonnes stockées en catégories (peu de valeurs distinctes, filtres fréquents)
+CATEGORICAL_COLUMNS = ['Team Name', 'Position']
+
+# Colonnes numériques lues comme texte par pandas à cause de valeurs parasites ('XX', '-')
+NUMERIC_COLUMNS = ['Age']
+
+PERCENT_PATTERN = re.compile(r'^-?\d+(\.\d+)?%$')
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_fingerprint(file_path, chunk_size=1 << 20):
+    """Calcule l'empreinte SHA-1 du contenu d'un fichier."""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prepare_dataframe(data):
+    """Type les colonnes du rapport de scouting : pourcentages en float, catégories, âges numériques."""
+    data = data.copy()
+
+    for column in data.columns:
+        if data[column].dtype.kind in 'biuf':
+            continue
+
+        values = data[column].dropna().astype(str)
+        # Convertir les colonnes de pourcentages ("90.8%") en float (90.8)
+        if not values.empty and values.str.match(PERCENT_PATTERN).all():
+            data[column] = pd.to_numeric(data[column].astype(str).str.rstrip('%'), errors='coerce')
+
+    for column in NUMERIC_COLUMNS:
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], errors='coerce')
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in data.columns:
+            data[column] = data[column].astype('category')
+
+    return data
+
+
+def write_columns(data, directory):
+    """Écrit chaque colonne dans un fichier .npy de `directory` et renvoie leur description (pour meta.json)."""
+    columns = []
+    for i, name in enumerate(data.columns):
+        series = data[name]
+        entry = {'name': name, 'file': f'col_{i:03d}.npy'}
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'categorical'
+            entry['categories'] = series.cat.categories.tolist()
+            values = series.cat.codes.to_numpy()
+        elif series.dtype.kind in 'biuf':
+            entry['kind'] = 'numeric'
+            values = series.to_numpy()
+        else:
+            # Texte libre (noms de joueurs) : encodé comme une catégorie puis redécodé au chargement
+            categorical = series.astype('category')
+            entry['kind'] = 'string'
+            entry['categories'] = categorical.cat.categories.tolist()
+            values = categorical.cat.codes.to_numpy()
+
+        np.save(os.path.join(directory, entry['file']), values)
+        columns.append(entry)
+    return columns
+
+
+def read_columns(directory, columns, names=None):
+    """Relit les colonnes décrites par `columns` (toutes, ou seulement `names`) en un DataFrame."""
+    if names is not None:
+        columns = [column for column in columns if column['name'] in names]
+    values_by_name = {}
+    for column in columns:
+        values = np.load(os.path.join(directory, column['file']), mmap_mode='r')
+        if column['kind'] == 'numeric':
+            values_by_name[column['name']] = np.asarray(values)
+        else:
+            categorical = pd.Categorical.from_codes(np.asarray(values), categories=column['categories'])
+            if column['kind'] == 'categorical':
+                values_by_name[column['name']] = categorical
+            else:
+                values_by_name[column['name']] = np.asarray(categorical, dtype=object)
+    return pd.DataFrame(values_by_name, columns=[column['name'] for column in columns])
+
+
+class DataCache:
+    """Instantané binaire colonne par colonne (fichiers .npy) d'un fichier CSV, reconstruit si la source change."""
+
+    def __init__(self, file_path, cache_dir=None):
+        self.file_path = file_path
+        if cache_dir is None:
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            cache_dir = os.path.join(os.path.dirname(file_path), '.cache', base_name)
+        self.cache_dir = cache_dir
+        self.meta_path = os.path.join(cache_dir, 'meta.json')
+        self.fingerprint = None
+
+    def load(self):
+        """Charge l'instantané s'il est à jour, sinon relit le CSV et reconstruit l'instantané."""
+        meta = self._read_meta()
+        if meta is not None and self._is_fresh(meta):
+            self.fingerprint = meta['source']['sha1']
+            return self._read_snapshot(meta)
+
+        data = prepare_dataframe(pd.read_csv(self.file_path))
+        self._write_snapshot(data)
+        return data
+
+    def _source_stat(self):
+        stat = os.stat(self.file_path)
+        return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+    def _read_meta(self):
+        if not os.path.isfile(self.meta_path):
+            return None
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+    def _is_fresh(self, meta):
+        """Compare la date de modification puis, si besoin, l'empreinte du CSV source."""
+        source = meta['source']
+        stat = self._source_stat()
+        if stat['mtime_ns'] == source['mtime_ns'] and stat['size'] == source['size']:
+            return True
+
+        # Fichier touché mais peut-être identique : on vérifie le contenu avant de reconstruire
+        if stat['size'] == source['size'] and file_fingerprint(self.file_path) == source['sha1']:
+            source.update(stat)
+            self._write_meta(meta)
+            return True
+        return False
+
+    def _read_snapshot(self, meta):
+        return read_columns(self.cache_dir, meta['columns'])
+
+    def _write_snapshot(self, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if os.path.isfile(self.meta_path):
+            os.remove(self.meta_path)
+        self.fingerprint = file_fingerprint(self.file_path)
+        columns = write_columns(data, self.cache_dir)
+
+        # Les métadonnées sont écrites en dernier : un instantané incomplet n'est jamais considéré valide
+        meta = {
+            'version': CACHE_FORMAT_VERSION,
+            'source': dict(self._source_stat(), sha1=self.fingerprint),
+            'columns': columns,
+        }
+        self._write_meta(meta)
+
+    def _write_meta(self, meta):
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
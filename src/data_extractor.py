@@ -1,122 +1,178 @@
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+from data_cache import DataCache, file_fingerprint, prepare_dataframe
+from player_index import PlayerIndex, intersect_rows, union_rows
+from player_query import ColumnStatistics, PlayerQuery
+from feature_store import FeatureStore
+from percentile_ranks import PercentileRanks
+from name_index import NameIndex
+from team_aggregates import TeamAggregates
+from instrumentation import run, span, spanned
 
 class DataExtractor:
-    def __init__(self, file_path):
-        self.data = pd.read_csv(file_path)
+    def __init__(self, file_path, use_cache=True):
+        self.file_path = file_path
+        with run('DataExtractor.load', path=file_path, use_cache=use_cache) as load:
+            # Charger l'instantané binaire typé (reconstruit automatiquement si le CSV a changé)
+            with span('read'):
+                if use_cache:
+                    cache = DataCache(file_path)
+                    self.data = cache.load()
+                    self.fingerprint = cache.fingerprint
+                else:
+                    self.data = prepare_dataframe(pd.read_csv(file_path))
+                    self.fingerprint = file_fingerprint(file_path)
+            self.data.attrs['fingerprint'] = self.fingerprint
+            load.set(rows=len(self.data))
+
+            # Construire les index inversés (postes, équipes, noms, âges) une seule fois
+            with span('index'):
+                self.index = PlayerIndex(self.data)
+                self.statistics = ColumnStatistics(self.data)
+
+            # Matrices des variables de chaque groupe de postes (clustering, PCA, similarité)
+            with span('feature_store'):
+                self.feature_store = FeatureStore(self.data, self.index)
+
+            # Centiles de chaque variable numérique au sein de chaque groupe de postes
+            with span('percentiles'):
+                self.percentiles = PercentileRanks(self.data, self.index)
+
+            # Index des noms construit à la première recherche qui en a besoin (voir `names`)
+            self._names = None
+
+            # Cube équipes x statistiques x variables (comparaison d'équipes, surperformance xG)
+            with span('team_aggregates'):
+                self.team_aggregates = TeamAggregates(self.data, self.index)
+
+
+    @property
+    def names(self):
+        """Index des noms sans accents ni casse, tolérant aux fautes de frappe (partagé par le CLI et les traitements par lots)."""
+        if self._names is None:
+            with span('names', rows=len(self.data)):
+                self._names = NameIndex(self.data['player_name'], self.data['Team Name'])
+        return self._names
+
+    # Construire une requête composable (exécutée uniquement par collect())
+    def query(self):
+        """Obtenir une requête paresseuse, ex. query().position(['CM']).age_between(20, 25).collect()."""
+        return PlayerQuery(self)
+
+    # Récupérer les lignes correspondant à des positions issues de l'index
+    def _take_rows(self, rows):
+        """Obtenir le sous-ensemble des données correspondant aux positions de lignes fournies."""
+        return self.data.iloc[rows]
+
+    # Positions des joueurs par nom : nom exact, sinon le même nom aux accents et à la casse près
+    def _name_rows(self, player_names):
+        """Positions des joueurs par nom (unique ou multiple), sans tenir compte des accents ni de la casse."""
+        names = player_names if isinstance(player_names, list) else [player_names]
+        row_arrays = []
+        for name in names:
+            rows = self.index.rows_by_name(name)
+            row_arrays.append(rows if len(rows) else self.names.rows(name))
+        return union_rows(row_arrays)
+
+    # Récupérer les joueurs par nom
+    @spanned('DataExtractor.get_players_by_name')
+    def get_players_by_name(self, player_names):
+        """Obtenir les joueurs par nom (unique ou multiple) ; 'kylian mbappe' trouve 'Kylian Mbappé'."""
+        return self._take_rows(self._name_rows(player_names))
 
+    # Retrouver le nom d'un joueur tel qu'il est écrit dans les données
+    def resolve_player_name(self, player_name, team_name=None):
+        """Obtenir le joueur correspondant à la saisie (NameMatch : nom, lignes, score, équipe), ou None.
 
-    # Récupérer les joueurs par nom exact
-    def get_players_by_name(self, player_names):
-        """Obtenir les joueurs par nom (unique ou multiple)."""
-        if isinstance(player_names, list):
-            return self.data[self.data['player_name'].isin(player_names)]
-        else:
-            return self.data[self.data['player_name'] == player_names]
+        Une ou deux fautes de frappe sont tolérées ; `match.exact` est faux dans ce cas. L'équipe départage
+        les homonymes ; elle peut aussi être saisie après le nom : "Walid Cheddira (Espanyol)".
+        """
+        return self.names.resolve(player_name, team_name=team_name)
+
+    # Proposer des noms proches d'une saisie
+    def suggest_player_names(self, player_name, limit=5):
+        """Obtenir les noms les plus proches de la saisie, du plus proche au moins proche."""
+        return [match.name for match in self.names.search(player_name, limit=limit, min_score=0.3)]
 
     # Récupérer les joueurs par position (simple ou multiple)
+    @spanned('DataExtractor.get_players_by_position')
     def get_players_by_position(self, positions):
         """Obtenir les joueurs en fonction d'une ou plusieurs positions."""
-        if isinstance(positions, list):
-            position_filter = '|'.join(positions)
-            return self.data[self.data['Position'].str.contains(position_filter, na=False)]
-        else:
-            return self.data[self.data['Position'] == positions]
+        return self._take_rows(self.index.rows_by_position(positions))
 
     # Récupérer les joueurs par équipe (simple ou multiple)
+    @spanned('DataExtractor.get_players_by_team')
     def get_players_by_team(self, team_names):
         """Obtenir les joueurs par équipe (unique ou multiple)."""
-        if isinstance(team_names, list):
-            return self.data[self.data['Team Name'].isin(team_names)]
-        else:
-            return self.data[self.data['Team Name'] == team_names]
+        return self._take_rows(self.index.rows_by_team(team_names))
 
     # Récupérer les joueurs par âge (simple ou multiple)
+    @spanned('DataExtractor.get_players_by_age')
     def get_players_by_age(self, ages):
         """Obtenir les joueurs par âge (unique ou multiple)."""
-        if isinstance(ages, list):
-            return self.data[self.data['Age'].isin(ages)]
-        else:
-            return self.data[self.data['Age'] == ages]
+        return self._take_rows(self.index.rows_by_age(ages))
+
+    # Récupérer les joueurs dans un intervalle d'âge
+    @spanned('DataExtractor.get_players_by_age_range')
+    def get_players_by_age_range(self, min_age=None, max_age=None):
+        """Obtenir les joueurs dont l'âge est compris entre min_age et max_age (inclus)."""
+        return self._take_rows(self.index.rows_by_age_range(min_age, max_age))
 
     # Récupérer les joueurs par nom et équipe
+    @spanned('DataExtractor.get_players_by_name_and_team')
     def get_players_by_name_and_team(self, player_names, team_names):
         """Obtenir les joueurs en fonction du nom et de l'équipe."""
-        if isinstance(player_names, list):
-            name_filter = self.data['player_name'].isin(player_names)
-        else:
-            name_filter = self.data['player_name'] == player_names
-
-        if isinstance(team_names, list):
-            team_filter = self.data['Team Name'].isin(team_names)
-        else:
-            team_filter = self.data['Team Name'] == team_names
-
-        return self.data[name_filter & team_filter]
+        return self.get_players_by_multiple_criteria(player_names=player_names, team_names=team_names)
 
     # Récupérer les joueurs par position et âge
+    @spanned('DataExtractor.get_players_by_position_and_age')
     def get_players_by_position_and_age(self, positions, ages):
         """Obtenir les joueurs en fonction de la position et de l'âge."""
-        if isinstance(positions, list):
-            position_filter = '|'.join(positions)
-            position_data = self.data['Position'].str.contains(position_filter, na=False)
-        else:
-            position_data = self.data['Position'] == positions
-
-        if isinstance(ages, list):
-            age_filter = self.data['Age'].isin(ages)
-        else:
-            age_filter = self.data['Age'] == ages
-
-        return self.data[position_data & age_filter]
+        return self.get_players_by_multiple_criteria(positions=positions, ages=ages)
 
     # Récupérer les joueurs par équipe et position
+    @spanned('DataExtractor.get_players_by_team_and_position')
     def get_players_by_team_and_position(self, team_names, positions):
         """Obtenir les joueurs en fonction de l'équipe et de la position."""
-        if isinstance(team_names, list):
-            team_filter = self.data['Team Name'].isin(team_names)
-        else:
-            team_filter = self.data['Team Name'] == team_names
-
-        if isinstance(positions, list):
-            position_filter = '|'.join(positions)
-            position_data = self.data['Position'].str.contains(position_filter, na=False)
-        else:
-            position_data = self.data['Position'] == positions
-
-        return self.data[team_filter & position_data]
+        return self.get_players_by_multiple_criteria(positions=positions, team_names=team_names)
 
     # Récupérer les joueurs par nom, position, équipe et âge
+    @spanned('DataExtractor.get_players_by_multiple_criteria')
     def get_players_by_multiple_criteria(self, player_names=None, positions=None, team_names=None, ages=None):
-        """Obtenir les joueurs en fonction de plusieurs critères."""
-        filtered_data = self.data
-        
+        """Obtenir les joueurs en fonction de plusieurs critères (intersection des listes de l'index)."""
+        posting_lists = []
+
         if player_names:
-            if isinstance(player_names, list):
-                filtered_data = filtered_data[filtered_data['player_name'].isin(player_names)]
-            else:
-                filtered_data = filtered_data[filtered_data['player_name'] == player_names]
+            posting_lists.append(self._name_rows(player_names))
 
         if positions:
-            if isinstance(positions, list):
-                position_filter = '|'.join(positions)
-                filtered_data = filtered_data[filtered_data['Position'].str.contains(position_filter, na=False)]
-            else:
-                filtered_data = filtered_data[filtered_data['Position'] == positions]
+            posting_lists.append(self.index.rows_by_position(positions))
 
         if team_names:
-            if isinstance(team_names, list):
-                filtered_data = filtered_data[filtered_data['Team Name'].isin(team_names)]
-            else:
-                filtered_data = filtered_data[filtered_data['Team Name'] == team_names]
+            posting_lists.append(self.index.rows_by_team(team_names))
 
         if ages:
-            if isinstance(ages, list):
-                filtered_data = filtered_data[filtered_data['Age'].isin(ages)]
-            else:
-                filtered_data = filtered_data[filtered_data['Age'] == ages]
+            posting_lists.append(self.index.rows_by_age(ages))
+
+        if not posting_lists:
+            return self.data
+
+        return self._take_rows(intersect_rows(posting_lists))
+
+    # Récupérer les centiles d'un joueur au sein de son groupe de postes (ou d'un groupe donné)
+    def get_player_percentiles(self, player_name, group_key=None, team_name=None):
+        """Obtenir les centiles (0-100) d'un joueur pour chaque variable numérique, ou None."""
+        return self.percentiles.player(player_name, group_key=group_key, team_name=team_name)
+
+    # Récupérer les centiles des joueurs d'une équipe
+    def get_team_percentiles(self, team_name, group_key=None):
+        """Obtenir les centiles des joueurs d'une équipe, chacun au sein de son groupe de postes (ou d'un groupe donné)."""
+        return self.percentiles.team(team_name, group_key=group_key)
 
-        return filtered_data
+    # Comparer les agrégats de deux équipes
+    def get_team_pair(self, team1_name, team2_name, statistic='sum', columns=None):
+        """Obtenir les agrégats ('sum', 'mean' ou 'weighted_mean') de deux équipes et leur écart, ou None."""
+        return self.team_aggregates.pair(team1_name, team2_name, statistic=statistic, columns=columns)
 
     def filter_features(self, player_data, offensive_features, defensive_features):
         """Filtrer les caractéristiques offensives et défensives spécifiées."""
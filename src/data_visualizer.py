@@ -1,29 +1,213 @@
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.colors as mcolors
+import matplotlib.ticker as mticker
 import os
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from scipy.spatial.distance import cdist
 from matplotlib.gridspec import GridSpec
 import pandas as pd
+from model_store import dataframe_fingerprint, default_model_store
+from label_placement import LabelPlacer
+from clustering_engine import default_clustering_engine
+from similarity_index import SimilarityIndex
+from instrumentation import annotate, span, traced
+
+# Gradient vertical (de haut en bas), identique pour toutes les figures
+GRADIENT = np.hstack((np.linspace(0, 1, 256).reshape(-1, 1),) * 2)
+
+# Colormaps déjà construites, par couple de couleurs
+_gradient_cmaps = {}
+
+# Figures réutilisées en mode headless, par (taille, couleurs) : fond en dégradé et axes principaux déjà stylés
+# (contours, graduations, étiquette @TarbouchData) sont conservés, seul le contenu des graphiques est retiré
+_headless_figures = {}
+
+# Emplacements de l'axe principal : toute la figure, ou colonne de gauche à côté d'un tableau (75 % / 25 %)
+PLOT_LAYOUTS = ('full', 'table')
+
+SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+
+def close_headless_figures():
+    """Ferme toutes les figures conservées pour le mode headless."""
+    for fig, _, _ in _headless_figures.values():
+        plt.close(fig)
+    _headless_figures.clear()
+
 
 class DataVisualizer:
-    def __init__(self, features, players_data, color1="#FFFFFF", color2="#D4CAE1"):
+    def __init__(self, features, players_data, color1="#FFFFFF", color2="#D4CAE1", model_store=None, headless=False, smart_labels=False,
+                 clustering_engine=None, similarity_metric='euclidean', feature_weights=None, name_index=None,
+                 team_aggregates=None):
         self.features = features
         self.players_data = players_data
         self.color1 = color1  # Couleur du début du gradient
         self.color2 = color2  # Couleur de fin du gradient
+        self.model_store = model_store if model_store is not None else default_model_store  # Scalers/PCA déjà ajustés
+        # KMeans sur plusieurs k, avec choix automatique du nombre de clusters
+        self.clustering_engine = clustering_engine if clustering_engine is not None else default_clustering_engine
+        # Similarité sur toutes les variables du poste ('euclidean', 'cosine' ou 'mahalanobis'), poids optionnels par variable
+        self.similarity_metric = similarity_metric
+        self.feature_weights = feature_weights
+        # Index des noms (NameIndex) : noms saisis sans accents ou avec une faute de frappe ramenés au nom des données
+        self.name_index = name_index
+        # Agrégats par équipe (TeamAggregates) calculés sur `players_data` : joueurs de chaque équipe déjà regroupés
+        self.team_aggregates = team_aggregates
+
+        # Essayer d'autres emplacements autour du point plutôt que d'ignorer un nom en conflit
+        self.smart_labels = smart_labels
+
+        # Mode headless : backend Agg, pas de plt.show(), figures réutilisées d'un graphique à l'autre
+        self.headless = headless
+        if headless and matplotlib.get_backend().lower() != 'agg':
+            plt.switch_backend('Agg')
+
+    def resolve_player(self, player_name, team_name=None):
+        """Nom du joueur tel qu'écrit dans les données et son équipe si elle a servi à départager des homonymes.
+
+        Sans index des noms, ou si aucun nom n'est assez proche, le nom saisi est renvoyé tel quel (avec des
+        suggestions s'il y en a). Tout remplacement du nom saisi est affiché. Pour un nom porté dans plusieurs
+        équipes sans équipe précisée, la première équipe des données est retenue et l'alternative affichée.
+        """
+        if self.name_index is None:
+            return player_name, team_name
+        match = self.name_index.resolve(player_name, team_name=team_name)
+        if match is None:
+            suggestions = [candidate.name for candidate in self.name_index.search(player_name, min_score=0.3)]
+            if suggestions:
+                print(f"Le joueur {player_name} n'a pas été trouvé. Vouliez-vous dire : {', '.join(suggestions)} ?")
+            return player_name, team_name
+        if match.name != player_name:
+            print(f"« {player_name} » : {match.name}" + (f" ({match.team})" if match.team else ""))
+        if match.ambiguous:
+            print(f"{match.name} : joueurs de plusieurs équipes ({', '.join(match.teams)}), {match.teams[0]} retenue. "
+                  f"Saisissez « {match.name} (Équipe) » pour un autre.")
+            return match.name, match.teams[0]
+        return match.name, match.team if match.team is not None else team_name
+
+    def resolve_players(self, player_names):
+        """(nom tel qu'écrit dans les données, équipe retenue ou None) de chaque joueur, dans l'ordre de saisie."""
+        return [self.resolve_player(player_name) for player_name in player_names]
+
+    @staticmethod
+    def keep_player_teams(players, player_teams):
+        """Lignes de `players` sans les homonymes d'une autre équipe que celle retenue ({nom: équipe})."""
+        if not player_teams:
+            return players
+        teams = players['player_name'].map(player_teams)
+        return players[teams.isna() | (players['Team Name'] == teams)]
+
+    def new_figure(self, figsize=(16, 9)):
+        """Crée une figure avec son fond en dégradé, ou réutilise celle déjà créée en mode headless."""
+        with span('figure'):
+            return self._new_figure(figsize)
+
+    def _new_figure(self, figsize):
+        key = (figsize, self.color1, self.color2)
+        if self.headless and key in _headless_figures:
+            fig, background_ax, plot_axes = _headless_figures[key]
+
+            # Retirer le contenu du graphique précédent en gardant le fond et les axes principaux stylés
+            kept = {ax for ax, _ in plot_axes.values()}
+            for ax in fig.axes:
+                if ax is not background_ax and ax not in kept:
+                    ax.remove()
+            for ax, watermark in plot_axes.values():
+                self.clear_plot_axes(ax, watermark)
+                ax.set_visible(False)
+            for text in list(fig.texts):
+                text.remove()
+            fig.subplots_adjust(**{param: matplotlib.rcParams[f'figure.subplot.{param}'] for param in SUBPLOT_PARAMS})
+            return fig
+
+        fig = plt.figure(figsize=figsize)
+        background_ax = self.create_gradient_background(fig)
+        if self.headless:
+            _headless_figures[key] = (fig, background_ax, {})
+        return fig
+
+    def plot_axes(self, fig, layout='full'):
+        """Axe principal d'un graphique, à fond transparent, avec contours et graduations blancs et l'étiquette Twitter.
+
+        `layout` : 'full' (toute la figure) ou 'table' (colonne de gauche, le tableau occupant `table_axes`).
+        En mode headless, l'axe déjà stylé de la figure réutilisée est rendu vide au lieu d'être recréé.
+        """
+        if layout not in PLOT_LAYOUTS:
+            raise ValueError(f"Emplacement inconnu : {layout} (choix : {', '.join(PLOT_LAYOUTS)})")
+        cached = next((entry[2] for entry in _headless_figures.values() if entry[0] is fig), None) if self.headless else None
+        if cached is not None and layout in cached:
+            ax, _ = cached[layout]
+            ax.set_visible(True)
+            return ax
+
+        with span('axes'):
+            ax = fig.add_subplot(111 if layout == 'full' else self.table_grid()[0], facecolor='none')  # Fond transparent
+
+            # Contours blancs et épais, graduations en blanc
+            self.customize_axes(ax)
+            ax.tick_params(axis='x', colors='white', labelsize=14)
+            ax.tick_params(axis='y', colors='white', labelsize=14)
+
+            # Ajouter l'étiquette Twitter (au-dessus des points et des noms)
+            watermark = ax.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left',
+                                transform=ax.transAxes, alpha=0.8, zorder=5)
+        if cached is not None:
+            cached[layout] = (ax, watermark)
+        return ax
+
+    @staticmethod
+    def table_grid():
+        """Grille 75 % / 25 % : graphique à gauche, tableau à droite."""
+        return GridSpec(1, 2, width_ratios=[3, 1], wspace=0.3)
+
+    def table_axes(self, fig):
+        """Colonne de droite d'un graphique avec tableau, sans axes ni fond."""
+        ax = fig.add_subplot(self.table_grid()[1], facecolor='none')  # Fond transparent
+        ax.axis('tight')
+        ax.axis('off')
+        return ax
+
+    @staticmethod
+    def clear_plot_axes(ax, watermark):
+        """Retire le contenu d'un axe principal (points, textes, tableau, légende, titres, limites et graduations) en gardant son style."""
+        artists = [*ax.collections, *ax.lines, *ax.patches, *ax.images, *ax.tables, *ax.artists,
+                   *(text for text in ax.texts if text is not watermark)]
+        for artist in artists:
+            artist.remove()
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+        ax.set_title('')
+        ax.set_xlabel('')
+        ax.set_ylabel('')
+        for axis in (ax.xaxis, ax.yaxis):
+            axis.set_major_locator(mticker.AutoLocator())
+            axis.set_major_formatter(mticker.ScalarFormatter())
+        ax.relim()
+        ax.set_autoscale_on(True)
+
+    def release_figure(self, fig):
+        """Libère une figure qui ne sera pas sauvegardée (conservée pour réutilisation en mode headless)."""
+        if not self.headless:
+            plt.close(fig)
+
+    def save_figure(self, fig, path, **savefig_kwargs):
+        """Sauvegarde la figure, l'affiche hors mode headless, puis la libère."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        annotate(figure_size=[float(size) for size in fig.get_size_inches()], dpi=savefig_kwargs.get('dpi', fig.dpi), output=path)
+        with span('savefig'):
+            fig.savefig(path, **savefig_kwargs)
+        if not self.headless:
+            plt.show()
+        self.release_figure(fig)
+        return path
 
     def create_gradient_background(self, fig):
         """Crée un fond en dégradé vertical pour l'ensemble de la figure."""
-        # Créer un gradient vertical (de haut en bas)
-        gradient = np.linspace(0, 1, 256).reshape(-1, 1)
-        gradient = np.hstack((gradient, gradient))
-
-        # Créer un colormap personnalisé à partir des couleurs hexadécimales
-        cmap = mcolors.LinearSegmentedColormap.from_list("", [self.color1, self.color2])
+        # Créer un colormap personnalisé à partir des couleurs hexadécimales (une seule fois par couple)
+        cmap_key = (self.color1, self.color2)
+        if cmap_key not in _gradient_cmaps:
+            _gradient_cmaps[cmap_key] = mcolors.LinearSegmentedColormap.from_list("", [self.color1, self.color2])
+        cmap = _gradient_cmaps[cmap_key]
 
         # Ajouter un axe qui occupe toute la figure
         ax = fig.add_axes([0, 0, 1, 1])
@@ -32,7 +216,18 @@ class DataVisualizer:
         ax.axis('off')
 
         # Appliquer le gradient vertical avec les couleurs choisies
-        ax.imshow(gradient, aspect='auto', cmap=cmap, extent=[0, 1, 0, 1], zorder=-1)
+        ax.imshow(GRADIENT, aspect='auto', cmap=cmap, extent=[0, 1, 0, 1], zorder=-1)
+        return ax
+
+    def draw_labels(self, ax, players, x_column, y_column, label_placer, text_offset=(0.2, 0.1)):
+        """Affiche le nom des joueurs en ignorant ceux qui chevaucheraient un nom déjà placé."""
+        with span('labels', rows=len(players)):
+            candidate_offsets = label_placer.candidate_offsets() if self.smart_labels else None
+            positions = label_placer.place_all(players[x_column].to_numpy(), players[y_column].to_numpy(), candidate_offsets)
+            for name, position in zip(players['player_name'].to_numpy(), positions):
+                if position is not None:
+                    x, y = position
+                    ax.text(x + text_offset[0], y + text_offset[1], name, fontsize=12, ha='right', va='bottom', fontweight='bold', color='white', zorder=3)
 
     def customize_axes(self, ax):
         """Personnalise les axes avec des contours blancs et épais."""
@@ -40,26 +235,50 @@ class DataVisualizer:
             spine.set_edgecolor('white')  # Couleur blanche
             spine.set_linewidth(2.5)  # Épaisseur du contour
 
+    def project_players(self, players, group, data, offensive_features, defensive_features):
+        """Ajoute les composantes PCA offensive et défensive aux joueurs (modèle réutilisé si déjà ajusté)."""
+        with span('projection', rows=len(players)):
+            model = self.model_store.get_or_fit(dataframe_fingerprint(data), group, players, offensive_features, defensive_features)
+        players['PCA_Component_1'] = model.coordinates[:, 0]
+        players['PCA_Component_2'] = model.coordinates[:, 1]
+        return model
+
+    def project_group(self, data, group):
+        """Joueurs d'un groupe du magasin de variables, avec leurs composantes PCA et l'index de similarité du groupe.
+
+        Les variables sont lues directement dans la matrice du groupe, sans nouvelle extraction du DataFrame.
+        """
+        with span('filter', rows=len(group)):
+            players = group.players(data)
+        with span('projection', rows=len(group)):
+            model = self.model_store.get_or_fit_group(dataframe_fingerprint(data), group)
+        players['PCA_Component_1'] = model.coordinates[:, 0]
+        players['PCA_Component_2'] = model.coordinates[:, 1]
+        with span('similarity_index', rows=len(group)):
+            index = SimilarityIndex.from_group(group, metric=self.similarity_metric, weights=self.feature_weights)
+        return players, model, index
+
+    @traced('DataVisualizer.plot_players_by_team')
     def plot_players_by_team(self, team_name, threshold_distance=1):
         """Affiche tous les joueurs d'une équipe donnée dans un graphique."""
         # Créer une figure avec des dimensions adaptées pour les appareils mobiles
-        fig = plt.figure(figsize=(16, 9))  # Largeur 16, hauteur 9 pour un ajustement mobile
+        fig = self.new_figure()  # Largeur 16, hauteur 9 pour un ajustement mobile
 
-        # Créer le fond en dégradé pour l'ensemble de la figure
-        self.create_gradient_background(fig)
-
-        # Ajouter un axe pour le graphique principal, avec un fond transparent
-        ax = fig.add_subplot(111, facecolor='none')  # Fond transparent
+        # Axe du graphique principal, déjà stylé (fond transparent, contours et graduations blancs, étiquette Twitter)
+        ax = self.plot_axes(fig)
 
         # Extraire les colonnes pour les passes progressives (X) et les possessions progressives (Y)
         x_values = self.features['Passes progressives']
         y_values = self.features['Possessions progressives']
 
         # Filtrer les données pour ne garder que les joueurs de l'équipe donnée
-        filtered_players = self.players_data[self.players_data['Team Name'] == team_name]
+        with span('filter') as stage:
+            filtered_players = self.players_data[self.players_data['Team Name'] == team_name]
+            stage.set(rows=len(filtered_players))
 
         if filtered_players.empty:
             print(f"Aucun joueur trouvé pour l'équipe {team_name}.")
+            self.release_figure(fig)
             return
 
         # Tracer les joueurs de l'équipe filtrée
@@ -69,16 +288,9 @@ class DataVisualizer:
         ax.set_xlim(np.floor(np.min(x_values)) - 1, np.ceil(np.max(x_values)) + 1)
         ax.set_ylim(np.floor(np.min(y_values)) - 1, np.ceil(np.max(y_values)) + 1)
 
-        # Afficher les noms des joueurs de l'équipe
-        displayed_names = []
-        for i, row in filtered_players.iterrows():
-            name = row['player_name']
-            x, y = row['Passes progressives'], row['Possessions progressives']
-
-            # Éviter la superposition des noms avec une condition moins stricte
-            if not any(np.linalg.norm([x - dx, y - dy]) < (threshold_distance / 2) for dx, dy in displayed_names):
-                ax.text(x + 0.2, y + 0.1, name, fontsize=12, ha='right', va='bottom', fontweight='bold', color='white', zorder=3)
-                displayed_names.append((x, y))
+        # Afficher les noms des joueurs de l'équipe (éviter la superposition avec une condition moins stricte)
+        label_placer = LabelPlacer(threshold_distance / 2)
+        self.draw_labels(ax, filtered_players, 'Passes progressives', 'Possessions progressives', label_placer)
 
         # Ajouter le titre en blanc et en gras
         ax.set_title(f'Projection des Passes et des Possessions progressives ({team_name})', fontsize=25, color='white', fontweight='bold')
@@ -87,50 +299,46 @@ class DataVisualizer:
         ax.set_xlabel('Passes progressives (par 90")', fontsize=16, color='white', fontweight='bold')
         ax.set_ylabel('Possessions progressives (par 90")', fontsize=16, color='white', fontweight='bold')
 
-        # Ajouter l'étiquette Twitter
-        ax.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left', transform=ax.transAxes, alpha=0.8)
-
-        # Appliquer la personnalisation des axes (contours blancs et épais)
-        self.customize_axes(ax)
-
-        # Ajouter les ticks des axes (graduations) en blanc
-        ax.tick_params(axis='x', colors='white', labelsize=14)  # Ticks en blanc et taille des labels réduite
-        ax.tick_params(axis='y', colors='white', labelsize=14)
-
         # Appliquer les ticks pour montrer les valeurs de progression moyenne par match (seulement des entiers)
         ax.set_xticks(np.arange(np.floor(np.min(x_values)), np.ceil(np.max(x_values)) + 1, 1))
         ax.set_yticks(np.arange(np.floor(np.min(y_values)), np.ceil(np.max(y_values)) + 1, 1))
 
         # Sauvegarder le fichier et afficher le graphique
-        plt.savefig(f"viz_data/projection_passes_possessions_{team_name}.jpeg", format='jpeg', dpi=300)
-        plt.show()
+        return self.save_figure(fig, f"viz_data/projection_passes_possessions_{team_name}.jpeg", format='jpeg', dpi=300)
 
 
 
-    def plot_players_by_position(self, position_player, team_names=None, threshold_distance=1):
-        """Affiche tous les joueurs d'un poste donné dans un graphique, avec un filtre d'équipes spécifié."""
-        # Créer une figure avec des dimensions adaptées pour les appareils mobiles
-        fig = plt.figure(figsize=(16, 9))  # Largeur 16, hauteur 9 pour un ajustement mobile
+    @traced('DataVisualizer.plot_players_by_position')
+    def plot_players_by_position(self, position_player, team_names=None, threshold_distance=1, positions=None):
+        """Affiche tous les joueurs d'un poste donné dans un graphique, avec un filtre d'équipes spécifié.
 
-        # Créer le fond en dégradé pour l'ensemble de la figure
-        self.create_gradient_background(fig)
+        Si `positions` est fourni, `position_player` sert de libellé (titre, fichier) pour ce groupe de postes.
+        """
+        # Créer une figure avec des dimensions adaptées pour les appareils mobiles
+        fig = self.new_figure()  # Largeur 16, hauteur 9 pour un ajustement mobile
 
-        # Ajouter un axe pour le graphique principal, avec un fond transparent
-        ax = fig.add_subplot(111, facecolor='none')  # Fond transparent
+        # Axe du graphique principal, déjà stylé (fond transparent, contours et graduations blancs, étiquette Twitter)
+        ax = self.plot_axes(fig)
 
         # Extraire les colonnes pour les passes progressives (X) et les possessions progressives (Y)
         x_values = self.features['Passes progressives']
         y_values = self.features['Possessions progressives']
 
-        # Filtrer les données pour ne garder que les joueurs du poste donné
-        filtered_players = self.players_data[self.players_data['Position'] == position_player]
+        with span('filter') as stage:
+            # Filtrer les données pour ne garder que les joueurs du poste donné
+            if positions is not None:
+                filtered_players = self.players_data[self.players_data['Position'].isin(positions)]
+            else:
+                filtered_players = self.players_data[self.players_data['Position'] == position_player]
 
-        # Appliquer un filtre sur les équipes, si `team_names` est spécifié
-        if team_names is not None:
-            filtered_players = filtered_players[filtered_players['Team Name'].isin(team_names)]
+            # Appliquer un filtre sur les équipes, si `team_names` est spécifié
+            if team_names is not None:
+                filtered_players = filtered_players[filtered_players['Team Name'].isin(team_names)]
+            stage.set(rows=len(filtered_players))
 
         if filtered_players.empty:
             print(f"Aucun joueur trouvé pour le poste {position_player} avec les équipes spécifiées.")
+            self.release_figure(fig)
             return
 
         # Tracer les joueurs de l'équipe filtrée
@@ -141,21 +349,11 @@ class DataVisualizer:
         ax.set_ylim(np.floor(np.min(y_values)) - 1, np.ceil(np.max(y_values)) + 1)
 
         # Afficher les noms des joueurs de l'équipe
-        displayed_names = []
-        for i, row in filtered_players.iterrows():
-            name = row['player_name']
-            x, y = row['Passes progressives'], row['Possessions progressives']
-
-            # Éviter la superposition des noms avec une condition plus stricte pour x que pour y
-            x_threshold = threshold_distance / 1.5 # Distance plus importante pour x
-            y_threshold = threshold_distance / 3.25  # Distance moins stricte pour y
-
-            if not any(
-                np.abs(x - dx) < x_threshold and np.abs(y - dy) < y_threshold
-                for dx, dy in displayed_names
-            ):
-                ax.text(x + 0.2, y + 0.1, name, fontsize=12, ha='right', va='bottom', fontweight='bold', color='white', zorder=3)
-                displayed_names.append((x, y))
+        # Éviter la superposition des noms avec une condition plus stricte pour x que pour y
+        x_threshold = threshold_distance / 1.5 # Distance plus importante pour x
+        y_threshold = threshold_distance / 3.25  # Distance moins stricte pour y
+        label_placer = LabelPlacer(x_threshold, y_threshold, metric='box')
+        self.draw_labels(ax, filtered_players, 'Passes progressives', 'Possessions progressives', label_placer)
 
 
         # Ajouter le titre en blanc et en gras
@@ -165,84 +363,87 @@ class DataVisualizer:
         ax.set_xlabel('Passes progressives (par 90")', fontsize=16, color='white', fontweight='bold')
         ax.set_ylabel('Possessions progressives (par 90")', fontsize=16, color='white', fontweight='bold')
 
-        # Ajouter l'étiquette Twitter
-        ax.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left', transform=ax.transAxes, alpha=0.8)
-
-        # Personnaliser les axes avec des contours blancs et épais
-        self.customize_axes(ax)
-
-        # Ajouter les ticks des axes en blanc
-        ax.tick_params(axis='x', colors='white', labelsize=14)
-        ax.tick_params(axis='y', colors='white', labelsize=14)
-
         # Ajouter des ticks pour afficher les valeurs entières
         ax.set_xticks(np.arange(np.floor(np.min(x_values)), np.ceil(np.max(x_values)) + 1, 1))
         ax.set_yticks(np.arange(np.floor(np.min(y_values)), np.ceil(np.max(y_values)) + 1, 1))
 
         # Sauvegarder l'image et afficher le graphique
-        plt.savefig(f"viz_data/projection_passes_possessions_{position_player}.jpeg", format='jpeg', dpi=300)
-        plt.show()
+        return self.save_figure(fig, f"viz_data/projection_passes_possessions_{position_player}.jpeg", format='jpeg', dpi=300)
 
-    def clustering_player_comparison(self, player_name, data, offensive_features, defensive_features):
-        """Effectuer un clustering et comparer un joueur avec ses pairs au même poste, avec 2 colonnes et fond en dégradé."""
+    @traced('DataVisualizer.clustering_player_comparison')
+    def clustering_player_comparison(self, player_name, data, offensive_features, defensive_features, group=None, team_name=None):
+        """Effectuer un clustering et comparer un joueur avec ses pairs au même poste, avec 2 colonnes et fond en dégradé.
+
+        Si `group` (matrice d'un groupe du FeatureStore) est fourni, le joueur est comparé aux joueurs de ce groupe.
+        `team_name` départage les homonymes (ou "Nom (Équipe)" avec un index des noms).
+        """
         output_dir = 'viz_data/clustering'
         os.makedirs(output_dir, exist_ok=True)
 
-        # Sélectionner un joueur par son nom
-        selected_player = data[data['player_name'] == player_name]
+        # Sélectionner un joueur par son nom (et son équipe pour des homonymes)
+        player_name, team_name = self.resolve_player(player_name, team_name)
+        with span('select'):
+            selected = data['player_name'] == player_name
+            if team_name is not None and (selected & (data['Team Name'] == team_name)).any():
+                selected &= data['Team Name'] == team_name
+            selected_player = data[selected]
 
         if selected_player.empty:
             print(f"Le joueur {player_name} n'a pas été trouvé.")
             return
 
-        # Obtenir la position du joueur
-        positions = selected_player['Position'].values[0].split(',')
-
-        # Vérifier les positions et filtrer les joueurs
-        if len(positions) > 1:
-            position_filter = '|'.join(positions)
-            position_players = data[data['Position'].str.contains(position_filter, na=False)]
+        if group is not None:
+            # Joueurs du groupe de postes choisi, variables lues dans la matrice du groupe
+            positions = group.positions
+            position_players, model, index = self.project_group(data, group)
         else:
-            position_players = data[data['Position'] == positions[0]]
-
-        # Filtrer les caractéristiques et standardiser
-        position_players = position_players.dropna(subset=offensive_features + defensive_features)
-        scaler_offensive = StandardScaler()
-        scaler_defensive = StandardScaler()
-
-        offensive_scaled = scaler_offensive.fit_transform(position_players[offensive_features])
-        defensive_scaled = scaler_defensive.fit_transform(position_players[defensive_features])
-
-        # PCA pour les variables offensives et défensives
-        pca_offensive = PCA(n_components=1)
-        offensive_component = pca_offensive.fit_transform(offensive_scaled)
-
-        pca_defensive = PCA(n_components=1)
-        defensive_component = pca_defensive.fit_transform(defensive_scaled)
-
-        # Ajouter les composantes PCA au DataFrame
-        position_players['PCA_Component_1'] = offensive_component.flatten()
-        position_players['PCA_Component_2'] = defensive_component.flatten()
-
-        # Clustering avec KMeans
-        kmeans = KMeans(n_clusters=1)
-        position_players['cluster'] = kmeans.fit_predict(np.column_stack([offensive_component, defensive_component]))
-
-        # Calculer les distances par rapport au joueur sélectionné
-        selected_player_pca = position_players[position_players['player_name'] == player_name][['PCA_Component_1', 'PCA_Component_2']].values
-        distances = cdist(selected_player_pca, position_players[['PCA_Component_1', 'PCA_Component_2']].values, metric='euclidean').flatten()
-        position_players['distance_to_selected'] = distances
+            # Obtenir la position du joueur
+            positions = selected_player['Position'].values[0].split(',')
+
+            with span('filter') as stage:
+                # Vérifier les positions et filtrer les joueurs
+                if len(positions) > 1:
+                    position_filter = '|'.join(positions)
+                    position_players = data[data['Position'].str.contains(position_filter, na=False)]
+                else:
+                    position_players = data[data['Position'] == positions[0]]
+
+                # Filtrer les caractéristiques et standardiser
+                position_players = position_players.dropna(subset=offensive_features + defensive_features)
+                stage.set(rows=len(position_players))
+
+            # PCA pour les variables offensives et défensives (scalers et PCA mis en cache par groupe de postes)
+            model = self.project_players(position_players, positions, data, offensive_features, defensive_features)
+            with span('similarity_index', rows=len(position_players)):
+                index = SimilarityIndex.from_players(position_players, offensive_features + defensive_features,
+                                                     metric=self.similarity_metric, weights=self.feature_weights)
+
+        # Clustering avec KMeans : le nombre de clusters est choisi parmi plusieurs k
+        with span('clustering', rows=len(position_players)) as stage:
+            sweep = self.clustering_engine.fit(model.coordinates)
+            stage.set(k=int(sweep.best_k))
+        annotate(rows=len(position_players))
+        position_players['cluster'] = sweep.labels
+        print(f"Clustering : {sweep.best_k} clusters retenus")
+
+        # Calculer les distances par rapport au joueur sélectionné sur toutes les variables standardisées (la PCA ne sert qu'à l'affichage)
+        selected_rows = np.flatnonzero(position_players['player_name'].to_numpy() == player_name)
+        if team_name is not None:
+            same_team = selected_rows[position_players['Team Name'].to_numpy(dtype=object)[selected_rows] == team_name]
+            selected_rows = same_team if len(same_team) else selected_rows
+        if len(selected_rows) == 0:
+            print(f"Le joueur {player_name} n'a pas de statistiques complètes pour ce poste.")
+            return
+        with span('similarity'):
+            position_players['distance_to_selected'] = index.distances_from(int(selected_rows[0]))
+        selected_player_pca = model.coordinates[selected_rows[:1]]
         sorted_players = position_players.sort_values(by='distance_to_selected')
 
         # Créer une figure avec une répartition 80%-20% pour les colonnes
-        fig = plt.figure(figsize=(16, 9))
-        gs = GridSpec(1, 2, width_ratios=[3, 1], wspace=0.3)  # 80% pour le graphique, 20% pour le tableau
-
-        # Créer le fond en dégradé pour l'ensemble de la figure
-        self.create_gradient_background(fig)
+        fig = self.new_figure()
 
         # Colonne de gauche : graphique des clusters (80%)
-        ax1 = fig.add_subplot(gs[0], facecolor='none')  # Fond transparent
+        ax1 = self.plot_axes(fig, 'table')  # Fond transparent, déjà stylé
 
         # Afficher les clusters dans l'axe de gauche
         scatter = ax1.scatter(
@@ -251,7 +452,7 @@ class DataVisualizer:
         )
 
         # Identifiez le cluster du joueur sélectionné
-        selected_cluster = position_players[position_players['player_name'] == player_name]['cluster'].values[0]
+        selected_cluster = position_players['cluster'].iat[int(selected_rows[0])]
         selected_cluster_points = position_players[position_players['cluster'] == selected_cluster][['PCA_Component_1', 'PCA_Component_2']].values
 
         
@@ -286,28 +487,16 @@ class DataVisualizer:
         ax1.text(0.25, -0.125, offensive_text, fontsize=10, color='white', fontweight='light', ha='left', va='top', transform=ax1.transAxes)
         ax1.text(0.25, -0.1, defensive_text, fontsize=10, color='white', fontweight='light', ha='left', va='top', transform=ax1.transAxes)
 
-        # Appliquer la personnalisation des axes (contours blancs et épais)
-        self.customize_axes(ax1)
-
-        # Ajouter les ticks des axes (graduations) en blanc
-        ax1.tick_params(axis='x', colors='white', labelsize=14)
-        ax1.tick_params(axis='y', colors='white', labelsize=14)
-
         # Ajuster automatiquement les limites des axes en fonction des données
         ax1.set_xlim(np.floor(np.min(position_players['PCA_Component_1'])) - 1, np.ceil(np.max(position_players['PCA_Component_1'])) + 1)
         ax1.set_ylim(np.floor(np.min(position_players['PCA_Component_2'])) - 1, np.ceil(np.max(position_players['PCA_Component_2'])) + 1)
         
-        # Ajouter l'étiquette Twitter
-        ax1.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left', transform=ax1.transAxes, alpha=0.8)
-
         # Afficher la légende avec du texte en blanc
         legend = ax1.legend()
         plt.setp(legend.get_texts(), color='black')
 
         # Colonne de droite : tableau des joueurs les plus proches (20%)
-        ax2 = fig.add_subplot(gs[1], facecolor='none')  # Fond transparent
-        ax2.axis('tight')
-        ax2.axis('off')
+        ax2 = self.table_axes(fig)  # Sans axes ni fond
 
         # Sélectionner les 10 joueurs les plus proches du même cluster
         closest_players = sorted_players[sorted_players['cluster'] == selected_cluster][['player_name', 'distance_to_selected']].head(10)
@@ -346,85 +535,107 @@ class DataVisualizer:
         print(f"Extrémum de PCA_Component_2: min = {min_pca2_row['PCA_Component_2']} ({min_pca2_row['player_name']}), max = {max_pca2_row['PCA_Component_2']} ({max_pca2_row['player_name']})")
 
         # Sauvegarder le fichier et afficher le graphique
-        plt.subplots_adjust(left=0.05)
+        fig.subplots_adjust(left=0.05)
 
-        plt.savefig(f"{output_dir}/clustering_{player_name}_styled.png", format='png')
-        plt.show()
+        return self.save_figure(fig, f"{output_dir}/clustering_{player_name}_styled.png", format='png')
 
     
 
-    def clustering_multiple_players_comparison_with_reference(self, player_names, data, offensive_features, defensive_features):
-        """Effectuer un clustering et comparer le premier joueur avec les autres de la liste."""
+    @traced('DataVisualizer.clustering_multiple_players_comparison_with_reference')
+    def clustering_multiple_players_comparison_with_reference(self, player_names, data, offensive_features, defensive_features, group=None):
+        """Effectuer un clustering et comparer le premier joueur avec les autres de la liste.
+
+        Si `group` (matrice d'un groupe du FeatureStore) est fourni, les joueurs sont placés parmi ceux de ce groupe.
+        Renvoie le chemin du graphique et la matrice (DataFrame k x k) des distances entre tous les joueurs comparés,
+        calculées sur toutes les variables du poste.
+        """
         output_dir = 'viz_data/clustering'
         os.makedirs(output_dir, exist_ok=True)
 
-        valid_players = data['player_name'].isin(player_names)
-        selected_players = data[valid_players]
+        resolved = self.resolve_players(player_names)
+        player_names = [name for name, _ in resolved]
+        player_teams = {name: team for name, team in resolved if team is not None}
+        with span('select') as stage:
+            valid_players = data['player_name'].isin(player_names)
+            selected_players = self.keep_player_teams(data[valid_players], player_teams)
+            stage.set(rows=len(selected_players))
 
         if selected_players.empty:
             print(f"Aucun des joueurs {', '.join(player_names)} n'a été trouvé.")
             return
 
-        # Obtenir les positions des joueurs (on prend la première position du premier joueur pour simplifier)
-        positions = selected_players['Position'].values[0].split(',')
-
-        # Vérifier les positions et filtrer les joueurs
-        if len(positions) > 1:
-            position_filter = '|'.join(positions)
-            position_players = data[data['Position'].str.contains(position_filter, na=False)]
+        if group is not None:
+            # Joueurs du groupe de postes choisi, variables lues dans la matrice du groupe
+            positions = group.positions
+            position_players, model, index = self.project_group(data, group)
+            name_rows = group.name_rows
         else:
-            position_players = data[data['Position'] == positions[0]]
-
-        # Filtrer les caractéristiques et standardiser
-        position_players = position_players.dropna(subset=offensive_features + defensive_features)
-        scaler_offensive = StandardScaler()
-        scaler_defensive = StandardScaler()
-
-        offensive_scaled = scaler_offensive.fit_transform(position_players[offensive_features])
-        defensive_scaled = scaler_defensive.fit_transform(position_players[defensive_features])
-
-        # PCA pour les variables offensives et défensives
-        pca_offensive = PCA(n_components=1)
-        offensive_component = pca_offensive.fit_transform(offensive_scaled)
-
-        pca_defensive = PCA(n_components=1)
-        defensive_component = pca_defensive.fit_transform(defensive_scaled)
-
-        # Ajouter les composantes PCA au DataFrame
-        position_players['PCA_Component_1'] = offensive_component.flatten()
-        position_players['PCA_Component_2'] = defensive_component.flatten()
-
-        # Clustering avec KMeans
-        kmeans = KMeans(n_clusters=3)
-        position_players['cluster'] = kmeans.fit_predict(np.column_stack([offensive_component, defensive_component]))
+            # Obtenir les positions des joueurs (on prend la première position du premier joueur pour simplifier)
+            positions = selected_players['Position'].values[0].split(',')
+
+            with span('filter') as stage:
+                # Vérifier les positions et filtrer les joueurs
+                if len(positions) > 1:
+                    position_filter = '|'.join(positions)
+                    position_players = data[data['Position'].str.contains(position_filter, na=False)]
+                else:
+                    position_players = data[data['Position'] == positions[0]]
+
+                # Filtrer les caractéristiques et standardiser
+                position_players = position_players.dropna(subset=offensive_features + defensive_features)
+                stage.set(rows=len(position_players))
+
+            # PCA pour les variables offensives et défensives (scalers et PCA mis en cache par groupe de postes)
+            model = self.project_players(position_players, positions, data, offensive_features, defensive_features)
+            with span('similarity_index', rows=len(position_players)):
+                index = SimilarityIndex.from_players(position_players, offensive_features + defensive_features,
+                                                     metric=self.similarity_metric, weights=self.feature_weights)
+            name_rows = {}
+            for row, name in enumerate(position_players['player_name'].to_numpy(dtype=object)):
+                name_rows.setdefault(name, []).append(row)
+
+        # Homonymes : ligne de l'équipe retenue (sans modifier l'index du groupe)
+        if player_teams:
+            name_rows = dict(name_rows)
+            teams = position_players['Team Name'].to_numpy(dtype=object)
+            for name, team in player_teams.items():
+                team_rows = [row for row in name_rows.get(name, []) if teams[row] == team]
+                if team_rows:
+                    name_rows[name] = team_rows
+
+        # Joueurs comparés présents parmi les joueurs du poste : un accès au dictionnaire par nom
+        compared_players = [name for name in dict.fromkeys(player_names) if name in name_rows]
+        missing_players = [name for name in dict.fromkeys(player_names) if name not in name_rows]
+        if missing_players:
+            print(f"Joueurs absents de ce poste ou sans statistiques complètes, ignorés : {', '.join(missing_players)}")
+        if player_names[0] not in name_rows:
+            print(f"Le joueur de référence {player_names[0]} est absent de ce poste ou n'a pas de statistiques complètes.")
+            return
 
-        # Le premier joueur est la référence
-        reference_player = player_names[0]
-        reference_player_pca = position_players[position_players['player_name'] == reference_player][['PCA_Component_1', 'PCA_Component_2']].values
-
-        # Calculer les distances du joueur de référence avec les autres
-        other_players = player_names[1:]  # Exclure le joueur de référence
-        other_players_pca = position_players[position_players['player_name'].isin(other_players)][['PCA_Component_1', 'PCA_Component_2']].values
-        
-        other_players_pca = np.array([
-            position_players[position_players['player_name'] == player][['PCA_Component_1', 'PCA_Component_2']].values[0]
-            for player in other_players if player in position_players['player_name'].values
-        ])
-
-        distances = cdist(reference_player_pca, other_players_pca, metric='euclidean').flatten()
-        
-        if len(other_players) != len(distances):
-            other_players = other_players[:len(distances)]
+        # Clustering avec KMeans : le nombre de clusters est choisi parmi plusieurs k
+        with span('clustering', rows=len(position_players)) as stage:
+            sweep = self.clustering_engine.fit(model.coordinates)
+            stage.set(k=int(sweep.best_k))
+        annotate(rows=len(position_players), compared=len(compared_players))
+        position_players['cluster'] = sweep.labels
+        print(f"Clustering : {sweep.best_k} clusters retenus")
+
+        # Le premier joueur est la référence ; une seule lecture indexée pour les coordonnées de tous les joueurs comparés
+        reference_player = compared_players[0]
+        other_players = compared_players[1:]
+        rows = np.array([name_rows[name][0] for name in compared_players], dtype=np.intp)
+        compared_pca = model.coordinates[rows]
+
+        # Distances entre tous les joueurs comparés (k x k), sur toutes les variables standardisées du poste
+        with span('similarity', rows=len(rows)):
+            distance_matrix = pd.DataFrame(index.pairwise(rows), index=compared_players, columns=compared_players)
+        distances = distance_matrix.iloc[0, 1:].to_numpy()
 
         # Créer une figure avec une répartition 60%-40% pour les colonnes
-        fig = plt.figure(figsize=(16, 9))
-        gs = GridSpec(1, 2, width_ratios=[3, 1], wspace=0.3)  # 60% pour le graphique, 40% pour le tableau
-
-        # Créer le fond en dégradé pour l'ensemble de la figure
-        self.create_gradient_background(fig)
+        fig = self.new_figure()
 
         # Colonne de gauche : graphique des clusters (60%)
-        ax1 = fig.add_subplot(gs[0], facecolor='none')  # Fond transparent
+        ax1 = self.plot_axes(fig, 'table')  # Fond transparent, déjà stylé
     
         # Afficher les clusters dans l'axe de gauche
         scatter = ax1.scatter(
@@ -436,23 +647,19 @@ class DataVisualizer:
     
         # Mettre en évidence le joueur de référence avec une croix jaune
         ref_scatter = ax1.scatter(
-            reference_player_pca[0, 0], 
-            reference_player_pca[0, 1], 
+            compared_pca[0, 0], 
+            compared_pca[0, 1], 
             color='yellow', marker='x', s=300, 
-            zorder=4, linewidth=4, edgecolors='black', label=f'{reference_player} (Référence)'
+            zorder=4, linewidth=4, label=f'{reference_player} (Référence)'
         )
     
-        # Ajouter une croix rouge pour chaque autre joueur sélectionné
-        comp_scatters = []
-        for player in other_players:
-            player_pca = position_players[position_players['player_name'] == player][['PCA_Component_1', 'PCA_Component_2']].values
-            comp_scatter = ax1.scatter(
-                player_pca[0, 0], 
-                player_pca[0, 1], 
-                color='red', marker='x', s=300, 
-                zorder=4, linewidth=4, edgecolors='black'
-            )
-            comp_scatters.append(comp_scatter)
+        # Ajouter une croix rouge pour chaque autre joueur sélectionné (un seul appel pour tous)
+        comp_scatter = ax1.scatter(
+            compared_pca[1:, 0], 
+            compared_pca[1:, 1], 
+            color='red', marker='x', s=300, 
+            zorder=4, linewidth=4
+        )
     
         # Si le joueur a plusieurs positions, les afficher séparées par une virgule
         positions_str = ', '.join(positions) if len(positions) > 1 else positions[0]
@@ -470,36 +677,21 @@ class DataVisualizer:
         ax1.text(0.25, -0.125, offensive_text, fontsize=10, color='white', fontweight='light', ha='left', va='top', transform=ax1.transAxes)
         ax1.text(0.25, -0.1, defensive_text, fontsize=10, color='white', fontweight='light', ha='left', va='top', transform=ax1.transAxes)
     
-        # Appliquer la personnalisation des axes (contours blancs et épais)
-        self.customize_axes(ax1)
-    
-        # Ajouter les ticks des axes (graduations) en blanc
-        ax1.tick_params(axis='x', colors='white', labelsize=14)
-        ax1.tick_params(axis='y', colors='white', labelsize=14)
-    
         # Ajuster automatiquement les limites des axes en fonction des données
         ax1.set_xlim(np.floor(np.min(position_players['PCA_Component_1'])) - 1, np.ceil(np.max(position_players['PCA_Component_1'])) + 1)
         ax1.set_ylim(np.floor(np.min(position_players['PCA_Component_2'])) - 1, np.ceil(np.max(position_players['PCA_Component_2'])) + 1)
     
-        # Ajouter l'étiquette Twitter
-        ax1.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left', transform=ax1.transAxes, alpha=0.8)
-    
         # Ajouter la légende avec croix jaune et rouge
-        legend_labels = [f'{player_names[0]} (Référence)', 'Joueurs comparés']
+        legend_labels = [f'{reference_player} (Référence)', 'Joueurs comparés']
         legend_handles = [ref_scatter, comp_scatter]  # Un exemple d'un seul scatter rouge suffira pour la légende
         legend = ax1.legend(legend_handles, legend_labels, loc='upper right')
         plt.setp(legend.get_texts(), color='black')
     
 
         # Colonne de droite : tableau des distances entre le joueur de référence et les autres (40%)
-        ax2 = fig.add_subplot(gs[1], facecolor='none')  # Fond transparent
-        ax2.axis('tight')
-        ax2.axis('off')
+        ax2 = self.table_axes(fig)  # Sans axes ni fond
 
         # Créer un tableau avec deux colonnes : Joueur, Distance avec {Joueur de référence}
-        print(f"Taille de other_players ", other_players)
-        print(f"Taille de distances: ", distances)
-
         closest_players = pd.DataFrame({
             'Nom': other_players,
             f'Distance - {reference_player}': distances.round(2)
@@ -524,18 +716,23 @@ class DataVisualizer:
                 cell.set_facecolor('none')  # Cases transparentes pour les autres lignes
 
         # Sauvegarder le fichier et afficher le graphique
-        plt.subplots_adjust(left=0.05)
-        plt.savefig(f"{output_dir}/clustering_{reference_player}_vs_others_styled.png", format='png')
-        plt.show()
+        fig.subplots_adjust(left=0.05)
+        path = self.save_figure(fig, f"{output_dir}/clustering_{reference_player}_vs_others_styled.png", format='png')
+        return path, distance_matrix
 
+    @traced('DataVisualizer.clustering_players_pca_comparison')
     def clustering_players_pca_comparison(self, player_names, data, offensive_features, defensive_features, threshold_distance=1):
         """Effectuer un PCA sur une liste de joueurs sélectionnés et les afficher sur un graphique."""
         output_dir = 'viz_data/clustering'
         os.makedirs(output_dir, exist_ok=True)
     
         # Sélectionner les joueurs par leurs noms qui sont présents dans les données
-        valid_players = data['player_name'].isin(player_names)
-        selected_players = data[valid_players]
+        resolved = self.resolve_players(player_names)
+        player_names = [name for name, _ in resolved]
+        with span('select') as stage:
+            valid_players = data['player_name'].isin(player_names)
+            selected_players = self.keep_player_teams(data[valid_players], {name: team for name, team in resolved if team is not None})
+            stage.set(rows=len(selected_players))
     
         # Vérifier s'il y a des joueurs valides
         if selected_players.empty:
@@ -551,34 +748,23 @@ class DataVisualizer:
             print(f"Les joueurs suivants n'ont pas été trouvés et seront ignorés : {', '.join(missing_players)}")
     
         # Filtrer les caractéristiques et standardiser
-        selected_players = selected_players.dropna(subset=offensive_features + defensive_features)
-        scaler_offensive = StandardScaler()
-        scaler_defensive = StandardScaler()
-    
-        offensive_scaled = scaler_offensive.fit_transform(selected_players[offensive_features])
-        defensive_scaled = scaler_defensive.fit_transform(selected_players[defensive_features])
-    
-        # PCA pour les variables offensives et défensives
-        pca_offensive = PCA(n_components=1)
-        offensive_component = pca_offensive.fit_transform(offensive_scaled)
+        with span('filter') as stage:
+            selected_players = selected_players.dropna(subset=offensive_features + defensive_features)
+            stage.set(rows=len(selected_players))
+        annotate(rows=len(selected_players))
     
-        pca_defensive = PCA(n_components=1)
-        defensive_component = pca_defensive.fit_transform(defensive_scaled)
-    
-        # Ajouter les composantes PCA au DataFrame
-        selected_players['PCA_Component_1'] = offensive_component.flatten()
-        selected_players['PCA_Component_2'] = defensive_component.flatten()
+        # PCA pour les variables offensives et défensives (modèle mis en cache pour cette sélection de joueurs)
+        self.project_players(selected_players, ['selection'] + valid_player_names, data, offensive_features, defensive_features)
     
         # Le premier joueur est la référence (s'il est parmi les joueurs valides)
         reference_player = valid_player_names[0]
         reference_player_pca = selected_players[selected_players['player_name'] == reference_player][['PCA_Component_1', 'PCA_Component_2']].values
     
         # Créer la figure
-        fig = plt.figure(figsize=(16, 9))  # Taille pour appareils mobiles
-        self.create_gradient_background(fig)  # Fond en dégradé
+        fig = self.new_figure()  # Taille pour appareils mobiles
     
-        # Ajouter un axe pour le graphique principal, avec un fond transparent
-        ax = fig.add_subplot(111, facecolor='none')  # Fond transparent
+        # Axe du graphique principal, déjà stylé (fond transparent, contours et graduations blancs, étiquette Twitter)
+        ax = self.plot_axes(fig)
     
         # Afficher les joueurs avec des points (pas de croix)
         scatter = ax.scatter(
@@ -591,16 +777,9 @@ class DataVisualizer:
         ax.set_xlim(np.floor(np.min(selected_players['PCA_Component_1'])) - 1, np.ceil(np.max(selected_players['PCA_Component_1'])) + 1)
         ax.set_ylim(np.floor(np.min(selected_players['PCA_Component_2'])) - 1, np.ceil(np.max(selected_players['PCA_Component_2'])) + 1)
     
-        # Ajouter les noms des joueurs
-        displayed_names = []
-        for i, row in selected_players.iterrows():
-            name = row['player_name']
-            x, y = row['PCA_Component_1'], row['PCA_Component_2']
-    
-            # Éviter la superposition des noms en vérifiant la distance entre les points
-            if not any(np.linalg.norm([x - dx, y - dy]) < threshold_distance/3 for dx, dy in displayed_names):
-                ax.text(x + 0.2, y + 0.1, name, fontsize=12, ha='right', va='bottom', fontweight='bold', color='white', zorder=3)
-                displayed_names.append((x, y))
+        # Ajouter les noms des joueurs (éviter la superposition en vérifiant la distance entre les points)
+        label_placer = LabelPlacer(threshold_distance / 3)
+        self.draw_labels(ax, selected_players, 'PCA_Component_1', 'PCA_Component_2', label_placer)
     
         # Ajouter le titre en blanc et en gras
         ax.set_title(f'PCA des joueurs sélectionnés', fontsize=25, color='white', fontweight='bold')
@@ -615,48 +794,44 @@ class DataVisualizer:
         ax.text(0.25, -0.125, offensive_text, fontsize=10, color='white', fontweight='light', ha='left', va='top', transform=ax.transAxes)
         ax.text(0.25, -0.1, defensive_text, fontsize=10, color='white', fontweight='light', ha='left', va='top', transform=ax.transAxes)
     
-        # Ajouter l'étiquette Twitter
-        ax.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left', transform=ax.transAxes, alpha=0.8)
-    
-        # Appliquer la personnalisation des axes (contours blancs et épais)
-        self.customize_axes(ax)
-    
-        # Ajouter les ticks des axes en blanc
-        ax.tick_params(axis='x', colors='white', labelsize=14)
-        ax.tick_params(axis='y', colors='white', labelsize=14)
-    
         # Sauvegarder le fichier et afficher le graphique
-        plt.savefig(f"{output_dir}/pca_comparison_selected_styled.png", format='png', dpi=300)
-        plt.show()
+        return self.save_figure(fig, f"{output_dir}/pca_comparison_selected_styled.png", format='png', dpi=300)
     
+    @traced('DataVisualizer.compare_teams')
     def compare_teams(self, team1_name, team2_name, threshold_distance=1):
         """Compare deux équipes en affichant les joueurs sur un graphique basé sur création d'occasions (tentatives) et finition (réussites)."""
 
         # Créer une figure avec des dimensions adaptées pour les appareils mobiles
-        fig = plt.figure(figsize=(16, 9))  # Largeur 16, hauteur 9 pour un ajustement mobile
+        fig = self.new_figure()  # Largeur 16, hauteur 9 pour un ajustement mobile
 
-        # Créer le fond en dégradé pour l'ensemble de la figure
-        self.create_gradient_background(fig)
-
-        # Ajouter un axe pour le graphique principal, avec un fond transparent
-        ax = fig.add_subplot(111, facecolor='none')  # Fond transparent
+        # Axe du graphique principal, déjà stylé (fond transparent, contours et graduations blancs, étiquette Twitter)
+        ax = self.plot_axes(fig)
 
         # Filtrer les données pour chaque équipe
-        team1_players = self.players_data[self.players_data['Team Name'] == team1_name]
-        team2_players = self.players_data[self.players_data['Team Name'] == team2_name]
+        with span('filter') as stage:
+            if self.team_aggregates is not None:
+                # Joueurs ayant x>0 et y>0, déjà regroupés par équipe
+                team1_players = self.players_data.iloc[self.team_aggregates.finishers(team1_name)]
+                team2_players = self.players_data.iloc[self.team_aggregates.finishers(team2_name)]
+            else:
+                team1_players = self.players_data[self.players_data['Team Name'] == team1_name]
+                team2_players = self.players_data[self.players_data['Team Name'] == team2_name]
 
-        # Exclure les joueurs ayant x=0 ou y=0
-        team1_players = team1_players[(team1_players['npxG: xG sans les pénaltys'] > 0) & 
-                                      (team1_players['Buts (sans les pénaltys)'] > 0)]
-        team2_players = team2_players[(team2_players['npxG: xG sans les pénaltys'] > 0) & 
-                                      (team2_players['Buts (sans les pénaltys)'] > 0)]
+                # Exclure les joueurs ayant x=0 ou y=0
+                team1_players = team1_players[(team1_players['npxG: xG sans les pénaltys'] > 0) & 
+                                              (team1_players['Buts (sans les pénaltys)'] > 0)]
+                team2_players = team2_players[(team2_players['npxG: xG sans les pénaltys'] > 0) & 
+                                              (team2_players['Buts (sans les pénaltys)'] > 0)]
+            stage.set(rows=len(team1_players) + len(team2_players))
 
         if team1_players.empty:
             print(f"Aucun joueur trouvé pour l'équipe {team1_name} après filtrage.")
+            self.release_figure(fig)
             return
 
         if team2_players.empty:
             print(f"Aucun joueur trouvé pour l'équipe {team2_name} après filtrage.")
+            self.release_figure(fig)
             return
 
         # Combiner les données des deux équipes pour calculer les valeurs min/max
@@ -680,26 +855,10 @@ class DataVisualizer:
         ax.set_xlim(x_min, x_max)
         ax.set_ylim(y_min, y_max)
 
-        # Afficher les noms des joueurs des deux équipes
-        displayed_names = []
-
-        # Affichage des noms pour l'équipe 1
-        for i, row in team1_players.iterrows():
-            name = row['player_name']
-            x, y = row['npxG: xG sans les pénaltys'], row['Buts (sans les pénaltys)']
-
-            if not any(np.linalg.norm([x - dx, y - dy]) < (threshold_distance / 20) for dx, dy in displayed_names):
-                ax.text(x + 0.02, y + 0.01, name, fontsize=12, ha='right', va='bottom', fontweight='bold', color='white', zorder=3)
-                displayed_names.append((x, y))
-
-        # Affichage des noms pour l'équipe 2
-        for i, row in team2_players.iterrows():
-            name = row['player_name']
-            x, y = row['npxG: xG sans les pénaltys'], row['Buts (sans les pénaltys)']
-
-            if not any(np.linalg.norm([x - dx, y - dy]) < (threshold_distance / 20) for dx, dy in displayed_names):
-                ax.text(x + 0.02, y + 0.01, name, fontsize=12, ha='right', va='bottom', fontweight='bold', color='white', zorder=3)
-                displayed_names.append((x, y))
+        # Afficher les noms des joueurs des deux équipes (même grille pour les deux équipes)
+        label_placer = LabelPlacer(threshold_distance / 20)
+        for team_players in (team1_players, team2_players):
+            self.draw_labels(ax, team_players, 'npxG: xG sans les pénaltys', 'Buts (sans les pénaltys)', label_placer, text_offset=(0.02, 0.01))
 
         # Ajouter le titre en blanc et en gras
         ax.set_title(f'Comparaison - ({team1_name} vs {team2_name})', fontsize=25, color='white', fontweight='bold')
@@ -708,16 +867,6 @@ class DataVisualizer:
         ax.set_xlabel('Création d\'occasions/90 (npxG - expected goals sans pénaltys)', fontsize=16, color='white', fontweight='bold')
         ax.set_ylabel('Finition des occasions/90 (Buts sans pénaltys)', fontsize=16, color='white', fontweight='bold')
 
-        # Ajouter l'étiquette Twitter
-        ax.text(0.5, 0.75, f"@TarbouchData", fontsize=14, color='white', fontweight='bold', ha='left', transform=ax.transAxes, alpha=0.8)
-
-        # Appliquer la personnalisation des axes (contours blancs et épais)
-        self.customize_axes(ax)
-
-        # Ajouter les ticks des axes (graduations) en blanc
-        ax.tick_params(axis='x', colors='white', labelsize=14)
-        ax.tick_params(axis='y', colors='white', labelsize=14)
-
         # Ajouter les ticks pour montrer les valeurs de progression moyenne par match (seulement des entiers)
         ax.set_xticks(np.arange(x_min, x_max + 1, 0.25))
         ax.set_yticks(np.arange(y_min, y_max + 1, 0.25))
@@ -726,5 +875,4 @@ class DataVisualizer:
         ax.legend(loc='upper left', fontsize=14, facecolor='white', framealpha=0.5)
 
         # Sauvegarder le fichier et afficher le graphique
-        plt.savefig(f"viz_data/comparaison_tentatives_reussites_{team1_name}_vs_{team2_name}.jpeg", format='jpeg', dpi=300)
-        plt.show()
+        return self.save_figure(fig, f"viz_data/comparaison_tentatives_reussites_{team1_name}_vs_{team2_name}.jpeg", format='jpeg', dpi=300)
@@ -0,0 +1,229 @@
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from page_cache import PageCache
+from table_parser import parse_table
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Impose un intervalle minimal entre deux requêtes vers un même hôte, partagé entre les threads."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.next_allowed = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host):
+        # Réserver le prochain créneau sous verrou, puis attendre hors verrou
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed.get(host, now))
+            self.next_allowed[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, host, delay):
+        """Repousse le prochain créneau de l'hôte (ex. en-tête Retry-After d'une réponse 429)."""
+        with self.lock:
+            self.next_allowed[host] = max(self.next_allowed.get(host, 0), time.monotonic() + delay)
+
+
+class HttpClient:
+    """Session HTTP partagée (pool de connexions), limitation par hôte et nouvelles tentatives avec backoff."""
+
+    def __init__(self, min_interval=12.0, max_retries=3, backoff=2.0, timeout=30, pool_size=8, cache=None):
+        self.cache = cache  # PageCache optionnel : les pages encore valides ne sont pas retéléchargées
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.rate_limiter = HostRateLimiter(min_interval)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def get(self, url):
+        """Renvoie le HTML d'une page, depuis le cache si possible, ou None après épuisement des tentatives."""
+        meta = self.cache.lookup(url) if self.cache else None
+        if meta and meta['fresh']:
+            self.cache.record('hit', meta['size'])
+            return self.cache.read(url)
+        headers = self.cache.conditional_headers(meta) if meta else {}
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RequestException as err:
+                print(f"Erreur réseau pour {url} (tentative {attempt + 1}) : {err}")
+            else:
+                if response.status_code == 304 and meta:
+                    self.cache.touch(url, meta)
+                    self.cache.record('revalidated', meta['size'])
+                    return self.cache.read(url)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as http_err:
+                        print(f"HTTP error occurred: {http_err}")
+                        return None
+                    if self.cache:
+                        self.cache.store(url, response.text, response.headers.get('ETag'),
+                                         response.headers.get('Last-Modified'))
+                        self.cache.record('miss')
+                    return response.text
+                print(f"Réponse {response.status_code} pour {url} (tentative {attempt + 1})")
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    self.rate_limiter.defer(host, int(retry_after))
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        return None
+
+    def close(self):
+        self.session.close()
+
+
+class Checkpoint:
+    """Fichier de reprise : une URL de joueur déjà traitée par ligne, ajoutée au fil de l'eau."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark_done(self, key):
+        self.done.add(key)
+        self.file.write(key + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def extract_scouting_report(html):
+    """Lignes (statistique, valeur, ...) du premier tableau de la page, ou None s'il n'y en a pas."""
+    table = parse_table(html)
+    return table.body_rows if table else None
+
+
+def rebase_url(url, base_url):
+    """Remplace le schéma et l'hôte d'une URL (ex. serveur local servant des pages enregistrées)."""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, parts.fragment))
+
+
+class ScoutingReportScraper:
+    """Récupère le scouting report de chaque joueur de players_data.csv en parallèle, avec reprise après interruption."""
+
+    def __init__(self, players_data_path, output_csv_path, checkpoint_path=None, client=None, workers=4, base_url=None):
+        self.players_data_path = players_data_path
+        self.output_csv_path = output_csv_path
+        self.checkpoint_path = checkpoint_path or output_csv_path + '.checkpoint'
+        self.client = client if client is not None else HttpClient()
+        self.workers = workers
+        self.base_url = base_url
+
+    def fetch_report(self, player_url):
+        html = self.client.get(rebase_url(player_url, self.base_url))
+        if html is None:
+            return None, False
+        return extract_scouting_report(html), True
+
+    def process_players(self):
+        """Traite les joueurs non encore présents dans le fichier de reprise et renvoie le nombre de lignes écrites."""
+        players_df = pd.read_csv(self.players_data_path)
+        checkpoint = Checkpoint(self.checkpoint_path)
+        pending = [(row['Player Name'], row['Player URL'])
+                   for _, row in players_df.iterrows() if row['Player URL'] not in checkpoint]
+        print(f"{len(players_df) - len(pending)} joueur(s) déjà traité(s), {len(pending)} à traiter.")
+
+        os.makedirs(os.path.dirname(self.output_csv_path) or '.', exist_ok=True)
+        file_exists = os.path.isfile(self.output_csv_path) and os.path.getsize(self.output_csv_path) > 0
+        written = 0
+
+        # Un seul fichier ouvert ; les résultats sont écrits dans l'ordre de players_data.csv,
+        # ce dont dépend l'appariement des homonymes lors du nettoyage
+        with open(self.output_csv_path, 'a', newline='', encoding='utf-8') as f, \
+                ThreadPoolExecutor(max_workers=self.workers) as executor:
+            writer = csv.writer(f)
+            futures = [executor.submit(self.fetch_report, player_url) for _, player_url in pending]
+            for (player_name, player_url), future in zip(pending, futures):
+                # Une page illisible ne doit pas interrompre les autres joueurs
+                try:
+                    rows_data, fetched = future.result()
+                except Exception as err:
+                    print(f"Échec pour {player_name} ({type(err).__name__}: {err}), il sera retenté au prochain lancement.")
+                    continue
+                if not fetched:
+                    print(f"Échec du téléchargement pour {player_name}, il sera retenté au prochain lancement.")
+                    continue
+                if rows_data:
+                    if not file_exists:
+                        writer.writerow(['player_name'] + [row[0] for row in rows_data])
+                        file_exists = True
+                    writer.writerow([player_name] + [row[1] for row in rows_data])
+                    f.flush()
+                    written += 1
+                else:
+                    print(f"No scouting report found for {player_name}.")
+                checkpoint.mark_done(player_url)
+
+        checkpoint.close()
+        print(f"{written} joueur(s) sauvegardé(s) dans {self.output_csv_path}")
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction des scouting reports FBref (parallèle, avec reprise)")
+    parser.add_argument('--players', default='data/players_data.csv', help="Fichier des joueurs (nom, poste, URL, équipe)")
+    parser.add_argument('--output', default='data/scouting_report_v2.csv', help="Fichier CSV de sortie")
+    parser.add_argument('--checkpoint', default=None, help="Fichier de reprise (par défaut : <output>.checkpoint)")
+    parser.add_argument('--workers', type=int, default=4, help="Nombre de téléchargements simultanés")
+    parser.add_argument('--interval', type=float, default=12.0, help="Secondes minimum entre deux requêtes vers un même hôte")
+    parser.add_argument('--retries', type=int, default=3, help="Nombre de nouvelles tentatives par page")
+    parser.add_argument('--cache_dir', default='data/.cache/pages', help="Dossier du cache des pages HTML")
+    parser.add_argument('--ttl', type=float, default=7 * 24, help="Durée de validité des pages en cache, en heures")
+    parser.add_argument('--no_cache', action='store_true', help="Désactive le cache des pages")
+    parser.add_argument('--base_url', default=None, help="Remplace l'hôte des URL (ex. http://localhost:8000 pour un serveur local)")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else PageCache(args.cache_dir, ttl=args.ttl * 3600)
+    client = HttpClient(min_interval=args.interval, max_retries=args.retries, pool_size=args.workers, cache=cache)
+    scraper = ScoutingReportScraper(args.players, args.output, checkpoint_path=args.checkpoint,
+                                    client=client, workers=args.workers, base_url=args.base_url)
+    try:
+        scraper.process_players()
+    finally:
+        client.close()
+        if cache:
+            print(cache.report())
+
+
+if __name__ == "__main__":
+    main()
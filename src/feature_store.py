@@ -0,0 +1,101 @@
+import numpy as np
+
+from position_groups import FEATURE_GROUPS, get_group_key
+
+
+class GroupFeatures:
+    """Matrice contiguë (joueurs x variables) d'un groupe de postes, avec le lien vers les lignes des données.
+
+    Les colonnes sont les variables offensives puis défensives ; seuls les joueurs dont toutes les
+    variables sont renseignées y figurent. `rows` donne, pour chaque ligne de la matrice, la position
+    du joueur dans le DataFrame source (`data.iloc[rows]`). La matrice est en lecture seule : les
+    consommateurs (PCA, clustering, similarité) la lisent sans la copier.
+    """
+
+    def __init__(self, key, positions, offensive_features, defensive_features, matrix, rows, row_labels, names):
+        self.key = key
+        self.positions = positions
+        self.offensive_features = offensive_features
+        self.defensive_features = defensive_features
+        self.matrix = matrix
+        self.rows = rows
+        self.row_labels = row_labels
+        self.names = names
+
+        # Nom -> lignes de la matrice (plusieurs lignes pour des homonymes)
+        self.name_rows = {}
+        for row, name in enumerate(names):
+            self.name_rows.setdefault(name, []).append(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def features(self):
+        return self.offensive_features + self.defensive_features
+
+    @property
+    def offensive(self):
+        """Vue sur les colonnes offensives."""
+        return self.matrix[:, :len(self.offensive_features)]
+
+    @property
+    def defensive(self):
+        """Vue sur les colonnes défensives."""
+        return self.matrix[:, len(self.offensive_features):]
+
+    def row_of(self, player_name):
+        """Ligne de la matrice du premier joueur portant ce nom, ou None."""
+        rows = self.name_rows.get(player_name)
+        return rows[0] if rows else None
+
+    def players(self, data):
+        """Lignes du DataFrame source correspondant à la matrice, dans le même ordre."""
+        return data.iloc[self.rows]
+
+
+class FeatureStore:
+    """Matrices des variables de chaque groupe de postes, construites une fois au chargement des données.
+
+    La configuration (`FEATURE_GROUPS` par défaut) décrit pour chaque groupe ses postes élémentaires
+    et ses variables offensives et défensives ; `dtype` peut être np.float32 pour réduire la mémoire.
+    """
+
+    def __init__(self, data, index, config=None, dtype=np.float64):
+        self.config = config if config is not None else FEATURE_GROUPS
+        self.dtype = dtype
+
+        # Toutes les colonnes utilisées, extraites une seule fois en un bloc numérique
+        columns = list(dict.fromkeys(
+            feature for group in self.config.values() for feature in group['offensive'] + group['defensive']
+        ))
+        column_positions = {column: i for i, column in enumerate(columns)}
+        values = data[columns].to_numpy(dtype=dtype, na_value=np.nan)
+        names = data['player_name'].to_numpy(dtype=object)
+
+        self.groups = {}
+        for key, group in self.config.items():
+            features = group['offensive'] + group['defensive']
+            rows = index.rows_by_position(list(group['positions']))
+            matrix = values[np.ix_(rows, [column_positions[feature] for feature in features])]
+
+            complete = ~np.isnan(matrix).any(axis=1)
+            rows = rows[complete]
+            matrix = np.ascontiguousarray(matrix[complete])
+            matrix.flags.writeable = False
+
+            self.groups[key] = GroupFeatures(key, group['positions'], group['offensive'], group['defensive'],
+                                             matrix, rows, data.index.to_numpy()[rows], names[rows])
+
+    def group(self, key):
+        """Matrice du groupe de clé '1. Milieu', ... ; None si inconnu."""
+        return self.groups.get(key)
+
+    def group_by_choice(self, choice):
+        """Matrice du groupe correspondant au numéro saisi, ou None."""
+        key = get_group_key(choice)
+        return self.groups[key] if key in self.groups else None
+
+    def nbytes(self):
+        """Mémoire occupée par les matrices de tous les groupes."""
+        return sum(group.matrix.nbytes for group in self.groups.values())
@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from data_cache import DataCache
+from fbref_scraper import HttpClient, ScoutingReportScraper
+from page_cache import PageCache
+from scouting_cleaner import ScoutingReportCleaner
+
+MANIFEST_COLUMNS = ['player_url', 'team_name', 'player_name', 'report_row', 'cleaned_row', 'content_hash', 'last_fetched']
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+# Position 'cleaned_row' d'une ligne valide du rapport absente du fichier nettoyé existant (écartée ou renommée
+# à la main) : elle n'y est jamais ajoutée. -1 : ligne invalide, ajoutée si elle devient valide.
+EXCLUDED_ROW = -2
+
+
+def content_hash(values):
+    """Empreinte des valeurs brutes d'une ligne du scouting report."""
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+
+def format_cell(value):
+    """Texte d'une valeur tel que l'écrit `DataFrame.to_csv` (vide pour une valeur manquante)."""
+    return '' if pd.isna(value) else str(value)
+
+
+def _write_csv(data, path, lineterminator='\n'):
+    # Écriture dans un fichier temporaire puis remplacement : le fichier n'est jamais lu à moitié écrit
+    tmp_path = path + '.tmp'
+    data.to_csv(tmp_path, index=False, lineterminator=lineterminator)
+    os.replace(tmp_path, path)
+
+
+class IncrementalRefresh:
+    """Mise à jour incrémentale du scouting report et du jeu de données nettoyé.
+
+    Un manifeste (un joueur = une URL et une équipe de players_data.csv) garde la ligne du joueur dans
+    le scouting report et dans le fichier nettoyé, l'empreinte de ses valeurs et la date du dernier
+    téléchargement. Seuls les joueurs plus anciens que `max_age` sont retéléchargés, et seules les
+    lignes dont le contenu a changé sont réécrites dans les deux fichiers.
+
+    Le fichier nettoyé existant n'est jamais régénéré : ses lignes sont mises à jour sur place, et les
+    colonnes que le nettoyage ne produit pas (ex. 'Age') sont conservées telles quelles.
+    """
+
+    def __init__(self, players_data_path, report_path, cleaned_path, manifest_path=None, client=None,
+                 max_age=timedelta(days=7), workers=4, base_url=None):
+        self.players_data_path = players_data_path
+        self.report_path = report_path
+        self.cleaned_path = cleaned_path
+        self.manifest_path = manifest_path or os.path.splitext(report_path)[0] + '_manifest.csv'
+        self.max_age = max_age
+        self.workers = workers
+        self.scraper = ScoutingReportScraper(players_data_path, report_path, client=client, workers=workers, base_url=base_url)
+
+    def load_players(self):
+        players_data = pd.read_csv(self.players_data_path)
+        return players_data.rename(columns={'Player Name': 'player_name'})
+
+    def load_report(self):
+        # Lecture en texte brut : les lignes non modifiées sont réécrites à l'identique
+        return pd.read_csv(self.report_path, dtype=str, keep_default_na=False)
+
+    def build_manifest(self, players_data, report, last_fetched):
+        """Manifeste reconstruit à partir des fichiers existants.
+
+        La i-ème ligne d'un nom dans le rapport correspond à la i-ème ligne de ce nom dans players_data,
+        comme lors du nettoyage. Les lignes du fichier nettoyé sont retrouvées par joueur et équipe, sans
+        le réécrire ; il n'est créé que s'il n'existe pas encore.
+        """
+        report = report.assign(_occurrence=report.groupby('player_name', sort=False).cumcount().to_numpy(),
+                               report_row=np.arange(len(report)))
+        players = players_data[['player_name', 'Player URL', 'Team Name']]
+        players = players.assign(_occurrence=players.groupby('player_name', sort=False).cumcount().to_numpy())
+        matched = report.merge(players, on=['player_name', '_occurrence'], how='inner', sort=False)
+
+        stat_columns = list(report.columns[1:-2])
+        manifest = pd.DataFrame({
+            'player_url': matched['Player URL'],
+            'team_name': matched['Team Name'],
+            'player_name': matched['player_name'],
+            'report_row': matched['report_row'],
+            'cleaned_row': -1,
+            'content_hash': [content_hash(values) for values in matched[stat_columns].itertuples(index=False)],
+            'last_fetched': last_fetched,
+        })
+        cleaned = self.clean(players_data)
+        if not os.path.isfile(self.cleaned_path):
+            _write_csv(cleaned, self.cleaned_path)
+            existing = cleaned
+        else:
+            existing = pd.read_csv(self.cleaned_path, usecols=['player_name', 'Team Name'], dtype=str, keep_default_na=False)
+        return self.assign_cleaned_rows(manifest, cleaned, existing)
+
+    @staticmethod
+    def assign_cleaned_rows(manifest, cleaned, existing):
+        """Renseigne la position de chaque joueur dans le fichier nettoyé existant.
+
+        `cleaned` est le résultat du nettoyage (index : lignes du rapport) ; la i-ème ligne d'un couple
+        (joueur, équipe) y correspond à la i-ème ligne de ce couple dans `existing`. Une ligne valide sans
+        correspondance est marquée `EXCLUDED_ROW`, une ligne invalide -1.
+        """
+        keys = ['player_name', 'Team Name']
+        cleaned = cleaned[keys].fillna('').astype(str)
+        cleaned = cleaned.assign(_occurrence=cleaned.groupby(keys, sort=False).cumcount().to_numpy(),
+                                 report_row=cleaned.index.to_numpy())
+        existing = existing[keys].assign(_occurrence=existing.groupby(keys, sort=False).cumcount().to_numpy(),
+                                         cleaned_row=np.arange(len(existing)))
+        positions = cleaned.merge(existing, on=keys + ['_occurrence'], how='inner').set_index('report_row')['cleaned_row']
+        excluded = manifest['report_row'].isin(cleaned['report_row'])
+        manifest['cleaned_row'] = manifest['report_row'].map(positions).fillna(-1).astype(int)
+        manifest.loc[excluded & (manifest['cleaned_row'] < 0), 'cleaned_row'] = EXCLUDED_ROW
+        return manifest
+
+    def load_manifest(self, players_data, report):
+        if os.path.isfile(self.manifest_path):
+            return pd.read_csv(self.manifest_path, dtype={'content_hash': str})
+        # Premier lancement : les données existantes sont considérées comme téléchargées à leur date de modification
+        last_fetched = datetime.fromtimestamp(os.path.getmtime(self.report_path), timezone.utc).strftime(TIMESTAMP_FORMAT)
+        print(f"Manifeste absent, reconstruction à partir de {self.report_path}")
+        return self.build_manifest(players_data, report, last_fetched)
+
+    def save_manifest(self, manifest):
+        _write_csv(manifest[MANIFEST_COLUMNS], self.manifest_path)
+
+    def stale_players(self, players_data, manifest, now):
+        """Joueurs de players_data absents du manifeste ou téléchargés il y a plus de `max_age`."""
+        known = manifest.set_index(['player_url', 'team_name'])['last_fetched']
+        keys = pd.MultiIndex.from_arrays([players_data['Player URL'], players_data['Team Name']])
+        last_fetched = pd.to_datetime(known.reindex(keys).to_numpy(), format=TIMESTAMP_FORMAT)
+        threshold = (now - self.max_age).replace(tzinfo=None)
+        stale = pd.isna(last_fetched) | (last_fetched < threshold)
+        return players_data[stale]
+
+    def fetch(self, urls):
+        """Télécharge chaque URL une seule fois (un joueur transféré apparaît dans deux équipes)."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(zip(urls, executor.map(self.scraper.fetch_report, urls)))
+
+    def clean(self, players_data):
+        """Résultat du nettoyage complet du rapport, en mémoire (index : lignes du rapport)."""
+        data = pd.read_csv(self.report_path)
+        cleaned = ScoutingReportCleaner.merge_homonyms(data[ScoutingReportCleaner.valid_rows_mask(data)], players_data)
+        columns = ['player_name', 'Position', 'Team Name'] + [col for col in data.columns if col != 'player_name']
+        return cleaned[columns]
+
+    def patch_cleaned(self, manifest, changed_rows, players_data):
+        """Met à jour dans le fichier nettoyé les seules lignes modifiées ; renvoie leur nombre.
+
+        Une ligne déjà présente est réécrite sur place (les colonnes absentes du rapport, comme 'Age', sont
+        conservées) ou retirée si elle n'est plus valide ; une ligne devenue valide est ajoutée à la fin,
+        avec le poste et l'équipe de players_data et ces colonnes vides. Les lignes `EXCLUDED_ROW` ne sont
+        jamais ajoutées.
+        """
+        typed = pd.read_csv(self.report_path)
+        cleaned = pd.read_csv(self.cleaned_path, dtype=str, keep_default_na=False)
+        stat_columns = [col for col in typed.columns if col != 'player_name']
+        positions = [cleaned.columns.get_loc(col) for col in stat_columns]
+        positions_by_player = players_data.drop_duplicates(['Player URL', 'Team Name']).set_index(['Player URL', 'Team Name'])['Position']
+
+        rows = np.array(sorted(changed_rows), dtype=int)
+        valid_now = ScoutingReportCleaner.valid_rows_mask(typed.iloc[rows])
+        keep = np.ones(len(cleaned), dtype=bool)
+        added = []
+        patched = 0
+        for report_row, valid in zip(rows, valid_now):
+            entries = np.flatnonzero(manifest['report_row'].to_numpy() == report_row)
+            cleaned_row = int(manifest['cleaned_row'].iat[entries[0]])
+            values = [format_cell(v) for v in typed.iloc[report_row][stat_columns]]
+            patched += cleaned_row >= 0 or (valid and cleaned_row != EXCLUDED_ROW)
+            if cleaned_row >= 0 and valid:
+                cleaned.iloc[cleaned_row, positions] = values
+            elif cleaned_row >= 0:
+                keep[cleaned_row] = False
+            elif valid and cleaned_row != EXCLUDED_ROW:
+                entry = manifest.iloc[entries[0]]
+                row = dict.fromkeys(cleaned.columns, '')
+                row.update(zip(stat_columns, values))
+                row['player_name'] = entry['player_name']
+                row['Position'] = format_cell(positions_by_player.get((entry['player_url'], entry['team_name'])))
+                row['Team Name'] = entry['team_name']
+                added.append((entries, row))
+
+        # Nouvelles positions : lignes retirées à -1, lignes ajoutées à la suite des lignes conservées
+        new_positions = np.where(keep, np.cumsum(keep) - 1, -1)
+        has_row = manifest['cleaned_row'].to_numpy() >= 0
+        manifest.loc[has_row, 'cleaned_row'] = new_positions[manifest['cleaned_row'].to_numpy()[has_row]]
+        cleaned = cleaned[keep].reset_index(drop=True)
+        for entries, row in added:
+            manifest.loc[manifest.index[entries], 'cleaned_row'] = len(cleaned)
+            cleaned.loc[len(cleaned)] = row
+        _write_csv(cleaned, self.cleaned_path)
+        return int(patched)
+
+    def refresh(self, now=None):
+        """Retélécharge les joueurs périmés et met à jour les fichiers ; renvoie le nombre de lignes modifiées."""
+        now = now or datetime.now(timezone.utc)
+        players_data = self.load_players()
+        report = self.load_report()
+        manifest = self.load_manifest(players_data, report)
+
+        stale = self.stale_players(players_data, manifest, now)
+        print(f"{len(stale)} joueur(s) à rafraîchir sur {len(players_data)}")
+        results = self.fetch(list(dict.fromkeys(stale['Player URL'])))
+
+        stat_columns = list(report.columns[1:])
+        by_key = {key: i for i, key in enumerate(zip(manifest['player_url'], manifest['team_name']))}
+        timestamp = now.strftime(TIMESTAMP_FORMAT)
+        changed_rows = set()
+
+        players = stale.rename(columns={'Player URL': 'player_url', 'Team Name': 'team_name'})
+        for player in players.itertuples(index=False):
+            rows_data, fetched = results[player.player_url]
+            if not fetched:
+                continue  # Reste périmé : retenté au prochain rafraîchissement
+
+            key = (player.player_url, player.team_name)
+            if key not in by_key:
+                # Suivi même sans scouting report, pour ne pas retélécharger le joueur à chaque rafraîchissement
+                by_key[key] = len(manifest)
+                manifest.loc[len(manifest)] = [player.player_url, player.team_name, player.player_name, -1, -1, '', timestamp]
+            i = by_key[key]
+            manifest.at[i, 'last_fetched'] = timestamp
+            if not rows_data:
+                continue
+
+            # Même alignement positionnel que l'extraction complète, complété ou tronqué aux colonnes du rapport
+            values = ([row[1] if len(row) > 1 else '' for row in rows_data] + [''] * len(stat_columns))[:len(stat_columns)]
+            digest = content_hash(values)
+            report_row = int(manifest.at[i, 'report_row'])
+            if report_row < 0:
+                report_row = len(report)
+                report.loc[report_row] = [player.player_name] + values
+            elif manifest.at[i, 'content_hash'] == digest:
+                continue
+            else:
+                report.iloc[report_row, 1:] = values
+
+            manifest.at[i, 'report_row'] = report_row
+            manifest.at[i, 'content_hash'] = digest
+            changed_rows.add(report_row)
+
+        if changed_rows:
+            # Fins de ligne du module csv, comme lors de l'extraction complète
+            _write_csv(report, self.report_path, lineterminator='\r\n')
+            patched = self.patch_cleaned(manifest, changed_rows, players_data)
+            # Reconstruire l'instantané binaire du jeu nettoyé (et donc son empreinte pour les caches de modèles)
+            DataCache(self.cleaned_path).load()
+            print(f"{len(changed_rows)} ligne(s) modifiée(s) dans {self.report_path}, {patched} dans {self.cleaned_path}")
+        else:
+            print("Aucune donnée modifiée.")
+
+        self.save_manifest(manifest)
+        return len(changed_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rafraîchissement incrémental du scouting report et du jeu nettoyé")
+    parser.add_argument('--players', default='data/players_data.csv', help="Fichier des joueurs (nom, poste, URL, équipe)")
+    parser.add_argument('--report', default='data/scouting_report.csv', help="Scouting report brut")
+    parser.add_argument('--cleaned', default='data/cleaned_scouting_report.csv', help="Jeu de données nettoyé")
+    parser.add_argument('--manifest', default=None, help="Manifeste (par défaut : <report>_manifest.csv)")
+    parser.add_argument('--max_age_days', type=float, default=7, help="Âge maximal d'une page avant nouveau téléchargement")
+    parser.add_argument('--workers', type=int, default=4, help="Nombre de téléchargements simultanés")
+    parser.add_argument('--interval', type=float, default=12.0, help="Secondes minimum entre deux requêtes vers un même hôte")
+    parser.add_argument('--cache_dir', default='data/.cache/pages', help="Dossier du cache des pages HTML")
+    parser.add_argument('--base_url', default=None, help="Remplace l'hôte des URL (ex. http://localhost:8000 pour un serveur local)")
+    args = parser.parse_args()
+
+    max_age = timedelta(days=args.max_age_days)
+    # Les pages ne sont retéléchargées que si elles sont périmées : le cache les revalide au-delà de max_age
+    cache = PageCache(args.cache_dir, ttl=max_age.total_seconds())
+    client = HttpClient(min_interval=args.interval, pool_size=args.workers, cache=cache)
+    refresher = IncrementalRefresh(args.players, args.report, args.cleaned, manifest_path=args.manifest, client=client,
+                                   max_age=max_age, workers=args.workers, base_url=args.base_url)
+    try:
+        refresher.refresh()
+    finally:
+        client.close()
+        print(cache.report())
+
+
+if __name__ == "__main__":
+    main()
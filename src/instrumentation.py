@@ -0,0 +1,222 @@
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+
+# Variables d'environnement : fichier JSON lines des exécutions, et captures optionnelles ("cprofile,tracemalloc")
+TRACE_ENV = 'SCOUTING_TRACE'
+PROFILE_ENV = 'SCOUTING_PROFILE'
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+
+class _NullSpan:
+    """Span sans effet, partagé par tous les appels quand l'instrumentation est désactivée."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Étape d'une exécution : durée et champs libres (nombre de lignes, ...)."""
+
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage = {'name': self.name, 'duration_s': round(time.perf_counter() - self.start, 6)}
+        stage.update(self.fields)
+        if exc_type is not None:
+            stage['error'] = exc_type.__name__
+        self.tracer.current_run().stages.append(stage)
+        return False
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+
+class Run(Span):
+    """Exécution complète (une méthode de DataVisualizer, un chargement...) : un enregistrement JSON à la sortie."""
+
+    def __init__(self, tracer, name, fields):
+        super().__init__(tracer, name, fields)
+        self.stages = []
+        self.profiler = None
+        self.traces_memory = False
+
+    def __enter__(self):
+        tracer = self.tracer
+        outermost = not tracer.stack()
+        tracer.stack().append(self)
+        self.started = datetime.now().isoformat(timespec='milliseconds')
+
+        # Une seule capture à la fois : seule l'exécution la plus externe est profilée
+        if outermost and 'cprofile' in tracer.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if outermost and 'tracemalloc' in tracer.profile and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.traces_memory = True
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        record = {'run': self.name, 'started': self.started, 'pid': os.getpid(), 'duration_s': round(duration, 6)}
+        record.update(self.fields)
+        record['stages'] = self.stages
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            record['profile'] = self.tracer.dump_profile(self.profiler, self.name)
+        if self.traces_memory:
+            record['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.tracer.stack().pop()
+        self.tracer.write(record)
+        return False
+
+
+class Tracer:
+    """Écrit une ligne JSON par exécution dans `path`, avec les durées de chaque étape."""
+
+    def __init__(self, path, profile=()):
+        self.path = path
+        self.profile = tuple(profile)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def stack(self):
+        if not hasattr(self.local, 'runs'):
+            self.local.runs = []
+        return self.local.runs
+
+    def current_run(self):
+        runs = self.stack()
+        return runs[-1] if runs else None
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def dump_profile(self, profiler, name):
+        """Enregistre les statistiques cProfile à côté du fichier de traces et renvoie leur chemin."""
+        profile_dir = os.path.join(os.path.dirname(self.path) or '.', 'profiles')
+        os.makedirs(profile_dir, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]+', '_', name)
+        path = os.path.join(profile_dir, f"{safe_name}_{os.getpid()}_{time.time_ns()}.prof")
+        profiler.dump_stats(path)
+        return path
+
+
+# Traceur actif, ou None : tant qu'il vaut None, span() et traced() ne font rien
+_tracer = None
+
+
+def enable(path, profile=()):
+    """Active l'instrumentation (y compris dans les processus enfants, via les variables d'environnement)."""
+    global _tracer
+    unknown = [mode for mode in profile if mode not in PROFILE_MODES]
+    if unknown:
+        raise ValueError(f"Capture inconnue : {', '.join(unknown)}")
+    _tracer = Tracer(path, profile)
+    os.environ[TRACE_ENV] = path
+    os.environ[PROFILE_ENV] = ','.join(profile)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+    os.environ.pop(TRACE_ENV, None)
+    os.environ.pop(PROFILE_ENV, None)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def configure_from_env():
+    """Active l'instrumentation si SCOUTING_TRACE est défini (SCOUTING_PROFILE : 'cprofile', 'tracemalloc' ou les deux)."""
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        profile = [mode.strip() for mode in os.environ.get(PROFILE_ENV, '').split(',') if mode.strip()]
+        enable(path, profile)
+
+
+def run(name, **fields):
+    """Exécution instrumentée : un enregistrement JSON à la sortie du bloc."""
+    if _tracer is None:
+        return NULL_SPAN
+    return Run(_tracer, name, fields)
+
+
+def span(name, **fields):
+    """Étape de l'exécution en cours ; hors de toute exécution, devient une exécution à part entière."""
+    if _tracer is None:
+        return NULL_SPAN
+    if _tracer.current_run() is None:
+        return Run(_tracer, name, fields)
+    return Span(_tracer, name, fields)
+
+
+def annotate(**fields):
+    """Ajoute des champs (taille de figure, ...) à l'exécution en cours."""
+    if _tracer is not None and _tracer.current_run() is not None:
+        _tracer.current_run().fields.update(fields)
+
+
+def traced(name):
+    """Décorateur : chaque appel de la fonction est une exécution instrumentée."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with Run(_tracer, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def spanned(name):
+    """Décorateur : chaque appel est une étape de l'exécution en cours, avec le nombre de lignes renvoyées."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(name) as stage:
+                result = func(*args, **kwargs)
+                if hasattr(result, '__len__'):
+                    stage.set(rows=len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+configure_from_env()
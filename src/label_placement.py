@@ -0,0 +1,63 @@
+import math
+
+
+class LabelPlacer:
+    """Placement des noms sans superposition, avec une grille de hachage au lieu d'un parcours de tous les noms déjà placés.
+
+    Deux formes de voisinage sont possibles :
+    - 'euclidean' : un nom est ignoré s'il est à une distance < x_threshold d'un nom déjà placé ;
+    - 'box' : un nom est ignoré si |dx| < x_threshold et |dy| < y_threshold pour un nom déjà placé.
+    """
+
+    def __init__(self, x_threshold, y_threshold=None, metric='euclidean'):
+        if metric not in ('euclidean', 'box'):
+            raise ValueError(f"Métrique inconnue : {metric}")
+        self.metric = metric
+        self.x_threshold = x_threshold
+        self.y_threshold = x_threshold if y_threshold is None else y_threshold
+        self.cells = {}
+
+    def _cell(self, x, y):
+        # Une cellule a la taille du seuil : seuls les 3x3 cellules voisines peuvent être en conflit
+        return math.floor(x / self.x_threshold), math.floor(y / self.y_threshold)
+
+    def is_free(self, x, y):
+        """Indique si un nom peut être affiché en (x, y) sans chevaucher un nom déjà placé."""
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return True
+
+        cx, cy = self._cell(x, y)
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for px, py in self.cells.get((i, j), ()):
+                    if self.metric == 'euclidean':
+                        if math.hypot(x - px, y - py) < self.x_threshold:
+                            return False
+                    elif abs(x - px) < self.x_threshold and abs(y - py) < self.y_threshold:
+                        return False
+        return True
+
+    def add(self, x, y):
+        """Enregistre un nom placé en (x, y)."""
+        if math.isfinite(x) and math.isfinite(y):
+            self.cells.setdefault(self._cell(x, y), []).append((x, y))
+
+    def candidate_offsets(self):
+        """Décalages proposés autour du point : au-dessus, en dessous, puis de chaque côté."""
+        return ((0, 0), (0, self.y_threshold), (0, -self.y_threshold), (self.x_threshold, 0), (-self.x_threshold, 0))
+
+    def place(self, x, y, candidate_offsets=None):
+        """Place un nom près de (x, y) si possible et renvoie la position retenue, ou None.
+
+        Sans `candidate_offsets`, seule la position (x, y) est testée. Sinon, les décalages
+        (dx, dy) sont essayés dans l'ordre et le premier emplacement libre est retenu.
+        """
+        for dx, dy in candidate_offsets or ((0, 0),):
+            if self.is_free(x + dx, y + dy):
+                self.add(x + dx, y + dy)
+                return x + dx, y + dy
+        return None
+
+    def place_all(self, xs, ys, candidate_offsets=None):
+        """Place une série de noms dans l'ordre et renvoie la position retenue (ou None) pour chacun."""
+        return [self.place(float(x), float(y), candidate_offsets) for x, y in zip(xs, ys)]
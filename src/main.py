@@ -1,16 +1,46 @@
 import argparse
+import os
+import instrumentation
 from data_extractor import DataExtractor
 from data_visualizer import DataVisualizer
+from model_store import ProjectionModelStore
+from similar_players import SimilarPlayersEngine
+from position_groups import POSITION_GROUPS, get_group_key, get_group_label, get_positions_by_choice
+
+def plot_team(data_extractor, team_name):
+    """Visualiser les joueurs d'une équipe (option 1)."""
+    player_data = data_extractor.get_players_by_team(team_name)
+
+    if player_data.empty:
+        print(f"Aucun joueur trouvé pour l'équipe {team_name}.")
+        return
+
+    offensive_features = ['Passes progressives']
+    defensive_features = ['Possessions progressives']
+
+    filtered_features = player_data[offensive_features + defensive_features].dropna()
+    visualizer = DataVisualizer(filtered_features, player_data, color1="#000000", color2="#3b3700")
+    return visualizer.plot_players_by_team(team_name)
 
 def main():
-    # Définir les groupes de positions
-    position_groups = {
-        '1. Milieu': ['DM', 'CM', 'AM'],
-        '2. Attaquant axial': ['CF', 'SS', 'MO'],
-        '3. Ailier': ['LW', 'RW', 'RM', 'LM'],
-        '4. Défenseur': ['CB'],
-        '5. Latéral': ['RB', 'LB'],
-    }
+    parser = argparse.ArgumentParser(description="Visualisation et clustering des joueurs")
+    parser.add_argument('--team_name', help="Visualiser directement les joueurs de cette équipe (option 1)")
+    parser.add_argument('--metric', default='euclidean', choices=['euclidean', 'cosine', 'mahalanobis'],
+                        help="Distance entre joueurs sur toutes les variables du poste (options 2, 3 et 7)")
+    parser.add_argument('--trace', default=None, help="Fichier JSON lines des durées de chaque étape (ou variable SCOUTING_TRACE)")
+    parser.add_argument('--profile', nargs='*', default=[], choices=['cprofile', 'tracemalloc'],
+                        help="Captures supplémentaires avec --trace (ou variable SCOUTING_PROFILE)")
+    args = parser.parse_args()
+
+    if args.trace:
+        instrumentation.enable(args.trace, args.profile)
+
+    # Charger les données
+    file_path = 'data/cleaned_scouting_report.csv'
+
+    if args.team_name:
+        plot_team(DataExtractor(file_path), args.team_name)
+        return
 
     # Choisir la fonction à exécuter
     print("Choisissez une fonction à exécuter :")
@@ -20,39 +50,22 @@ def main():
     print("4. Comparer plusieurs joueurs indépendamment des postes (PCA)")
     print("5. Comparer deux équipes")
     print("6. Visualiser les joueurs par poste")
+    print("7. Exporter la table des joueurs similaires d'un poste")
 
-    choice = input("Entrez le numéro de l'option (1, 2, 3, 4, 5 ou 6) : ")
+    choice = input("Entrez le numéro de l'option (1, 2, 3, 4, 5, 6 ou 7) : ")
 
-    # Charger les données
-    file_path = 'data/cleaned_scouting_report.csv'
     data_extractor = DataExtractor(file_path)
 
-    # Fonction utilitaire pour obtenir les positions en fonction du numéro du groupe
-    def get_positions_by_choice(choice):
-        group_key = f"{choice}. "  # Préfixe pour récupérer le bon groupe dans le dictionnaire
-        for key in position_groups.keys():
-            if key.startswith(group_key):
-                return position_groups[key]
-        return None
+    # Scalers/PCA ajustés conservés sur disque d'une exécution à l'autre
+    model_store = ProjectionModelStore(cache_dir='data/.cache/models')
 
     if choice == '1':
         team_name = input("Entrez le nom de l'équipe : ")
-        player_data = data_extractor.get_players_by_team(team_name)
-
-        if player_data.empty:
-            print(f"Aucun joueur trouvé pour l'équipe {team_name}.")
-            return
-
-        offensive_features = ['Passes progressives']
-        defensive_features = ['Possessions progressives']
-        
-        filtered_features = player_data[offensive_features + defensive_features].dropna()
-        visualizer = DataVisualizer(filtered_features, player_data, color1="#000000", color2="#3b3700")
-        visualizer.plot_players_by_team(team_name)
+        plot_team(data_extractor, team_name)
 
     elif choice == '6':
         print("Choisissez un poste :")
-        for key in position_groups:
+        for key in POSITION_GROUPS:
             print(key)
         
         position_choice = input("Entrez le numéro du poste : ")
@@ -65,7 +78,10 @@ def main():
         team_names_input = input("Entrez les noms des équipes séparés par des virgules (laisser vide pour toutes les équipes) : ")
         team_names = [name.strip() for name in team_names_input.split(',')] if team_names_input else None
     
-        player_data = data_extractor.get_players_by_multiple_criteria(player_names=None, positions=positions, team_names=team_names, ages=None)
+        query = data_extractor.query().position(positions)
+        if team_names:
+            query = query.team(team_names)
+        player_data = query.collect()
     
         if player_data.empty:
             print(f"Aucun joueur trouvé pour le poste choisi avec les équipes spécifiées.")
@@ -76,60 +92,46 @@ def main():
         
         filtered_features = player_data[offensive_features + defensive_features].dropna()
         visualizer = DataVisualizer(filtered_features, player_data, color1="#000000", color2="#3b3700")
-        visualizer.plot_players_by_position(position_choice, team_names=team_names)
+        visualizer.plot_players_by_position(get_group_label(get_group_key(position_choice)), team_names=team_names, positions=positions)
 
     elif choice == '2':
         player_name = input("Entrez le nom du joueur : ")
         print("Choisissez un groupe de poste :")
-        for key in position_groups:
+        for key in POSITION_GROUPS:
             print(key)
 
         position_choice = input("Entrez le numéro du poste : ")
-        positions = get_positions_by_choice(position_choice)
-
-        if not positions:
+        group = data_extractor.feature_store.group_by_choice(position_choice)
+        if group is None:
             print("Poste invalide.")
             return
+        offensive_features, defensive_features = group.offensive_features, group.defensive_features
 
-        if '1' in position_choice: # '1. Milieu': ['DM', 'CM', 'AM']
-            offensive_features = [
-                'Passes décisives', 'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir', 
-                'Passes progressives', 'Possessions progressives'
-            ]
-            defensive_features = ['Tacles', 'Interceptions']
-
-        elif '2' in position_choice: # '2. Attaquant axial': ['CF', 'SS', 'MO']
-            offensive_features = [
-                'Buts (sans les pénaltys)', 'npxG: xG sans les pénaltys', 'Passes décisives', 
-                'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir', 
-                'Total des tirs', 'Passes progressives reçues', 'Touches (SurfRépOff)'
-            ]
-            defensive_features = ['Tacles', 'Interceptions']
-
-        elif '3' in position_choice: # '3. Ailier': ['LW', 'RW', 'RM', 'LM']
-            offensive_features = [
-                'Buts (sans les pénaltys)', 'npxG: xG sans les pénaltys', 'Passes décisives', 
-                'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir', 
-                'Total des tirs', 'Possessions progressives', 'Dribbles réussis',
-                'Passes progressives reçues', 'Touches (SurfRépOff)'
-            ]
-            defensive_features = ['Tacles', 'Interceptions']
-
-        elif '4' in position_choice: # '4. Défenseur': ['CB']
-            offensive_features = ['Passes progressives', 'Possessions progressives']
-            defensive_features = ['Tacles', 'Interceptions', 'Balles contrées', 'Dégagements', 'Duel aérien gagnés']
-
-        elif '5' in position_choice: #  '5. Latéral': ['RB', 'LB']
-            offensive_features = ['Passes progressives', 'Possessions progressives', 'Dribbles réussis', 
-                                  'Actions menant à un tir', 'Total des tirs']
-            defensive_features = ['Tacles', 'Interceptions', 'Balles contrées', 'Dégagements', 'Duel aérien gagnés']
-        else:
-            print("Poste invalide.")
+        # Nom tel qu'écrit dans les données (accents, fautes de frappe, "Nom (Équipe)" pour des homonymes)
+        match = data_extractor.resolve_player_name(player_name)
+        if match is None:
+            suggestions = data_extractor.suggest_player_names(player_name)
+            print(f"Le joueur {player_name} n'a pas été trouvé." + (f" Vouliez-vous dire : {', '.join(suggestions)} ?" if suggestions else ""))
             return
-
-        visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700")
-        visualizer.clustering_player_comparison(player_name, data_extractor.data, offensive_features, defensive_features)
-        
+        if match.ambiguous:
+            print(f"Plusieurs joueurs s'appellent {match.name} : "
+                  f"{', '.join(f'{match.name} ({team})' for team in match.teams)}. Saisissez le nom suivi de l'équipe.")
+            return
+        if match.name != player_name:
+            print(f"« {player_name} » : {match.name}" + (f" ({match.team})" if match.team else ""))
+        player_name, team_name = match.name, match.team
+
+        visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700", model_store=model_store,
+                                    similarity_metric=args.metric, name_index=data_extractor.names)
+        visualizer.clustering_player_comparison(player_name, data_extractor.data, offensive_features, defensive_features, group=group,
+                                                team_name=team_name)
+
+        # Profil du joueur en centiles parmi les joueurs du groupe choisi
+        percentiles = data_extractor.get_player_percentiles(player_name, group_key=group.key, team_name=team_name)
+        if percentiles is not None:
+            print(f"Centiles de {player_name} parmi les joueurs du groupe {get_group_label(group.key)} :")
+            for feature in group.features:
+                print(f"  {feature} : {percentiles[feature]:.0f}e centile")
 
     elif choice == '3':
         player_names_input = input("Entrez les noms des joueurs séparés par des virgules (le premier sera le joueur de référence) : ")
@@ -140,54 +142,26 @@ def main():
             return
 
         print("Choisissez un groupe de poste :")
-        for key in position_groups:
+        for key in POSITION_GROUPS:
             print(key)
 
         position_choice = input("Entrez le numéro du poste : ")
-        positions = get_positions_by_choice(position_choice)
-
-        if not positions:
+        group = data_extractor.feature_store.group_by_choice(position_choice)
+        if group is None:
             print("Poste invalide.")
             return
-
-        if '1' in position_choice: # '1. Milieu': ['DM', 'CM', 'AM']
-            offensive_features = [
-                'Passes décisives', 'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir', 
-                'Passes progressives', 'Possessions progressives'
-            ]
-            defensive_features = ['Tacles', 'Interceptions']
-
-        elif '2' in position_choice: # '2. Attaquant axial': ['CF', 'SS', 'MO']
-            offensive_features = [
-                'Buts (sans les pénaltys)', 'npxG: xG sans les pénaltys', 'Passes décisives', 
-                'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir', 
-                'Total des tirs', 'Passes progressives reçues', 'Touches (SurfRépOff)'
-            ]
-            defensive_features = ['Tacles', 'Interceptions']
-
-        elif '3' in position_choice: # '3. Ailier': ['LW', 'RW', 'RM', 'LM']
-            offensive_features = [
-                'Buts (sans les pénaltys)', 'npxG: xG sans les pénaltys', 'Passes décisives', 
-                'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir', 
-                'Total des tirs', 'Possessions progressives', 'Dribbles réussis',
-                'Passes progressives reçues', 'Touches (SurfRépOff)'
-            ]
-            defensive_features = ['Tacles', 'Interceptions']
-
-        elif '4' in position_choice: # '4. Défenseur': ['CB']
-            offensive_features = ['Passes progressives']
-            defensive_features = ['Tacles', 'Interceptions', 'Balles contrées', 'Dégagements', 'Duel aérien gagnés']
-
-        elif '5' in position_choice: #  '5. Latéral': ['RB', 'LB']
-            offensive_features = ['Passes progressives', 'Possessions progressives', 'Dribbles réussis', 
-                                  'Actions menant à un tir', 'Total des tirs']
-            defensive_features = ['Tacles', 'Interceptions', 'Balles contrées', 'Dégagements', 'Duel aérien gagnés']
-        else:
-            print("Poste invalide.")
-            return
-        
-        visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700")
-        visualizer.clustering_multiple_players_comparison_with_reference(player_names, data_extractor.data, offensive_features, defensive_features)
+        offensive_features, defensive_features = group.offensive_features, group.defensive_features
+
+        visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700", model_store=model_store,
+                                    similarity_metric=args.metric, name_index=data_extractor.names)
+        result = visualizer.clustering_multiple_players_comparison_with_reference(player_names, data_extractor.data, offensive_features,
+                                                                                  defensive_features, group=group)
+        if result is not None:
+            # Matrice des distances entre tous les joueurs comparés, à côté du graphique
+            path, distance_matrix = result
+            matrix_path = os.path.splitext(path)[0] + '_distances.csv'
+            distance_matrix.round(4).to_csv(matrix_path)
+            print(f"Matrice des distances ({len(distance_matrix)} joueurs) sauvegardée dans {matrix_path}")
 
     elif choice == '4':
         player_names_input = input("Entrez les noms des joueurs séparés par des virgules : ")
@@ -205,7 +179,8 @@ def main():
         ]
         defensive_features = ['Tacles', 'Interceptions']
 
-        visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700")
+        visualizer = DataVisualizer(offensive_features, defensive_features, color1="#000000", color2="#3b3700", model_store=model_store,
+                                    name_index=data_extractor.names)
         visualizer.clustering_players_pca_comparison(player_names, data_extractor.data, offensive_features, defensive_features)
 
     elif choice == '5':
@@ -216,11 +191,34 @@ def main():
         reussites = ['Buts (sans les pénaltys)']
         
         filtered_features = data_extractor.data[tentatives + reussites].dropna()
-        visualizer = DataVisualizer(filtered_features, data_extractor.data, color1="#000000", color2="#3b3700")
+        visualizer = DataVisualizer(filtered_features, data_extractor.data, color1="#000000", color2="#3b3700",
+                                    team_aggregates=data_extractor.team_aggregates)
         visualizer.compare_teams(team1_name, team2_name)
 
+        # Totaux des deux équipes, lus dans le cube des agrégats
+        pair = data_extractor.get_team_pair(team1_name, team2_name, columns=tentatives + reussites)
+        if pair is not None:
+            print(pair.round(2).to_string())
+
+    elif choice == '7':
+        print("Choisissez un groupe de poste :")
+        for key in POSITION_GROUPS:
+            print(key)
+
+        position_choice = input("Entrez le numéro du poste : ")
+        group_key = get_group_key(position_choice)
+        if group_key is None:
+            print("Poste invalide.")
+            return
+
+        k_input = input("Nombre de joueurs similaires par joueur (10 par défaut) : ")
+        k = int(k_input) if k_input.strip().isdigit() else 10
+
+        engine = SimilarPlayersEngine(data_extractor, metric=args.metric)
+        engine.export_group(group_key, k=k)
+
     else:
-        print("Option invalide. Veuillez entrer 1, 2, 3, 4, 5 ou 6.")
+        print("Option invalide. Veuillez entrer 1, 2, 3, 4, 5, 6 ou 7.")
 
 if __name__ == "__main__":
     main()
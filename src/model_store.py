@@ -0,0 +1,151 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+
+def dataframe_fingerprint(data):
+    """Empreinte d'un DataFrame : celle du fichier source si connue, sinon un hachage de son contenu."""
+    fingerprint = data.attrs.get('fingerprint')
+    if fingerprint:
+        return fingerprint
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+class ProjectionModel:
+    """Scalers et PCA ajustés pour un groupe de joueurs, avec les coordonnées projetées."""
+
+    def __init__(self, row_labels, scaler_offensive, scaler_defensive, pca_offensive, pca_defensive, coordinates):
+        self.row_labels = row_labels
+        self.scaler_offensive = scaler_offensive
+        self.scaler_defensive = scaler_defensive
+        self.pca_offensive = pca_offensive
+        self.pca_defensive = pca_defensive
+        self.coordinates = coordinates  # Tableau (n, 2) : composante offensive, composante défensive
+
+    @classmethod
+    def fit(cls, players, offensive_features, defensive_features):
+        """Standardise puis réduit chaque groupe de variables à une composante principale."""
+        return cls.fit_arrays(players.index.to_numpy(), players[offensive_features], players[defensive_features])
+
+    @classmethod
+    def fit_arrays(cls, row_labels, offensive_values, defensive_values):
+        """Comme `fit`, à partir des valeurs offensives et défensives (tableaux ou DataFrames)."""
+        scaler_offensive = StandardScaler()
+        scaler_defensive = StandardScaler()
+
+        offensive_scaled = scaler_offensive.fit_transform(offensive_values)
+        defensive_scaled = scaler_defensive.fit_transform(defensive_values)
+
+        pca_offensive = PCA(n_components=1)
+        offensive_component = pca_offensive.fit_transform(offensive_scaled)
+
+        pca_defensive = PCA(n_components=1)
+        defensive_component = pca_defensive.fit_transform(defensive_scaled)
+
+        coordinates = np.column_stack([offensive_component, defensive_component])
+        return cls(row_labels, scaler_offensive, scaler_defensive, pca_offensive, pca_defensive, coordinates)
+
+
+class ProjectionModelStore:
+    """Cache LRU des modèles de projection, indexé par empreinte des données, groupe de joueurs et variables."""
+
+    def __init__(self, max_entries=32, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.models = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(fingerprint, group, offensive_features, defensive_features):
+        return (fingerprint, tuple(sorted(group)), tuple(offensive_features), tuple(defensive_features))
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.pkl')
+
+    def _load_from_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                stored_key, model = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return model if stored_key == key else None
+
+    def _save_to_disk(self, key, model):
+        """Écrit le modèle via un fichier temporaire propre à cet appel ; un échec d'écriture est signalé sans être fatal.
+
+        Plusieurs processus qui ajustent le même groupe n'écrivent jamais dans le même fichier temporaire.
+        """
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile('wb', dir=self.cache_dir, prefix=os.path.basename(path) + '.',
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                pickle.dump((key, model), f)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            print(f"Modèle non enregistré dans {self.cache_dir} : {err}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remember(self, key, model):
+        self.models[key] = model
+        self.models.move_to_end(key)
+        while len(self.models) > self.max_entries:
+            self.models.popitem(last=False)
+
+    def _get_or_fit(self, key, row_labels, fit):
+        model = self.models.get(key)
+        if model is None:
+            model = self._load_from_disk(key)
+
+        # Sécurité : le modèle doit correspondre exactement aux lignes fournies
+        if model is not None and np.array_equal(model.row_labels, row_labels):
+            self.hits += 1
+            self._remember(key, model)
+            return model
+
+        self.misses += 1
+        model = fit()
+        self._remember(key, model)
+        self._save_to_disk(key, model)
+        return model
+
+    def get_or_fit(self, fingerprint, group, players, offensive_features, defensive_features):
+        """Renvoie le modèle mémorisé pour ce groupe, ou l'ajuste et le mémorise."""
+        key = self.make_key(fingerprint, group, offensive_features, defensive_features)
+        return self._get_or_fit(key, players.index.to_numpy(),
+                                lambda: ProjectionModel.fit(players, offensive_features, defensive_features))
+
+    def get_or_fit_group(self, fingerprint, group_features):
+        """Comme `get_or_fit`, pour la matrice d'un groupe du magasin de variables (FeatureStore)."""
+        key = self.make_key(fingerprint, group_features.positions, group_features.offensive_features,
+                            group_features.defensive_features)
+        return self._get_or_fit(key, group_features.row_labels,
+                                lambda: ProjectionModel.fit_arrays(group_features.row_labels, group_features.offensive,
+                                                                   group_features.defensive))
+
+    def clear(self):
+        self.models.clear()
+
+
+# Cache partagé par défaut entre toutes les instances de DataVisualizer d'un même processus
+default_model_store = ProjectionModelStore()
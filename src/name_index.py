@@ -0,0 +1,249 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Nom suivi de l'équipe entre parenthèses pour départager des homonymes : "Walid Cheddira (Espanyol)"
+TEAM_SUFFIX = re.compile(r'^(?P<name>.*?)\s*\((?P<team>[^()]*)\)\s*$')
+
+# Fautes de frappe tolérées par resolve() : au-delà, un autre joueur serait proposé à la place ("Rodri" / "Pedri")
+MAX_EDITS_SHORT = 1
+MAX_EDITS_LONG = 2
+LONG_NAME = 10
+
+
+def normalize_name(name):
+    """Clé de comparaison d'un nom : sans accents, en minuscules, ponctuation et espaces multiples retirés."""
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w]+', ' ', without_accents.casefold()).split())
+
+
+def allowed_edits(key):
+    """Nombre de caractères pouvant différer entre une saisie et le nom retenu, selon la longueur de la saisie."""
+    return MAX_EDITS_LONG if len(key) >= LONG_NAME else MAX_EDITS_SHORT
+
+
+def trigrams(key):
+    """Trigrammes d'une clé, avec un bord pour que les débuts et fins de nom comptent."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    """Distance de Levenshtein, calculée colonne par colonne sur des entiers (algorithme bit-parallèle de Myers)."""
+    if not a:
+        return len(b)
+    # Pour chaque caractère, masque des positions où il apparaît dans `a`
+    masks = {}
+    for i, char in enumerate(a):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    plus, minus, distance = full, 0, len(a)
+    for char in b:
+        equal = masks.get(char, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+        horizontal_plus = minus | (~(horizontal | plus) & full)
+        horizontal_minus = plus & horizontal
+        if horizontal_plus & last:
+            distance += 1
+        elif horizontal_minus & last:
+            distance -= 1
+        horizontal_plus = ((horizontal_plus << 1) | 1) & full
+        horizontal_minus = (horizontal_minus << 1) & full
+        plus = horizontal_minus | (~(vertical | horizontal_plus) & full)
+        minus = horizontal_plus & vertical
+    return distance
+
+
+class NameMatch:
+    """Résultat d'une recherche : nom tel qu'écrit dans les données, lignes correspondantes et score (1 = exact).
+
+    `exact` est vrai si la saisie ne diffère du nom que par les accents, la casse ou la ponctuation.
+    `teams` liste les équipes des lignes retenues, dans l'ordre des données.
+    """
+
+    def __init__(self, name, rows, score, team=None, exact=True, teams=()):
+        self.name = name
+        self.rows = rows
+        self.score = score
+        self.team = team
+        self.exact = exact
+        self.teams = list(teams)
+
+    @property
+    def ambiguous(self):
+        """Vrai si le nom désigne des joueurs de plusieurs équipes et qu'aucune équipe n'a été donnée."""
+        return self.team is None and len(self.teams) > 1
+
+    def __repr__(self):
+        return f"NameMatch({self.name!r}, rows={self.rows.tolist()}, score={self.score:.2f}, team={self.team!r})"
+
+
+class NameIndex:
+    """Index des noms de joueurs, tolérant aux accents et aux fautes de frappe.
+
+    Les noms sont ramenés à une clé normalisée (sans accents ni casse) ; une clé identique est trouvée
+    par un accès au dictionnaire. Sinon, un index inversé de trigrammes (construit à la première recherche
+    approchée) compte en une opération vectorisée les trigrammes communs avec chaque clé (coefficient
+    de Dice), puis les meilleurs candidats sont départagés par distance d'édition. Les homonymes sont
+    départagés par l'équipe.
+    """
+
+    def __init__(self, names, teams=None, min_score=0.5):
+        self.min_score = min_score
+        names = pd.Series(np.asarray(names, dtype=object))
+        self.names = names.to_numpy(dtype=object)
+        self.teams = None if teams is None else np.asarray(teams, dtype=object)
+        self.team_keys = None
+        if teams is not None:
+            # Une normalisation par équipe distincte, pas par ligne
+            team_codes, team_names = pd.factorize(pd.Series(self.teams))
+            team_keys = np.array([normalize_name(team) for team in team_names] + [''], dtype=object)
+            self.team_keys = team_keys[team_codes]
+
+        # Clé normalisée -> lignes des données (une normalisation par nom distinct)
+        name_codes, unique_names = pd.factorize(names)
+        unique_keys = pd.Series([normalize_name(name) for name in unique_names], dtype=object)
+        # Des noms distincts peuvent avoir la même clé ("Mbappé" / "Mbappe")
+        unique_key_codes, keys = pd.factorize(unique_keys)
+        self.keys = np.asarray(keys, dtype=object)
+        valid_rows = np.flatnonzero(name_codes >= 0)
+        key_codes = unique_key_codes[name_codes[valid_rows]]
+        order = np.argsort(key_codes, kind='stable')
+        self._row_order = valid_rows[order]
+        self._row_bounds = np.searchsorted(key_codes[order], np.arange(len(self.keys) + 1))
+        self.key_ids = dict(zip(self.keys, range(len(self.keys))))
+
+        # Index des trigrammes, construit à la première recherche approchée
+        self._postings = None
+        self._trigram_counts = None
+
+    def key_rows(self, key_id):
+        """Lignes des données dont le nom a la clé `key_id`."""
+        return self._row_order[self._row_bounds[key_id]:self._row_bounds[key_id + 1]]
+
+    def _build_trigrams(self):
+        """Trigramme -> identifiants des clés qui le contiennent."""
+        postings = {}
+        self._trigram_counts = np.empty(len(self.keys), dtype=np.int32)
+        for key_id, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self._trigram_counts[key_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(key_id)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    @property
+    def postings(self):
+        if self._postings is None:
+            self._build_trigrams()
+        return self._postings
+
+    @property
+    def trigram_counts(self):
+        if self._trigram_counts is None:
+            self._build_trigrams()
+        return self._trigram_counts
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, query, limit=5, min_score=None):
+        """Identifiants des clés les plus proches de `query` et leur score, du meilleur au moins bon."""
+        min_score = self.min_score if min_score is None else min_score
+        key = normalize_name(query)
+        if key in self.key_ids:
+            return [(self.key_ids[key], 1.0)]
+
+        grams = trigrams(key)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return []
+        common = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+        scores = 2 * common / (len(grams) + self.trigram_counts)
+
+        eligible = np.flatnonzero(scores >= min_score)
+        if not len(eligible):
+            return []
+        best = eligible[np.argsort(-scores[eligible], kind='stable')[:max(limit, 10)]]
+        # Départager les candidats proches par distance d'édition relative
+        ranked = sorted(best, key=lambda key_id: (-scores[key_id] + edit_distance(key, self.keys[key_id]) / max(len(key), 1), key_id))
+        return [(int(key_id), float(scores[key_id])) for key_id in ranked[:limit]]
+
+    def _team_rows(self, rows, team_name):
+        """Lignes dont l'équipe correspond à `team_name` (sans accents ni casse, nom partiel accepté)."""
+        if team_name is None or self.team_keys is None:
+            return rows
+        team_key = normalize_name(team_name)
+        teams = self.team_keys[rows]
+        exact = rows[teams == team_key]
+        if len(exact):
+            return exact
+        return rows[np.array([team_key in team for team in teams], dtype=bool)]
+
+    def search(self, query, limit=5, min_score=None):
+        """Joueurs les plus proches de `query` (un résultat par nom)."""
+        return [NameMatch(self.names[self.key_rows(key_id)[0]], self.key_rows(key_id), score)
+                for key_id, score in self.candidates(query, limit=limit, min_score=min_score)]
+
+    def _split_team(self, query, team_name):
+        query = str(query).strip()
+        suffix = TEAM_SUFFIX.match(query)
+        if suffix and team_name is None:
+            query, team_name = suffix.group('name'), suffix.group('team').strip()
+        return query, team_name
+
+    def _match(self, key_id, score, team_name, exact):
+        rows = self._team_rows(self.key_rows(key_id), team_name)
+        if not len(rows):
+            return None
+        team = self.teams[rows[0]] if team_name is not None and self.teams is not None else None
+        teams = pd.unique(pd.Series(self.teams[rows]).dropna()) if self.teams is not None else ()
+        return NameMatch(self.names[rows[0]], rows, score, team, exact, teams)
+
+    def exact(self, query, team_name=None):
+        """Joueur dont le nom est celui de `query` aux accents, à la casse et à la ponctuation près, ou None."""
+        if query is None:
+            return None
+        query, team_name = self._split_team(query, team_name)
+        key_id = self.key_ids.get(normalize_name(query))
+        return None if key_id is None else self._match(key_id, 1.0, team_name, True)
+
+    def resolve(self, query, team_name=None, min_score=None):
+        """Joueur correspondant à `query`, ou None. L'équipe peut être donnée à part ou en suffixe "Nom (Équipe)".
+
+        Sans nom identique aux accents près, seul un nom à une ou deux fautes de frappe près est retenu
+        (`allowed_edits`) : un nom absent des données ne renvoie jamais un autre joueur.
+        """
+        if query is None:
+            return None
+        match = self.exact(query, team_name)
+        if match is not None:
+            return match
+
+        query, team_name = self._split_team(query, team_name)
+        key = normalize_name(query)
+        for key_id, score in self.candidates(query, limit=5, min_score=min_score):
+            if edit_distance(key, self.keys[key_id]) > allowed_edits(key):
+                continue
+            match = self._match(key_id, score, team_name, False)
+            if match is not None:
+                return match
+        return None
+
+    def resolve_surname(self, query):
+        """Joueur dont le nom de famille est `query` ("Griezmann"), s'il est le seul à le porter ; sinon None."""
+        key = normalize_name(query)
+        key_ids = [key_id for key_id, name in enumerate(self.keys) if name == key or name.endswith(' ' + key)]
+        if len(key_ids) != 1:
+            return None
+        return self._match(key_ids[0], 1.0, None, self.keys[key_ids[0]] == key)
+
+    def rows(self, query, team_name=None):
+        """Lignes du joueur de nom `query` aux accents et à la casse près (vide sinon)."""
+        match = self.exact(query, team_name=team_name)
+        return match.rows if match is not None else np.array([], dtype=np.intp)
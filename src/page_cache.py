@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class PageCache:
+    """Cache disque des pages HTML téléchargées : contenu compressé indexé par URL, avec durée de validité.
+
+    Chaque page occupe deux fichiers dans `cache_dir` : `<sha1(url)>.html.gz` (contenu) et
+    `<sha1(url)>.json` (URL, ETag, Last-Modified, date de téléchargement, taille). Une page expirée
+    n'est pas supprimée : ses validateurs servent à une requête conditionnelle (réponse 304).
+    """
+
+    def __init__(self, cache_dir='data/.cache/pages', ttl=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl  # En secondes ; None = jamais expirée
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return base + '.html.gz', base + '.json'
+
+    def _write_atomic(self, path, write, mode='w'):
+        """Écrit `path` via un fichier temporaire propre à cet appel, puis le met en place d'un coup.
+
+        Deux téléchargements simultanés de la même page n'écrivent jamais dans le même fichier temporaire.
+        """
+        encoding = None if 'b' in mode else 'utf-8'
+        with tempfile.NamedTemporaryFile(mode, encoding=encoding, dir=self.cache_dir, prefix=os.path.basename(path) + '.',
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            try:
+                write(f)
+            except BaseException:
+                f.close()
+                os.remove(tmp_path)
+                raise
+        os.replace(tmp_path, path)
+
+    def lookup(self, url):
+        """Métadonnées de la page en cache (avec la clé 'fresh'), ou None si absente."""
+        body_path, meta_path = self._paths(url)
+        if not (os.path.isfile(body_path) and os.path.isfile(meta_path)):
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        meta['fresh'] = self.ttl is None or time.time() - meta['fetched_at'] < self.ttl
+        return meta
+
+    def read(self, url):
+        body_path, _ = self._paths(url)
+        with gzip.open(body_path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def conditional_headers(self, meta):
+        """En-têtes If-None-Match / If-Modified-Since pour revalider une page expirée."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, html, etag=None, last_modified=None):
+        """Enregistre une page ; les métadonnées sont écrites en dernier, ce qui valide l'entrée."""
+        body_path, meta_path = self._paths(url)
+
+        def write_body(f):
+            with gzip.open(f, 'wt', encoding='utf-8') as body:
+                body.write(html)
+        self._write_atomic(body_path, write_body, 'wb')
+
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'size': len(html.encode('utf-8')),
+        }
+        self._write_atomic(meta_path, lambda f: json.dump(meta, f))
+
+    def touch(self, url, meta):
+        """Prolonge la validité d'une page confirmée inchangée par le serveur (réponse 304)."""
+        _, meta_path = self._paths(url)
+        meta = {key: value for key, value in meta.items() if key != 'fresh'}
+        meta['fetched_at'] = time.time()
+        self._write_atomic(meta_path, lambda f: json.dump(meta, f))
+
+    def record(self, outcome, size=0):
+        """Comptabilise un accès : 'hit' (aucune requête), 'revalidated' (304) ou 'miss' (page téléchargée)."""
+        with self.lock:
+            if outcome == 'hit':
+                self.hits += 1
+                self.bytes_saved += size
+            elif outcome == 'revalidated':
+                self.revalidated += 1
+                self.bytes_saved += size
+            else:
+                self.misses += 1
+
+    def report(self):
+        """Résumé des accès au cache depuis sa création."""
+        total = self.hits + self.revalidated + self.misses
+        return (f"Cache des pages : {self.hits} hit(s), {self.revalidated} revalidation(s) 304, "
+                f"{self.misses} miss sur {total} accès ; {self.bytes_saved / 1024:.1f} Ko non téléchargés")
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from position_groups import POSITION_GROUPS, get_group_by_position
+
+
+class PercentileRanks:
+    """Rangs centiles de chaque variable numérique, par groupe de postes, calculés une fois au chargement.
+
+    Le centile d'un joueur est la part des joueurs de son groupe ayant une valeur inférieure ou égale
+    à la sienne (0-100) ; une valeur manquante reste NaN. Chaque groupe a son tableau float32
+    (joueurs du groupe x variables) et `local_rows` donne, pour chaque ligne des données, sa ligne
+    dans ce tableau (-1 hors du groupe) : la lecture pour un joueur ou une équipe est un accès direct.
+    """
+
+    def __init__(self, data, index, groups=None, dtype=np.float32):
+        self.data = data
+        self.index = index
+        self.groups = groups if groups is not None else POSITION_GROUPS
+        self.dtype = dtype
+        self.group_keys = list(self.groups)
+        self.group_ids = {key: i for i, key in enumerate(self.group_keys)}
+        self.columns = data.select_dtypes(include='number').columns.tolist()
+        self.column_ids = {column: i for i, column in enumerate(self.columns)}
+
+        values = data[self.columns]
+        self.ranks = []
+        self.local_rows = np.full((len(self.group_keys), len(data)), -1, dtype=np.int32)
+        for group_id, key in enumerate(self.group_keys):
+            rows = index.rows_by_position(list(self.groups[key]))
+            # Rang 'max' : les ex aequo reçoivent tous le centile le plus haut, NaN ignorés colonne par colonne
+            self.ranks.append(values.iloc[rows].rank(method='max', pct=True).to_numpy(dtype=dtype) * dtype(100))
+            self.local_rows[group_id, rows] = np.arange(len(rows))
+
+        # Groupe par défaut de chaque ligne : le premier groupe contenant son poste (-1 si aucun)
+        positions = pd.Series(data['Position'].to_numpy(dtype=object))
+        default_groups = {position: self.group_ids.get(get_group_by_position(position), -1)
+                          for position in positions.dropna().unique()}
+        self.default_group = positions.map(default_groups).fillna(-1).to_numpy(dtype=np.intp)
+
+    def _lookup(self, group_id, rows):
+        """Centiles (lignes x variables) des lignes `rows` dans le groupe ; NaN pour les joueurs hors du groupe."""
+        local = self.local_rows[group_id, rows]
+        ranks = self.ranks[group_id][np.maximum(local, 0)]
+        ranks[local < 0] = np.nan
+        return ranks
+
+    def player(self, player_name, group_key=None, team_name=None):
+        """Centiles d'un joueur (Series par variable), ou None s'il est introuvable ou hors du groupe.
+
+        `team_name` départage les homonymes ; sans groupe, celui de son poste est utilisé.
+        """
+        rows = self.index.rows_by_name(player_name)
+        if team_name is not None:
+            rows = rows[self.data['Team Name'].to_numpy(dtype=object)[rows] == team_name]
+        if not len(rows):
+            return None
+        row = int(rows[0])
+        group_id = self.group_ids[group_key] if group_key is not None else self.default_group[row]
+        if group_id < 0 or self.local_rows[group_id, row] < 0:
+            return None
+        return pd.Series(self.ranks[group_id][self.local_rows[group_id, row]], index=self.columns,
+                         name=self.data['player_name'].iat[row])
+
+    def team(self, team_name, group_key=None):
+        """Centiles des joueurs d'une équipe : parmi `group_key`, ou parmi le groupe du poste de chacun."""
+        rows = self.index.rows_by_team(team_name)
+        if group_key is not None:
+            group_ids = np.full(len(rows), self.group_ids[group_key], dtype=np.intp)
+        else:
+            group_ids = self.default_group[rows]
+        local = np.where(group_ids >= 0, self.local_rows[np.maximum(group_ids, 0), rows], -1)
+        rows, group_ids, local = rows[local >= 0], group_ids[local >= 0], local[local >= 0]
+
+        ranks = np.empty((len(rows), len(self.columns)), dtype=self.dtype)
+        for group_id in np.unique(group_ids):
+            selected = group_ids == group_id
+            ranks[selected] = self.ranks[group_id][local[selected]]
+
+        frame = pd.DataFrame(ranks, index=self.data.index[rows], columns=self.columns)
+        frame.insert(0, 'player_name', self.data['player_name'].to_numpy(dtype=object)[rows])
+        frame.insert(1, 'Groupe', [self.group_keys[group_id] for group_id in group_ids])
+        return frame
+
+    def group_ranks(self, group_key, rows, columns=None):
+        """Centiles (lignes x variables) pour des positions de lignes des données, ex. `GroupFeatures.rows`."""
+        ranks = self._lookup(self.group_ids[group_key], rows)
+        if columns is None:
+            return ranks
+        return ranks[:, [self.column_ids[column] for column in columns]]
+
+    def nbytes(self):
+        return sum(ranks.nbytes for ranks in self.ranks) + self.local_rows.nbytes
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+EMPTY_ROWS = np.array([], dtype=np.intp)
+
+
+def build_hash_index(values, rows=None):
+    """Construit un index valeur -> positions des lignes contenant cette valeur."""
+    values = np.asarray(values, dtype=object)
+    rows = np.arange(len(values)) if rows is None else np.asarray(rows)
+    valid = pd.notna(values)
+    values, rows = values[valid], rows[valid]
+    groups = pd.Series(rows).groupby(values).indices
+    return {key: rows[positions] for key, positions in groups.items()}
+
+
+def union_rows(row_arrays):
+    """Union triée de plusieurs listes de positions."""
+    row_arrays = [rows for rows in row_arrays if len(rows)]
+    if not row_arrays:
+        return EMPTY_ROWS
+    if len(row_arrays) == 1:
+        return row_arrays[0]
+    return np.unique(np.concatenate(row_arrays))
+
+
+def intersect_rows(row_arrays):
+    """Intersection de plusieurs listes de positions, en partant de la plus courte."""
+    row_arrays = sorted(row_arrays, key=len)
+    result = row_arrays[0]
+    for rows in row_arrays[1:]:
+        if not len(result):
+            break
+        result = np.intersect1d(result, rows, assume_unique=True)
+    return result
+
+
+def age_value(age):
+    """Âge d'une requête sous forme de nombre ("25" -> 25.0), comme la colonne 'Age' ; ValueError sinon."""
+    try:
+        return float(age)
+    except (TypeError, ValueError):
+        raise ValueError(f"Âge invalide : {age!r}") from None
+
+
+class PlayerIndex:
+    """Index inversés construits une fois au chargement : postes, équipes, noms et âges."""
+
+    def __init__(self, data):
+        self.size = len(data)
+
+        # Index de hachage sur les valeurs exactes
+        self.name_index = build_hash_index(data['player_name'])
+        self.team_index = build_hash_index(data['Team Name'])
+        self.position_index = build_hash_index(data['Position'])
+
+        # Listes de postings par poste élémentaire ("CM,DM" -> "CM" et "DM")
+        positions = pd.Series(data['Position'].to_numpy(dtype=object)).dropna().astype(str)
+        tokens = positions.str.split(',').explode().str.strip()
+        tokens = tokens[tokens != '']
+        self.position_token_index = {
+            token: np.unique(rows) for token, rows in build_hash_index(tokens.to_numpy(), tokens.index.to_numpy()).items()
+        }
+
+        # Tableau trié des âges pour les requêtes par intervalle
+        ages = pd.to_numeric(data['Age'], errors='coerce').to_numpy(dtype=float)
+        valid_rows = np.flatnonzero(~np.isnan(ages))
+        order = np.argsort(ages[valid_rows], kind='stable')
+        self.sorted_ages = ages[valid_rows][order]
+        self.age_rows = valid_rows[order]
+
+    def _lookup(self, index, keys):
+        if isinstance(keys, list):
+            return union_rows([index.get(key, EMPTY_ROWS) for key in keys])
+        return index.get(keys, EMPTY_ROWS)
+
+    def rows_by_name(self, player_names):
+        """Positions des joueurs par nom exact (unique ou multiple)."""
+        return self._lookup(self.name_index, player_names)
+
+    def rows_by_team(self, team_names):
+        """Positions des joueurs par équipe (unique ou multiple)."""
+        return self._lookup(self.team_index, team_names)
+
+    def rows_by_position(self, positions):
+        """Positions des joueurs par poste : valeur exacte si unique, postes élémentaires si liste."""
+        if isinstance(positions, list):
+            return self._lookup(self.position_token_index, positions)
+        return self._lookup(self.position_index, positions)
+
+    def rows_by_age_range(self, min_age=None, max_age=None):
+        """Positions des joueurs dont l'âge est compris dans [min_age, max_age] (bornes incluses)."""
+        start = 0 if min_age is None else np.searchsorted(self.sorted_ages, age_value(min_age), side='left')
+        end = len(self.sorted_ages) if max_age is None else np.searchsorted(self.sorted_ages, age_value(max_age), side='right')
+        return np.sort(self.age_rows[start:end])
+
+    def rows_by_age(self, ages):
+        """Positions des joueurs par âge (unique ou multiple)."""
+        if isinstance(ages, list):
+            return union_rows([self.rows_by_age_range(age, age) for age in ages])
+        return self.rows_by_age_range(ages, ages)
+
@@ -0,0 +1,141 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from player_index import intersect_rows
+
+# Opérateurs acceptés par PlayerQuery.where
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+class ColumnStatistics:
+    """Statistiques de colonnes (valeurs triées, fréquences) calculées à la demande pour estimer la sélectivité."""
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        self._sorted_values = {}
+        self._value_counts = {}
+
+    def sorted_values(self, column):
+        if column not in self._sorted_values:
+            values = pd.to_numeric(self.data[column], errors='coerce').to_numpy(dtype=float)
+            self._sorted_values[column] = np.sort(values[~np.isnan(values)])
+        return self._sorted_values[column]
+
+    def value_counts(self, column):
+        if column not in self._value_counts:
+            self._value_counts[column] = self.data[column].value_counts(dropna=True)
+        return self._value_counts[column]
+
+    def estimate_matches(self, column, op, value):
+        """Estime le nombre de lignes satisfaisant `column op value`."""
+        if self.data[column].dtype.kind not in 'biuf':
+            count = int(self.value_counts(column).get(value, 0))
+            return count if op == '==' else self.size - count
+
+        values = self.sorted_values(column)
+        left = np.searchsorted(values, value, side='left')
+        right = np.searchsorted(values, value, side='right')
+        return {
+            '>': len(values) - right,
+            '>=': len(values) - left,
+            '<': left,
+            '<=': right,
+            '==': right - left,
+            '!=': self.size - (right - left),
+        }[op]
+
+
+class PlayerQuery:
+    """Requête paresseuse : les critères sont collectés puis exécutés en une seule passe par collect()."""
+
+    def __init__(self, extractor, predicates=()):
+        self.extractor = extractor
+        self.predicates = tuple(predicates)
+
+    def _with(self, kind, *args):
+        return PlayerQuery(self.extractor, self.predicates + ((kind,) + args,))
+
+    def name(self, player_names):
+        """Filtrer par nom exact (unique ou multiple)."""
+        return self._with('index', self.extractor.index.rows_by_name, player_names)
+
+    def position(self, positions):
+        """Filtrer par poste (valeur exacte si unique, postes élémentaires si liste)."""
+        return self._with('index', self.extractor.index.rows_by_position, positions)
+
+    def team(self, team_names):
+        """Filtrer par équipe (unique ou multiple)."""
+        return self._with('index', self.extractor.index.rows_by_team, team_names)
+
+    def age(self, ages):
+        """Filtrer par âge (unique ou multiple)."""
+        return self._with('index', self.extractor.index.rows_by_age, ages)
+
+    def age_between(self, min_age=None, max_age=None):
+        """Filtrer les joueurs dont l'âge est compris entre min_age et max_age (inclus)."""
+        return self._with('index', lambda bounds: self.extractor.index.rows_by_age_range(*bounds), (min_age, max_age))
+
+    def where(self, column, op, value):
+        """Filtrer sur une colonne quelconque, par exemple where('Tacles', '>', 2)."""
+        if op not in OPERATORS:
+            raise ValueError(f"Opérateur inconnu : {op}. Opérateurs acceptés : {', '.join(OPERATORS)}")
+        if column not in self.extractor.data.columns:
+            raise KeyError(f"Colonne inconnue : {column}")
+        return self._with('where', column, op, value)
+
+    def _plan(self):
+        """Résout les critères indexés et ordonne l'ensemble du plus sélectif au moins sélectif."""
+        statistics = self.extractor.statistics
+        steps = []
+        for predicate in self.predicates:
+            if predicate[0] == 'index':
+                rows = predicate[1](predicate[2])
+                steps.append((len(rows), 'index', rows))
+            else:
+                _, column, op, value = predicate
+                steps.append((statistics.estimate_matches(column, op, value), 'where', (column, op, value)))
+        return sorted(steps, key=lambda step: step[0])
+
+    def rows(self):
+        """Exécute la requête et renvoie les positions des lignes retenues (triées)."""
+        data = self.extractor.data
+        plan = self._plan()
+        if not plan:
+            return np.arange(len(data))
+
+        # Les listes de l'index sont intersectées d'abord, puis les filtres de colonnes
+        # ne sont évalués que sur les lignes candidates restantes
+        index_rows = [payload for _, kind, payload in plan if kind == 'index']
+        candidates = intersect_rows(index_rows) if index_rows else None
+
+        for _, kind, payload in plan:
+            if kind != 'where':
+                continue
+            column, op, value = payload
+            values = data[column].to_numpy()
+            if candidates is None:
+                candidates = np.flatnonzero(OPERATORS[op](values, value))
+            else:
+                candidates = candidates[OPERATORS[op](values[candidates], value)]
+            if not len(candidates):
+                break
+
+        return candidates
+
+    def collect(self):
+        """Exécute la requête et renvoie le DataFrame filtré."""
+        return self.extractor.data.iloc[self.rows()]
+
+    def count(self):
+        """Nombre de joueurs correspondant à la requête."""
+        return len(self.rows())
@@ -0,0 +1,81 @@
+# Configuration déclarative de chaque groupe : postes élémentaires et variables offensives/défensives
+# utilisées pour le clustering, la PCA et la similarité (source unique pour tous les écrans)
+FEATURE_GROUPS = {
+    '1. Milieu': {
+        'positions': ['DM', 'CM', 'AM'],
+        'offensive': [
+            'Passes décisives', 'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir',
+            'Passes progressives', 'Possessions progressives'
+        ],
+        'defensive': ['Tacles', 'Interceptions'],
+    },
+    '2. Attaquant axial': {
+        'positions': ['CF', 'SS', 'MO'],
+        'offensive': [
+            'Buts (sans les pénaltys)', 'npxG: xG sans les pénaltys', 'Passes décisives',
+            'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir',
+            'Total des tirs', 'Passes progressives reçues', 'Touches (SurfRépOff)'
+        ],
+        'defensive': ['Tacles', 'Interceptions'],
+    },
+    '3. Ailier': {
+        'positions': ['LW', 'RW', 'RM', 'LM'],
+        'offensive': [
+            'Buts (sans les pénaltys)', 'npxG: xG sans les pénaltys', 'Passes décisives',
+            'xAG: Prévu(s) Buts assistés', 'npxG + xAG', 'Actions menant à un tir',
+            'Total des tirs', 'Possessions progressives', 'Dribbles réussis',
+            'Passes progressives reçues', 'Touches (SurfRépOff)'
+        ],
+        'defensive': ['Tacles', 'Interceptions'],
+    },
+    '4. Défenseur': {
+        'positions': ['CB'],
+        'offensive': ['Passes progressives', 'Possessions progressives'],
+        'defensive': ['Tacles', 'Interceptions', 'Balles contrées', 'Dégagements', 'Duel aérien gagnés'],
+    },
+    '5. Latéral': {
+        'positions': ['RB', 'LB'],
+        'offensive': ['Passes progressives', 'Possessions progressives', 'Dribbles réussis',
+                      'Actions menant à un tir', 'Total des tirs'],
+        'defensive': ['Tacles', 'Interceptions', 'Balles contrées', 'Dégagements', 'Duel aérien gagnés'],
+    },
+}
+
+# Vues dérivées de la configuration
+POSITION_GROUPS = {key: config['positions'] for key, config in FEATURE_GROUPS.items()}
+GROUP_FEATURES = {key: (config['offensive'], config['defensive']) for key, config in FEATURE_GROUPS.items()}
+
+
+def get_group_key(choice):
+    """Clé du groupe ('1. Milieu', ...) correspondant au numéro saisi, ou None."""
+    group_key = f"{choice.strip()}. "  # Préfixe pour récupérer le bon groupe dans le dictionnaire
+    for key in POSITION_GROUPS:
+        if key.startswith(group_key):
+            return key
+    return None
+
+
+def get_positions_by_choice(choice):
+    """Postes du groupe correspondant au numéro saisi, ou None."""
+    key = get_group_key(choice)
+    return POSITION_GROUPS[key] if key else None
+
+
+def get_features_by_choice(choice):
+    """Variables (offensives, défensives) du groupe correspondant au numéro saisi, ou None."""
+    key = get_group_key(choice)
+    return GROUP_FEATURES[key] if key else None
+
+
+def get_group_by_position(position):
+    """Clé du premier groupe contenant l'un des postes élémentaires de `position` ("CM" ou "CM,DM")."""
+    tokens = [token.strip() for token in str(position).split(',')]
+    for key, positions in POSITION_GROUPS.items():
+        if any(token in positions for token in tokens):
+            return key
+    return None
+
+
+def get_group_label(key):
+    """Libellé d'un groupe sans son numéro ('1. Milieu' -> 'Milieu')."""
+    return key.split('. ', 1)[1]
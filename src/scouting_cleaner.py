@@ -0,0 +1,85 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Une valeur valide est un nombre, éventuellement négatif, décimal ou en pourcentage (ex: "86.3%", "-2.8")
+VALUE_PATTERN = r'-?\d+(\.\d+)?%?'
+
+
+class ScoutingReportCleaner:
+    def __init__(self, file_path, players_data_path):
+        """Initialise la classe avec le chemin du fichier CSV et le fichier des joueurs."""
+        self.file_path = file_path
+        self.players_data_path = players_data_path
+
+    @staticmethod
+    def valid_rows_mask(data):
+        """Lignes dont chaque colonne après le nom est un nombre ou un pourcentage, validées colonne par colonne."""
+        mask = np.ones(len(data), dtype=bool)
+        for column in data.columns[1:]:
+            # astype(str) donne la même représentation que str(val) ("nan" pour une valeur manquante)
+            mask &= data[column].astype(str).str.fullmatch(VALUE_PATTERN).to_numpy(dtype=bool)
+        return mask
+
+    @staticmethod
+    def merge_homonyms(data, players_data):
+        """Associe la i-ème ligne d'un nom dans le rapport à la i-ème ligne de ce nom dans players_data.
+
+        Les lignes sont regroupées par nom, dans l'ordre de première apparition, puis dans leur ordre
+        d'origine ; sans correspondance, Position et Team Name restent vides. L'index du résultat est
+        celui des lignes de `data` dont elles proviennent.
+        """
+        data = data[data['player_name'].notna()]
+        source_rows = data.index.to_numpy()
+        data = data.assign(_occurrence=data.groupby('player_name', sort=False).cumcount().to_numpy())
+
+        players = players_data[['player_name', 'Position', 'Team Name']]
+        players = players.assign(_occurrence=players.groupby('player_name', sort=False).cumcount().to_numpy())
+
+        merged = data.merge(players, how='left', on=['player_name', '_occurrence'], sort=False)
+        merged.index = source_rows
+
+        # Regrouper les homonymes : tri stable sur le rang de première apparition du nom
+        first_seen, _ = pd.factorize(merged['player_name'])
+        merged = merged.iloc[np.argsort(first_seen, kind='stable')]
+        return merged.drop(columns='_occurrence')
+
+    def clean_and_save_data(self, output_path):
+        """Charge, nettoie les données, ajoute la position et l'équipe des joueurs, et sauvegarde les résultats dans un fichier CSV."""
+        # Charger le fichier CSV du scouting report dans un DataFrame
+        data = pd.read_csv(self.file_path)
+
+        # Charger le fichier players_data.csv contenant le nom, la position et l'équipe des joueurs
+        players_data = pd.read_csv(self.players_data_path)
+        players_data = players_data.rename(columns={'Player Name': 'player_name'})
+
+        # Nettoyer les données en conservant uniquement les lignes valides
+        cleaned_data = data[self.valid_rows_mask(data)]
+
+        # Fusionner les données du scouting report avec les données des joueurs en respectant l'ordre
+        final_data = self.merge_homonyms(cleaned_data, players_data)
+
+        # Réorganiser les colonnes pour placer "Position" et "Team Name" juste après "player_name"
+        columns = ['player_name', 'Position', 'Team Name'] + [col for col in cleaned_data.columns if col != 'player_name']
+        final_data = final_data[columns]
+
+        # Sauvegarder les données nettoyées et enrichies dans un nouveau fichier CSV
+        final_data.to_csv(output_path, index=False, header=True)
+
+        print(f"Données nettoyées et enrichies avec les équipes sauvegardées dans {output_path}.")
+        return final_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nettoyage du scouting report et ajout du poste et de l'équipe")
+    parser.add_argument('--report', default='data/scouting_report.csv', help="Scouting report brut")
+    parser.add_argument('--players', default='data/players_data.csv', help="Fichier des joueurs (nom, poste, URL, équipe)")
+    parser.add_argument('--output', default='data/cleaned_scouting_report.csv', help="Fichier CSV nettoyé")
+    args = parser.parse_args()
+
+    ScoutingReportCleaner(args.report, args.players).clean_and_save_data(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+import argparse
+import glob
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_cache import prepare_dataframe, read_columns, write_columns
+from name_index import NameIndex
+from player_index import build_hash_index
+
+# Clé d'une ligne du stock : un joueur, une saison, une équipe
+KEY_COLUMNS = ['player_name', 'Saison', 'Team Name']
+
+STORE_FORMAT_VERSION = 1
+
+# Saison complète ("2019-2020"), ou année seule désignant la saison qui se termine cette année-là ("2020")
+SEASON_PATTERN = re.compile(r'^(?P<start>\d{4})-(?P<end>\d{4})$')
+YEAR_PATTERN = re.compile(r'^\d{4}$')
+# Équipe suffixée de l'année de fin de saison, comme dans season_players_extractor.ipynb ("Paris Saint-Germain2020")
+TEAM_SEASON_PATTERN = re.compile(r'^(?P<team>.*\D)(?P<year>(19|20)\d{2})$')
+
+# Colonnes des fichiers de carrière (career_ingest.py) pouvant être réellement négatives : -1 n'y marque pas une valeur manquante
+SIGNED_CAREER_COLUMNS = ['A-xAG']
+# Taux et moyennes des fichiers de carrière : pondérés par les minutes quand les compétitions d'une saison sont regroupées
+RATE_CAREER_COLUMNS = ['TC%', 'Tir/90', 'TC/90', 'B/Tir', 'B/TC', 'Dist', 'Succ%', 'Tkld%', 'Cmp%', 'Tcl%']
+
+
+def season_end(season):
+    """Année de fin d'une saison ("2019-2020", "2020" ou 2020 -> 2020), ou None si le format est inconnu."""
+    if season is None or (isinstance(season, float) and np.isnan(season)):
+        return None
+    if isinstance(season, (int, np.integer)):
+        return int(season)
+    season = str(season).strip()
+    match = SEASON_PATTERN.match(season)
+    if match:
+        return int(match.group('end'))
+    if YEAR_PATTERN.match(season):
+        return int(season)
+    return None
+
+
+def season_label(season):
+    """Libellé "2019-2020" d'une saison donnée par son libellé ou son année de fin."""
+    end = season_end(season)
+    return None if end is None else f"{end - 1}-{end}"
+
+
+def split_team_season(team_name):
+    """("Paris Saint-Germain2020") -> ("Paris Saint-Germain", "2019-2020") ; (équipe, None) sans suffixe d'année."""
+    match = TEAM_SEASON_PATTERN.match(str(team_name))
+    if not match:
+        return team_name, None
+    return match.group('team').strip(), season_label(match.group('year'))
+
+
+class SeasonStore:
+    """Stock joueur x saison, en ajout seul, partitionné par saison et stocké colonne par colonne.
+
+    Chaque ajout écrit, pour chaque saison concernée, une nouvelle partie `Saison=<saison>/part-<n>/`
+    (un fichier .npy par colonne et un meta.json, comme l'instantané de DataCache) puis remplace
+    atomiquement le manifeste : une partie n'est visible qu'une fois complète, et rien n'est réécrit.
+    À l'ouverture, seules les colonnes de la clé (joueur, saison, équipe) sont lues pour construire
+    l'index : `get` est un accès au dictionnaire, `trajectory` lit un intervalle contigu des saisons
+    d'un joueur, et les autres colonnes ne sont lues que pour les parties concernées.
+
+    Une même clé peut venir de plusieurs sources (fichier de carrière et rapport de scouting de la
+    saison) : les lignes sont toutes conservées et fusionnées à la lecture en une seule, colonne par
+    colonne. Une colonne renseignée par une seule source garde sa valeur ; renseignée par plusieurs,
+    c'est la valeur de l'ajout le plus récent qui l'emporte.
+    """
+
+    def __init__(self, root='data/seasons'):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.parts = self._read_manifest()
+        self._frames = {}
+        self._build_index()
+
+    # Manifeste et parties
+
+    def _read_manifest(self):
+        if not os.path.isfile(self.manifest_path):
+            return []
+        with open(self.manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Version du stock non prise en charge : {manifest.get('version')}")
+        return manifest['parts']
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': STORE_FORMAT_VERSION, 'parts': self.parts}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _part_meta(self, part_id):
+        with open(os.path.join(self.root, self.parts[part_id]['path'], 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _read_part(self, part_id, names=None):
+        """Colonnes d'une partie (toutes, ou seulement `names`) ; les parties lues en entier sont gardées en mémoire."""
+        if names is None and part_id in self._frames:
+            return self._frames[part_id]
+        meta = self._part_meta(part_id)
+        frame = read_columns(os.path.join(self.root, self.parts[part_id]['path']), meta['columns'], names)
+        if names is None:
+            self._frames[part_id] = frame
+        return frame
+
+    # Index des clés
+
+    def _build_index(self):
+        """Clés distinctes de toutes les parties, triées par joueur puis saison (puis ordre d'ajout).
+
+        `keys` a une ligne par clé ; les lignes écrites pour la clé de position `i` (une par source, dans
+        l'ordre d'ajout) sont aux positions `key_bounds[i]:key_bounds[i + 1]` de `key_parts` et `key_rows`.
+        """
+        rows = [self._read_part(part_id, KEY_COLUMNS).assign(part=part_id, row=np.arange(self.parts[part_id]['rows']))
+                for part_id in range(len(self.parts))]
+        if rows:
+            rows = pd.concat(rows, ignore_index=True)
+        else:
+            rows = pd.DataFrame({column: pd.Series(dtype=object) for column in KEY_COLUMNS}).assign(part=0, row=0)
+        rows['season_end'] = rows['Saison'].map(season_end).astype(np.int64)
+        # Numéro de clé dans l'ordre de première apparition : les lignes d'une même clé se suivent après le tri
+        rows['key'] = rows.groupby(KEY_COLUMNS, sort=False).ngroup()
+        rows = rows.sort_values(['player_name', 'season_end', 'key', 'part', 'row'], kind='stable').reset_index(drop=True)
+        key_codes = rows['key'].to_numpy()
+        first = np.flatnonzero(np.r_[True, key_codes[1:] != key_codes[:-1]]) if len(rows) else np.array([], dtype=np.intp)
+
+        self.key_parts = rows['part'].to_numpy(dtype=np.intp)
+        self.key_rows = rows['row'].to_numpy(dtype=np.intp)
+        self.key_bounds = np.r_[first, len(rows)].astype(np.intp)
+        keys = rows.iloc[first][KEY_COLUMNS + ['season_end']].reset_index(drop=True)
+        self.keys = keys
+        self.key_seasons = keys['season_end'].to_numpy(dtype=np.int64)
+        self.key_index = {key: position for position, key in
+                          enumerate(zip(keys['player_name'], keys['Saison'], keys['Team Name']))}
+        # Joueur -> intervalle [début, fin) de ses lignes dans l'index trié
+        self.player_ranges = {name: (int(positions[0]), int(positions[-1]) + 1)
+                              for name, positions in build_hash_index(keys['player_name'].to_numpy(dtype=object)).items()}
+
+    def key_sources(self, position):
+        """Sources des lignes écrites pour la clé de position `position`, dans l'ordre d'ajout."""
+        parts = self.key_parts[self.key_bounds[position]:self.key_bounds[position + 1]]
+        return [self.parts[part_id]['source'] for part_id in parts]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def players(self):
+        return sorted(self.player_ranges)
+
+    def seasons(self, player_name=None):
+        """Saisons présentes dans le stock, ou celles d'un joueur, dans l'ordre chronologique."""
+        seasons = self.key_seasons if player_name is None else self.key_seasons[slice(*self.player_ranges.get(player_name, (0, 0)))]
+        return [season_label(end) for end in np.unique(seasons)]
+
+    # Écriture
+
+    def append(self, frame, source=None):
+        """Ajoute des lignes (colonnes `KEY_COLUMNS` obligatoires) et renvoie le nombre de lignes écrites.
+
+        Les clés en double dans `frame`, ou déjà ajoutées depuis la même `source`, ne sont pas réécrites.
+        Une clé déjà présente depuis une autre source est écrite aussi : les deux lignes sont fusionnées
+        à la lecture, les valeurs de cet ajout l'emportant sur les colonnes renseignées des deux côtés.
+        """
+        missing = [column for column in KEY_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Colonnes de clé manquantes : {', '.join(missing)}")
+
+        frame = frame.copy()
+        frame['Saison'] = frame['Saison'].map(season_label)
+        unknown = frame['Saison'].isna()
+        if unknown.any():
+            print(f"{int(unknown.sum())} ligne(s) sans saison reconnue ignorée(s)")
+        frame = frame[~unknown & frame['player_name'].notna() & frame['Team Name'].notna()]
+        for column in KEY_COLUMNS:
+            frame[column] = frame[column].astype(str)
+
+        keys = list(zip(frame['player_name'], frame['Saison'], frame['Team Name']))
+        positions = [self.key_index.get(key) for key in keys]
+        new = np.array([position is None or source not in self.key_sources(position) for position in positions], dtype=bool)
+        new &= ~pd.Series(keys, dtype=object).duplicated().to_numpy()
+        if (~new).any():
+            print(f"{int((~new).sum())} ligne(s) déjà présente(s) dans le stock ignorée(s)")
+        merged = sum(1 for position, is_new in zip(positions, new) if is_new and position is not None)
+        if merged:
+            print(f"{merged} ligne(s) complétant une clé ajoutée depuis une autre source (fusionnées à la lecture)")
+        frame = frame[new].reset_index(drop=True)
+        if frame.empty:
+            return 0
+
+        os.makedirs(self.root, exist_ok=True)
+        for season, season_frame in frame.groupby('Saison', sort=True):
+            part_number = sum(1 for part in self.parts if part['season'] == season)
+            path = os.path.join(f"Saison={season}", f"part-{part_number:05d}")
+            directory = os.path.join(self.root, path)
+            os.makedirs(directory, exist_ok=True)
+            columns = write_columns(season_frame.reset_index(drop=True), directory)
+            with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({'version': STORE_FORMAT_VERSION, 'source': source, 'columns': columns}, f, ensure_ascii=False)
+            self.parts.append({'path': path, 'season': season, 'rows': len(season_frame), 'source': source})
+
+        # Le manifeste est écrit en dernier : une partie n'existe dans le stock qu'une fois complète
+        self._write_manifest()
+        self._build_index()
+        return len(frame)
+
+    # Lecture
+
+    def _take(self, positions, columns=None):
+        """Lignes du stock aux positions `positions` de l'index trié, dans cet ordre (une ligne fusionnée par clé)."""
+        if not len(positions):
+            return pd.DataFrame(columns=KEY_COLUMNS if columns is None else KEY_COLUMNS + list(columns))
+        # Lignes écrites pour chaque clé, à la suite et dans l'ordre d'ajout
+        positions = np.asarray(positions, dtype=np.intp)
+        starts = self.key_bounds[positions]
+        counts = self.key_bounds[positions + 1] - starts
+        written = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        parts = self.key_parts[written]
+        rows = self.key_rows[written]
+        pieces = []
+        for part_id in np.unique(parts):
+            selected = np.flatnonzero(parts == part_id)
+            piece = self._read_part(int(part_id)).iloc[rows[selected]]
+            pieces.append(piece.set_axis(selected))
+        frame = pd.concat(pieces).sort_index().reset_index(drop=True)
+        if len(written) > len(positions):
+            # Clé ajoutée depuis plusieurs sources : dernière valeur renseignée de chaque colonne
+            frame = frame.groupby(np.repeat(np.arange(len(positions)), counts), sort=True).last().reset_index(drop=True)
+        if columns is not None:
+            frame = frame.reindex(columns=KEY_COLUMNS + [column for column in columns if column not in KEY_COLUMNS])
+        return frame
+
+    def scan(self, columns=None):
+        """Toutes les lignes du stock (une par clé), triées par joueur puis saison (alignées sur `key_seasons`)."""
+        return self._take(np.arange(len(self)), columns)
+
+    def get(self, player_name, season, team_name):
+        """Ligne (Series) d'un joueur pour une saison et une équipe, ou None."""
+        position = self.key_index.get((player_name, season_label(season), team_name))
+        if position is None:
+            return None
+        return self._take(np.array([position])).iloc[0]
+
+    def trajectory(self, player_name, start=None, end=None, columns=None):
+        """Saisons d'un joueur entre `start` et `end` inclus (libellés ou années de fin), dans l'ordre chronologique."""
+        first, last = self.player_ranges.get(player_name, (0, 0))
+        seasons = self.key_seasons[first:last]
+        low = first + (np.searchsorted(seasons, season_end(start), side='left') if start is not None else 0)
+        high = first + (np.searchsorted(seasons, season_end(end), side='right') if end is not None else len(seasons))
+        return self._take(np.arange(low, high), columns)
+
+    def compare(self, player_name, season1, season2, columns=None):
+        """Profils d'un joueur sur deux saisons côte à côte et leur écart (variables x [saison 1, saison 2, écart]), ou None.
+
+        Pour une saison jouée dans plusieurs équipes, la dernière ligne ajoutée est utilisée.
+        """
+        profiles = []
+        for season in (season1, season2):
+            trajectory = self.trajectory(player_name, season, season, columns)
+            if trajectory.empty:
+                print(f"Aucune donnée pour {player_name} en {season_label(season)}.")
+                return None
+            profiles.append(trajectory.iloc[-1].drop(KEY_COLUMNS))
+
+        labels = [season_label(season1), season_label(season2)]
+        frame = pd.concat(profiles, axis=1, keys=labels)
+        frame = frame[pd.to_numeric(frame[labels[0]], errors='coerce').notna() |
+                      pd.to_numeric(frame[labels[1]], errors='coerce').notna()].apply(pd.to_numeric, errors='coerce')
+        frame['Écart'] = frame[labels[1]] - frame[labels[0]]
+        return frame
+
+    def as_of(self, data, season, columns=None, suffix=' (historique)'):
+        """Jointure « à date » : chaque joueur de `data` reçoit sa dernière saison du stock jusqu'à `season` incluse.
+
+        Les colonnes du stock sont ajoutées avec `suffix` ; 'Saison (historique)' indique la saison retenue
+        (vide si le joueur n'a aucune saison antérieure dans le stock).
+        """
+        target = season_end(season)
+        # Dernière position de chaque joueur dont la saison est <= target (l'index est trié par joueur puis saison)
+        eligible = np.flatnonzero(self.key_seasons <= target)
+        names = self.keys['player_name'].to_numpy(dtype=object)[eligible]
+        last = pd.Series(eligible).groupby(names, sort=False).last()
+
+        history = self._take(last.to_numpy(), columns)
+        history = history.drop(columns=['Team Name']).rename(columns={'player_name': '_player_name'})
+        history = history.add_suffix(suffix).rename(columns={f'_player_name{suffix}': 'player_name'})
+        merged = data.merge(history, on='player_name', how='left')
+        merged.index = data.index
+        return merged
+
+    def nbytes(self):
+        """Mémoire de l'index des clés et des parties lues en entier."""
+        return int(self.keys.memory_usage(deep=True).sum()) + sum(int(frame.memory_usage(deep=True).sum())
+                                                                   for frame in self._frames.values())
+
+
+def collapse_competitions(frame):
+    """Une ligne par saison et par équipe : totaux sommés sur les compétitions, taux pondérés par les minutes."""
+    group_columns = ['Saison', 'Équipe']
+    rates = [column for column in RATE_CAREER_COLUMNS if column in frame.columns]
+    totals = [column for column in frame.select_dtypes(include='number').columns
+              if column not in rates + ['Âge', 'Min']]
+
+    grouped = frame.groupby(group_columns, sort=False)
+    collapsed = grouped[totals + ['Min']].sum(min_count=1)
+    collapsed.insert(0, 'Âge', grouped['Âge'].min())
+    collapsed.insert(1, 'Comp', grouped['Comp'].agg(lambda comps: ', '.join(comps.dropna().astype(str))))
+    for column in rates:
+        weights = frame['Min'].where(frame[column].notna())
+        weighted = (frame[column] * weights).groupby([frame[key] for key in group_columns], sort=False).sum(min_count=1)
+        collapsed[column] = weighted / weights.groupby([frame[key] for key in group_columns], sort=False).sum(min_count=1)
+    return collapsed.reset_index()[frame.columns]
+
+
+def read_career_file(path, player_name=None):
+    """Fichier `<Joueur>_merged_stats.csv` (career_ingest.py) mis au format du stock.
+
+    Les -1 (valeurs manquantes) sont remplacés par NaN et les compétitions d'une même saison regroupées.
+    """
+    frame = pd.read_csv(path)
+    if player_name is None:
+        player_name = os.path.basename(path)[:-len('_merged_stats.csv')]
+    numeric = [column for column in frame.select_dtypes(include='number').columns if column not in SIGNED_CAREER_COLUMNS]
+    frame[numeric] = frame[numeric].mask(frame[numeric] == -1)
+    frame = collapse_competitions(frame).rename(columns={'Équipe': 'Team Name'})
+    frame.insert(0, 'player_name', player_name)
+    return frame
+
+
+def ingest_careers(store, directory='data/comparaison', names=None):
+    """Ajoute au stock tous les fichiers de carrière d'un dossier ; renvoie le nombre de lignes écrites.
+
+    Avec un index des noms (NameIndex), le nom tiré du fichier est remplacé par celui du rapport de scouting
+    s'il est identique aux accents près, ou s'il est le nom de famille d'un seul joueur ("Griezmann" ->
+    "Antoine Griezmann"), pour que les jointures avec le rapport le retrouvent. Aucun nom approché n'est retenu.
+    """
+    written = 0
+    for path in sorted(glob.glob(os.path.join(directory, '*_merged_stats.csv'))):
+        frame = read_career_file(path)
+        file_name = frame['player_name'].iat[0] if not frame.empty else None
+        match = None
+        if names is not None and file_name is not None:
+            match = names.exact(file_name) or names.resolve_surname(file_name)
+        if match is not None and match.name != file_name:
+            print(f"« {file_name} » : {match.name}")
+            frame['player_name'] = match.name
+        written += store.append(frame, source=os.path.basename(path))
+    return written
+
+
+def ingest_snapshot(store, file_path, season=None):
+    """Ajoute un rapport de scouting (une ligne par joueur) pour une saison.
+
+    Sans saison, elle est lue dans le suffixe des noms d'équipe ("Paris Saint-Germain2020" -> 2019-2020).
+    """
+    frame = prepare_dataframe(pd.read_csv(file_path))
+    teams = frame['Team Name'].astype(object)
+    if season is None:
+        split = teams.map(split_team_season)
+        frame['Team Name'] = split.str[0]
+        frame['Saison'] = split.str[1]
+    else:
+        frame['Team Name'] = teams
+        frame['Saison'] = season_label(season)
+    return store.append(frame, source=os.path.basename(file_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock joueur x saison : ajout des carrières et des rapports de scouting par saison")
+    parser.add_argument('--root', default='data/seasons', help="Dossier du stock")
+    parser.add_argument('--careers', default='data/comparaison', help="Dossier des fichiers <Joueur>_merged_stats.csv ('' pour ignorer)")
+    parser.add_argument('--snapshot', default=None, help="Rapport de scouting à ajouter (ex. data/cleaned_scouting_report.csv)")
+    parser.add_argument('--season', default=None, help="Saison du rapport (ex. 2024-2025) ; sinon lue dans le suffixe des équipes")
+    parser.add_argument('--names', default='data/cleaned_scouting_report.csv', help="Rapport dont les noms complètent ceux des fichiers de carrière")
+    parser.add_argument('--player', default=None, help="Joueur dont afficher la trajectoire")
+    args = parser.parse_args()
+
+    store = SeasonStore(args.root)
+    if args.careers:
+        names = NameIndex(pd.read_csv(args.names, usecols=['player_name'])['player_name']) if args.names else None
+        print(f"Carrières : {ingest_careers(store, args.careers, names)} ligne(s) ajoutée(s)")
+    if args.snapshot:
+        print(f"{args.snapshot} : {ingest_snapshot(store, args.snapshot, args.season)} ligne(s) ajoutée(s)")
+    print(f"Stock {args.root} : {len(store)} lignes, {len(store.players())} joueurs, {len(store.parts)} parties, "
+          f"saisons {', '.join(store.seasons()) or '-'}")
+
+    if args.player:
+        trajectory = store.trajectory(args.player)
+        print(trajectory[KEY_COLUMNS].to_string(index=False) if not trajectory.empty else f"Aucune saison pour {args.player}.")
+
+
+if __name__ == "__main__":
+    main()
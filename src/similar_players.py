@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from similarity_index import SimilarityIndex
+
+
+class SimilarPlayersEngine:
+    """Calcule en une passe les k plus proches voisins de tous les joueurs d'un groupe de postes.
+
+    Les distances portent sur toutes les variables standardisées du groupe (index de similarité),
+    et non sur les deux composantes PCA qui ne servent qu'à l'affichage.
+    """
+
+    def __init__(self, extractor, metric='euclidean', weights=None):
+        self.extractor = extractor
+        self.metric = metric
+        self.weights = weights
+
+    def index_group(self, group_key):
+        """Joueurs du groupe de postes et index de similarité construit sur la matrice du groupe (FeatureStore)."""
+        group = self.extractor.feature_store.group(group_key)
+        players = group.players(self.extractor.data)
+        if players.empty:
+            return players, None
+        return players, SimilarityIndex.from_group(group, metric=self.metric, weights=self.weights)
+
+    def top_k_for_group(self, group_key, k=10):
+        """Table des k joueurs les plus proches pour chaque joueur du groupe de postes."""
+        players, index = self.index_group(group_key)
+        if players.empty:
+            print(f"Aucun joueur trouvé pour le groupe {group_key}.")
+            return pd.DataFrame()
+
+        indices, distances = index.top_k_all(k)
+        n, k = indices.shape
+
+        names = players['player_name'].to_numpy(dtype=object)
+        teams = players['Team Name'].to_numpy(dtype=object)
+        player_positions = players['Position'].to_numpy(dtype=object)
+        rows = np.repeat(np.arange(n), k)
+
+        return pd.DataFrame({
+            'player_name': names[rows],
+            'Team Name': teams[rows],
+            'Position': player_positions[rows],
+            'Rang': np.tile(np.arange(1, k + 1), n),
+            'Joueur similaire': names[indices.ravel()],
+            'Équipe similaire': teams[indices.ravel()],
+            'Distance': distances.ravel().round(4),
+        })
+
+    def export_group(self, group_key, k=10, output_dir='viz_data/similarity'):
+        """Calcule la table des voisins d'un groupe de postes et l'enregistre en CSV."""
+        table = self.top_k_for_group(group_key, k=k)
+        if table.empty:
+            return None
+
+        os.makedirs(output_dir, exist_ok=True)
+        positions = self.extractor.feature_store.group(group_key).positions
+        output_path = os.path.join(output_dir, f"similar_players_{'_'.join(positions)}.csv")
+        table.to_csv(output_path, index=False)
+        print(f"Table des joueurs similaires ({len(table)} lignes) sauvegardée dans {output_path}")
+        return output_path
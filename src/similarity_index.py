@@ -0,0 +1,110 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+METRICS = ('euclidean', 'cosine', 'mahalanobis')
+
+
+class SimilarityIndex:
+    """Index de similarité sur les variables complètes (standardisées) d'un groupe de joueurs.
+
+    Chaque métrique est ramenée à une distance euclidienne dans un espace transformé, calculé une fois :
+    - 'euclidean' : variables standardisées, multipliées par la racine des poids éventuels ;
+    - 'cosine' : mêmes vecteurs, normalisés (distance cosinus = carré de la distance euclidienne / 2) ;
+    - 'mahalanobis' : variables standardisées puis blanchies par la covariance du groupe.
+    Une requête pour un joueur se résume alors à un produit matrice-vecteur.
+    """
+
+    def __init__(self, matrix, metric='euclidean', weights=None):
+        if metric not in METRICS:
+            raise ValueError(f"Métrique inconnue : {metric}")
+        if weights is not None and metric == 'mahalanobis':
+            raise ValueError("Les poids ne s'appliquent pas à la distance de Mahalanobis, invariante par changement d'échelle.")
+
+        matrix = np.asarray(matrix, dtype=np.float64)
+        self.metric = metric
+        self.mean = matrix.mean(axis=0)
+        std = matrix.std(axis=0)
+        self.std = np.where(std > 0, std, 1.0)
+        standardized = (matrix - self.mean) / self.std
+
+        if metric == 'mahalanobis':
+            # Covariance légèrement régularisée pour rester inversible (variables très corrélées)
+            covariance = np.atleast_2d(np.cov(standardized, rowvar=False)) + 1e-6 * np.eye(matrix.shape[1])
+            self.transform = np.linalg.inv(np.linalg.cholesky(covariance)).T
+        else:
+            scale = np.ones(matrix.shape[1]) if weights is None else np.sqrt(np.asarray(weights, dtype=np.float64))
+            self.transform = np.diag(scale)
+
+        self.vectors = self._embed(standardized)
+        self.squared_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self._tree = None
+
+    @classmethod
+    def from_players(cls, players, features, metric='euclidean', weights=None):
+        """Index construit à partir des colonnes `features` d'un DataFrame ; `weights` peut être un dict par variable."""
+        if isinstance(weights, dict):
+            weights = [weights.get(feature, 1.0) for feature in features]
+        return cls(players[features].to_numpy(dtype=np.float64), metric=metric, weights=weights)
+
+    @classmethod
+    def from_group(cls, group, metric='euclidean', weights=None):
+        """Index construit directement sur la matrice d'un groupe du magasin de variables (FeatureStore)."""
+        if isinstance(weights, dict):
+            weights = [weights.get(feature, 1.0) for feature in group.features]
+        return cls(group.matrix, metric=metric, weights=weights)
+
+    def _embed(self, standardized):
+        vectors = standardized @ self.transform
+        if self.metric == 'cosine':
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1.0)
+        return np.ascontiguousarray(vectors)
+
+    def _to_metric(self, squared):
+        squared = np.maximum(squared, 0.0)
+        return squared / 2 if self.metric == 'cosine' else np.sqrt(squared)
+
+    def embed(self, vector):
+        """Projette un vecteur brut (mêmes variables que l'index) dans l'espace de l'index."""
+        return self._embed(((np.asarray(vector, dtype=np.float64) - self.mean) / self.std)[None, :])[0]
+
+    def distances_from(self, row):
+        """Distances de tous les joueurs au joueur en position `row`."""
+        vector = self.vectors[row]
+        return self._to_metric(self.squared_norms - 2 * (self.vectors @ vector) + self.squared_norms[row])
+
+    def pairwise(self, rows):
+        """Matrice (k, k) des distances entre les joueurs aux positions `rows`, en un seul produit matriciel."""
+        vectors = self.vectors[rows]
+        norms = self.squared_norms[rows]
+        distances = self._to_metric(norms[:, None] + norms[None, :] - 2 * (vectors @ vectors.T))
+        np.fill_diagonal(distances, 0.0)
+        return distances
+
+    def query(self, row, k=10, exclude_self=True):
+        """Positions et distances des k joueurs les plus proches du joueur en position `row`, triés."""
+        distances = self.distances_from(row)
+        if exclude_self:
+            distances[row] = np.inf
+        k = min(k, len(distances) - int(exclude_self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return nearest, distances[nearest]
+
+    def top_k_all(self, k=10):
+        """Voisins de tous les joueurs (soi-même exclu) : tableaux (n, k) de positions et de distances."""
+        n = len(self.vectors)
+        k = min(k, n - 1)
+        if k <= 0:
+            return np.empty((n, 0), dtype=np.intp), np.empty((n, 0))
+        if self._tree is None:
+            self._tree = cKDTree(self.vectors)
+        distances, indices = self._tree.query(self.vectors, k=k + 1)
+
+        # Retirer le joueur lui-même ; s'il n'apparaît pas (doublons à distance nulle), retirer le dernier voisin
+        keep = indices != np.arange(n)[:, None]
+        keep[keep.all(axis=1), -1] = False
+        indices = indices[keep].reshape(n, k)
+        return indices, self._to_metric(distances[keep].reshape(n, k) ** 2)
@@ -0,0 +1,247 @@
+import argparse
+import glob
+import gzip
+import re
+import time
+from html.parser import HTMLParser
+
+TABLE_TAG = re.compile(r'<(/?)table\b[^>]*>', re.IGNORECASE)
+TABLE_OPEN = re.compile(r'<table\b[^>]*>', re.IGNORECASE)
+# Commentaires, blocs <script>/<style> (contenu brut, jamais du HTML) et balises <table> ouvrantes
+DOCUMENT_TOKEN = re.compile(
+    r'<!--(?P<comment>.*?)-->|<(?P<raw>script|style)\b.*?</(?P=raw)\s*>|(?P<table><table\b[^>]*>)',
+    re.IGNORECASE | re.DOTALL,
+)
+ID_ATTRIBUTE = re.compile(r'''\bid\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+
+
+class TableData:
+    """Contenu textuel d'un tableau HTML : lignes d'en-tête (thead) et lignes de données (tbody)."""
+
+    def __init__(self, header_rows, body_rows):
+        self.header_rows = header_rows
+        self.body_rows = body_rows
+
+    @property
+    def headers(self):
+        """Toutes les cellules d'en-tête à plat, comme `[th.text.strip() for th in thead.find_all('th')]`."""
+        return [cell for row in self.header_rows for cell in row]
+
+
+class _TableContentParser(HTMLParser):
+    """Tokeniseur limité au fragment d'un seul tableau : ne garde que le texte des cellules de premier niveau."""
+
+    SECTIONS = ('thead', 'tbody', 'tfoot')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.header_rows = []
+        self.body_rows = []
+        self.depth = 0
+        self.section = None
+        self.row = None
+        self.cell = None
+
+    def _close_cell(self):
+        if self.cell is not None:
+            self.row.append(''.join(self.cell).strip())
+            self.cell = None
+
+    def _close_row(self):
+        if self.row is None:
+            return
+        self._close_cell()
+        if self.section == 'thead':
+            self.header_rows.append(self.row)
+        # Ignorer les lignes vides du corps, comme le parcours BeautifulSoup d'origine
+        elif self.section == 'tbody' and any(self.row):
+            self.body_rows.append(self.row)
+        self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self.depth += 1
+        elif self.depth != 1:
+            return
+        elif tag in self.SECTIONS:
+            self._close_row()
+            self.section = tag
+        elif tag == 'tr':
+            self._close_row()
+            self.row = []
+        elif tag in ('th', 'td') and self.row is not None:
+            self._close_cell()
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if tag == 'table':
+            self.depth -= 1
+            if self.depth == 0:
+                self._close_row()
+        elif self.depth != 1:
+            return
+        elif tag in ('th', 'td'):
+            if self.row is not None:
+                self._close_cell()
+        elif tag == 'tr':
+            self._close_row()
+        elif tag in self.SECTIONS:
+            self._close_row()
+            self.section = None
+
+    def handle_data(self, data):
+        # Le texte des tableaux imbriqués reste dans la cellule englobante, comme `cell.text`
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def _table_id(tag):
+    match = ID_ATTRIBUTE.search(tag)
+    return next(group for group in match.groups() if group is not None) if match else None
+
+
+def _table_end(html, start, stop):
+    """Position de fin du `</table>` fermant le tableau ouvert en `start` (tableaux imbriqués compris)."""
+    depth = 0
+    for match in TABLE_TAG.finditer(html, start, stop):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return stop
+
+
+def iter_tables(html, include_comments=True):
+    """Parcourt les balises <table> ouvrantes de premier niveau : (id, début, fin, dans un commentaire).
+
+    Le contenu des <script> et <style> est ignoré ; celui des commentaires HTML, où FBref cache une
+    partie de ses tableaux, n'est parcouru qu'avec `include_comments`.
+    """
+    for match in DOCUMENT_TOKEN.finditer(html):
+        if match.group('comment') is not None:
+            if not include_comments:
+                continue
+            stop = match.end('comment')
+            position = match.start('comment')
+            while True:
+                inner = TABLE_OPEN.search(html, position, stop)
+                if inner is None:
+                    break
+                end = _table_end(html, inner.start(), stop)
+                yield _table_id(inner.group(0)), inner.start(), end, True
+                position = end
+        elif match.group('table') is not None:
+            end = _table_end(html, match.start(), len(html))
+            yield _table_id(match.group('table')), match.start(), end, False
+
+
+def find_table_html(html, table_id=None, include_comments=True):
+    """Fragment HTML d'un tableau, sans analyser le reste du document, ou None.
+
+    Avec `table_id`, le tableau portant cet id est cherché, y compris dans les commentaires HTML.
+    Sans `table_id`, c'est le premier tableau hors commentaires, comme `soup.find('table')`.
+    """
+    for found_id, start, end, in_comment in iter_tables(html, include_comments and table_id is not None):
+        if table_id is None or found_id == table_id:
+            return html[start:end]
+    return None
+
+
+def _parse_fragment(fragment):
+    parser = _TableContentParser()
+    parser.feed(fragment)
+    parser.close()
+    return TableData(parser.header_rows, parser.body_rows)
+
+
+def parse_table(html, table_id=None, include_comments=True):
+    """En-têtes et lignes d'un tableau (par id, ou le premier), ou None s'il est absent."""
+    fragment = find_table_html(html, table_id, include_comments)
+    return _parse_fragment(fragment) if fragment is not None else None
+
+
+def find_tables_html(html, table_ids, include_comments=True):
+    """Fragments HTML des tableaux demandés ({id: fragment}), en une seule lecture du document."""
+    fragments = {}
+    for table_id, start, end, in_comment in iter_tables(html, include_comments):
+        if table_id in table_ids and table_id not in fragments:
+            fragments[table_id] = html[start:end]
+    return fragments
+
+
+def parse_tables(html, table_ids, include_comments=True):
+    """Tableaux correspondant à chaque id ({id: TableData ou None}), en une seule lecture du document."""
+    fragments = find_tables_html(html, table_ids, include_comments)
+    return {table_id: _parse_fragment(fragments[table_id]) if table_id in fragments else None
+            for table_id in table_ids}
+
+
+def _parse_with_beautifulsoup(html):
+    """Chemin d'origine (DataPlayerExtractor.extract_scouting_report), conservé pour comparaison."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table')
+    if not table:
+        return None
+    thead = table.find('thead')
+    headers = [th.text.strip() for th in thead.find_all('th')] if thead else []
+    rows_data = []
+    tbody = table.find('tbody')
+    if tbody:
+        for row in tbody.find_all('tr'):
+            row_data = [cell.text.strip() for cell in row.find_all(['th', 'td'])]
+            if any(row_data):
+                rows_data.append(row_data)
+    return headers, rows_data
+
+
+def read_page(path):
+    """Lit une page enregistrée, compressée (.gz, ex. cache des pages) ou non."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def benchmark(paths, repeat=3):
+    """Compare le temps d'extraction du premier tableau : BeautifulSoup complet contre extraction ciblée."""
+    pages = [read_page(path) for path in paths]
+    timings = {}
+    for name, parse in (('beautifulsoup', _parse_with_beautifulsoup), ('ciblé', parse_table)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for html in pages:
+                parse(html)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    mismatches = 0
+    for html in pages:
+        reference = _parse_with_beautifulsoup(html)
+        table = parse_table(html)
+        result = (table.headers, table.body_rows) if table else None
+        mismatches += result != reference
+
+    total_mb = sum(len(html) for html in pages) / 1e6
+    for name, duration in timings.items():
+        print(f"{name:>13} : {duration * 1000 / len(pages):8.2f} ms/page ({total_mb / duration:6.1f} Mo/s)")
+    print(f"Accélération : x{timings['beautifulsoup'] / timings['ciblé']:.1f} sur {len(pages)} page(s), "
+          f"{mismatches} résultat(s) différent(s)")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction des tableaux sur des pages enregistrées")
+    parser.add_argument('pages', nargs='*', help="Pages HTML (.html ou .html.gz)")
+    parser.add_argument('--cache_dir', default='data/.cache/pages', help="Dossier du cache des pages, si aucune page n'est donnée")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre de répétitions (le meilleur temps est retenu)")
+    args = parser.parse_args()
+
+    paths = args.pages or sorted(glob.glob(f"{args.cache_dir}/*.html.gz"))
+    if not paths:
+        parser.error("Aucune page à analyser.")
+    benchmark(paths, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
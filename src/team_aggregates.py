@@ -0,0 +1,157 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Variables de la comparaison d'équipes : création d'occasions (tentatives) et finition (réussites)
+XG_COLUMN = 'npxG: xG sans les pénaltys'
+GOALS_COLUMN = 'Buts (sans les pénaltys)'
+# Colonne de minutes jouées servant de poids, si les données en contiennent une
+MINUTES_COLUMNS = ('Minutes', 'Min', 'Minutes jouées')
+STATISTICS = ('sum', 'mean', 'weighted_mean')
+
+
+class TeamAggregates:
+    """Cube équipes x statistiques x variables, calculé une fois par version des données.
+
+    Pour chaque équipe et chaque variable numérique : somme, moyenne et moyenne pondérée par les
+    minutes jouées (égale à la moyenne si les données n'ont pas de colonne de minutes), ainsi que le
+    nombre de joueurs renseignés. Les joueurs retenus par `compare_teams` (npxG > 0 et buts > 0) sont
+    aussi regroupés par équipe : la lecture d'une équipe ou d'une paire d'équipes est un accès direct.
+    """
+
+    def __init__(self, data, index, columns=None, weight_column=None, dtype=np.float64):
+        self.fingerprint = data.attrs.get('fingerprint')
+        self.teams = sorted(index.team_index)
+        self.team_ids = {team: i for i, team in enumerate(self.teams)}
+        self.columns = columns if columns is not None else data.select_dtypes(include='number').columns.tolist()
+        self.column_ids = {column: i for i, column in enumerate(self.columns)}
+        if weight_column is None:
+            weight_column = next((column for column in MINUTES_COLUMNS if column in data.columns), None)
+        self.weight_column = weight_column
+
+        # Équipe de chaque ligne (-1 sans équipe)
+        team_codes = np.full(len(data), -1, dtype=np.intp)
+        for team_id, team in enumerate(self.teams):
+            team_codes[index.team_index[team]] = team_id
+        self.players = np.bincount(team_codes[team_codes >= 0], minlength=len(self.teams))
+
+        values = data[self.columns].to_numpy(dtype=dtype, na_value=np.nan)
+        weights = (data[weight_column].to_numpy(dtype=dtype, na_value=np.nan) if weight_column is not None
+                   else np.ones(len(data), dtype=dtype))
+
+        # Une somme par équipe et par variable (bincount), en ignorant les valeurs manquantes
+        shape = (len(self.teams), len(self.columns))
+        sums, counts, weighted_sums, weight_totals = (np.zeros(shape, dtype=dtype) for _ in range(4))
+        for column_id in range(len(self.columns)):
+            column = values[:, column_id]
+            valid = (team_codes >= 0) & ~np.isnan(column) & ~np.isnan(weights)
+            codes = team_codes[valid]
+            sums[:, column_id] = np.bincount(codes, weights=column[valid], minlength=len(self.teams))
+            counts[:, column_id] = np.bincount(codes, minlength=len(self.teams))
+            weighted_sums[:, column_id] = np.bincount(codes, weights=column[valid] * weights[valid], minlength=len(self.teams))
+            weight_totals[:, column_id] = np.bincount(codes, weights=weights[valid], minlength=len(self.teams))
+
+        self.counts = counts.astype(np.int32)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.cube = np.stack([sums, sums / counts, weighted_sums / weight_totals], axis=1)
+        self.cube.flags.writeable = False
+
+        # Joueurs affichés par compare_teams, par équipe (positions de lignes des données)
+        xg = data[XG_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+        goals = data[GOALS_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+        finishers = np.flatnonzero((team_codes >= 0) & (xg > 0) & (goals > 0))
+        order = np.argsort(team_codes[finishers], kind='stable')
+        bounds = np.searchsorted(team_codes[finishers][order], np.arange(len(self.teams) + 1))
+        self.finisher_rows = [finishers[order[bounds[i]:bounds[i + 1]]] for i in range(len(self.teams))]
+
+    def _statistic_id(self, statistic):
+        if statistic not in STATISTICS:
+            raise ValueError(f"Statistique inconnue : {statistic} (choix : {', '.join(STATISTICS)})")
+        return STATISTICS.index(statistic)
+
+    def team(self, team_name, statistic='sum'):
+        """Agrégats d'une équipe (Series par variable), ou None si l'équipe est inconnue."""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            return None
+        return pd.Series(self.cube[team_id, self._statistic_id(statistic)], index=self.columns, name=team_name)
+
+    def pair(self, team1_name, team2_name, statistic='sum', columns=None):
+        """Agrégats de deux équipes côte à côte et leur écart (variables x [équipe 1, équipe 2, écart]), ou None."""
+        team_ids = [self.team_ids.get(team1_name), self.team_ids.get(team2_name)]
+        if None in team_ids:
+            return None
+        column_ids = slice(None) if columns is None else [self.column_ids[column] for column in columns]
+        values = self.cube[team_ids, self._statistic_id(statistic)][:, column_ids]
+        frame = pd.DataFrame(values.T, index=self.columns if columns is None else columns, columns=[team1_name, team2_name])
+        frame['Écart'] = frame[team1_name] - frame[team2_name]
+        return frame
+
+    def finishers(self, team_name):
+        """Positions des lignes des joueurs d'une équipe ayant npxG > 0 et buts > 0 (vide si l'équipe est inconnue)."""
+        team_id = self.team_ids.get(team_name)
+        return self.finisher_rows[team_id] if team_id is not None else np.array([], dtype=np.intp)
+
+    def xg_table(self, teams=None):
+        """Tableau de toutes les équipes : buts, npxG, surperformance (buts - npxG) et ratio, du meilleur au moins bon finisseur."""
+        sums = self.cube[:, 0]
+        goals = sums[:, self.column_ids[GOALS_COLUMN]]
+        xg = sums[:, self.column_ids[XG_COLUMN]]
+        table = pd.DataFrame({
+            'Joueurs': self.players,
+            GOALS_COLUMN: goals,
+            XG_COLUMN: xg,
+            'Buts - npxG': goals - xg,
+            'Buts / npxG': np.divide(goals, xg, out=np.full(len(xg), np.nan), where=xg > 0),
+        }, index=pd.Index(self.teams, name='Team Name'))
+        if teams is not None:
+            table = table.reindex(teams)
+        return table.sort_values('Buts - npxG', ascending=False)
+
+    def pairwise(self, column=None, statistic='sum', teams=None):
+        """Écarts d'une variable entre toutes les paires d'équipes (équipes x équipes, ligne - colonne), en une opération.
+
+        Sans variable, l'écart porte sur la surperformance (buts - npxG).
+        """
+        team_ids = np.arange(len(self.teams)) if teams is None else np.array([self.team_ids[team] for team in teams])
+        values = self.cube[team_ids, self._statistic_id(statistic)]
+        if column is None:
+            vector = values[:, self.column_ids[GOALS_COLUMN]] - values[:, self.column_ids[XG_COLUMN]]
+        else:
+            vector = values[:, self.column_ids[column]]
+        labels = [self.teams[team_id] for team_id in team_ids]
+        return pd.DataFrame(vector[:, None] - vector[None, :], index=labels, columns=labels)
+
+    def nbytes(self):
+        return self.cube.nbytes + self.counts.nbytes + sum(rows.nbytes for rows in self.finisher_rows)
+
+
+def main():
+    from data_extractor import DataExtractor
+
+    parser = argparse.ArgumentParser(description="Agrégats par équipe : surperformance xG et comparaison de toutes les paires d'équipes")
+    parser.add_argument('--data', default='data/cleaned_scouting_report.csv', help="Fichier de données")
+    parser.add_argument('--teams', default='data/teams_data.csv', help="Liste des équipes à comparer (colonne 'Team Name')")
+    parser.add_argument('--column', default=None, help="Variable comparée entre les paires (par défaut : buts - npxG)")
+    parser.add_argument('--statistic', default='sum', choices=STATISTICS, help="Agrégat utilisé")
+    parser.add_argument('--output_dir', default='viz_data/teams', help="Dossier des tableaux CSV")
+    args = parser.parse_args()
+
+    aggregates = DataExtractor(args.data).team_aggregates
+    teams = [team for team in pd.read_csv(args.teams)['Team Name'].dropna().unique() if team in aggregates.team_ids]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    table = aggregates.xg_table(teams)
+    table_path = os.path.join(args.output_dir, 'xg_vs_goals.csv')
+    table.round(3).to_csv(table_path)
+    matrix_path = os.path.join(args.output_dir, 'pairwise.csv')
+    aggregates.pairwise(args.column, args.statistic, teams).round(3).to_csv(matrix_path)
+
+    print(table.head(10).round(2).to_string())
+    print(f"{len(teams)} équipes : tableau xG/buts dans {table_path}, écarts par paire dans {matrix_path}")
+
+
+if __name__ == "__main__":
+    main()